@@ -10,7 +10,6 @@ import random
 def clean_start():
     print('### ###  Reloading start state  ### ###')
     cin = pickle.load(open('setup.p', 'rb'))
-    abmtools.a_ident=100000
     cin.census()
     gin = cin.groups[0]
     ain = gin.members[0]
@@ -10,7 +10,6 @@ import random
 def clean_start():
     print('### ###  Reloading start state  ### ###')
     cin = pickle.load(open('setup.p', 'rb'))
-    abmtools.a_ident=100000
     cin.census()
     gin = cin.groups[0]
     ain = gin.members[0]
@@ -166,7 +165,6 @@ def test_census():
     c = abmtools.Controller()
     print('Testing abmtools.Controller.census()')
     print('Expected behavior: all agents are in their respective groups, all groups are complete')
-    abmtools.a_ident, abmtools.g_ident = 0, 0
     c.create_groups(10)
     print('Create 10 groups: {}'.format([x.ident for x in c.groups]))
     for i in range(10):
@@ -183,10 +181,42 @@ def test_census():
     assert(all([a in a.group.members for a in c.agents]))
 
 
+def test_idents():
+    new_test()
+    print('Testing ident allocation by abmtools.Controller')
+    print('Expected behavior: every controller numbers its agents and groups from 0 without gaps, idents of killed')
+    print('agents are reused only with reuse_idents=True, and loaded controllers continue after their largest ident')
+    c, d = abmtools.Controller(), abmtools.Controller(reuse_idents=True)
+    for controller in (c, d):
+        controller.create_groups(3)
+        controller.create_agents(5)
+    print('Agent idents: {} and {}'.format([a.ident for a in c.agents], [a.ident for a in d.agents]))
+    assert [a.ident for a in c.agents] == [a.ident for a in d.agents] == [0, 1, 2, 3, 4]
+    assert [g.ident for g in c.groups] == [0, 1, 2]
+    for controller in (c, d):
+        controller.kill(controller.agents[1])
+        controller.create_agents(1)
+        controller.agents[0].hatch()
+    print('After kill, create and hatch: {} and {}'.format([a.ident for a in c.agents], [a.ident for a in d.agents]))
+    assert [a.ident for a in c.agents] == [0, 2, 3, 4, 5, 6]
+    assert [a.ident for a in d.agents] == [0, 2, 3, 4, 1, 5]
+    c.create_agents(1, ident=20)
+    c.create_agents(1)
+    assert c.agents[-1].ident == 21
+    print('Block of idents for a worker: {}'.format(list(c.ident_allocator('agent').allocate_block(3))))
+    assert c.agent_idents.high == 25
+    cin = pickle.load(open('setup.p', 'rb'))
+    largest = max(a.ident for a in cin.agents)
+    cin.create_agents(1)
+    print('Largest ident of loaded controller: {}, new agent: {}'.format(largest, cin.agents[-1].ident))
+    assert cin.agents[-1].ident == largest + 1
+
+
 ###########################################################################
 test_create_agents()
 test_clear_groups()
 test_kill()
 test_agent()
 test_group()
-test_census()
\ No newline at end of file
+test_census()
+test_idents()
@@ -1,23 +1,34 @@
+import os
 import matplotlib
 import matplotlib.pyplot as plt
 matplotlib.use('TKAgg')
 
-raw_data = []
-with open('run.txt') as f:
-    for line in f:
-        raw_data.append(line.split(","))
+if os.path.isdir('run_1'):
+    # Binary columns written by abmtools.ColumnarSink: memory-mapped, no parsing needed
+    os.sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+    import abmtools
+    columns, meta = abmtools.load_columns('run_1')
+    fs = columns['fraction_shirkers']
+    fc = columns['fraction_cooperators']
+    fr = columns['fraction_reciprocators']
+    sr = columns['shirking_rate']
+else:
+    raw_data = []
+    with open('run.txt') as f:
+        for line in f:
+            raw_data.append(line.split(","))
 
-data = []
-for line in raw_data:
-    try:
-        data.append([float(item) for item in line])
-    except ValueError:
-        pass
+    data = []
+    for line in raw_data:
+        try:
+            data.append([float(item) for item in line])
+        except ValueError:
+            pass
 
-fs = [line[1] for line in data]
-fc = [line[2] for line in data]
-fr = [line[3] for line in data]
-sr = [line[6] for line in data]
+    fs = [line[1] for line in data]
+    fc = [line[2] for line in data]
+    fr = [line[3] for line in data]
+    sr = [line[6] for line in data]
 
 plt.plot(fs[:10000], 'r-')
 plt.plot(fc[:10000], 'y-')
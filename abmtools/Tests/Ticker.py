@@ -2,7 +2,11 @@ import os
 parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(0, parentdir)
 from collections import OrderedDict
+import multiprocessing
 import pickle
+import random
+import sqlite3
+import tempfile
 import abmtools
 import partymodel
 
@@ -11,7 +15,6 @@ import partymodel
 def clean_start():
     print('### ###  Reloading start state  ### ###')
     cin = pickle.load(open('setup.p', 'rb'))
-    abmtools.a_ident=100000
     cin.census()
     gin = cin.groups[0]
     ain = gin.members[0]
@@ -75,7 +78,7 @@ def test_report():
     c.reporters = OrderedDict([("n_agents", "Nr.Agents"), ("boringgroups", "Nr.BoringGroups")])
     print("Selected reporters: {}".format(c.reporters))
     print("Values of reporters for first 3 steps: ")
-    t.set_step(partymodel.step, c, t.ticks)
+    t.set_step(partymodel.step, c)
     rep0 = t.report()
     t.step()
     rep1 = t.report()
@@ -86,7 +89,335 @@ def test_report():
     print("0: {}1: {}2: {}3: {}".format(rep0, rep1, rep2, rep3))
 
 
+def shuffle_step(c):
+    # Quiet step function: move one random partier to a random group and count boring groups
+    c.move(random.choice(c.agents), random.choice(c.groups))
+    c.count_boring()
+
+
+def test_columnar_sink():
+    new_test()
+    print("Test abmtools.ColumnarSink with abmtools.Ticker")
+    print("Expected behavior: every reporter becomes a typed column next to a tick column, setupvars are metadata")
+    print("Tested with 2500 steps and a capacity of 1000 rows, so the columns have to grow twice")
+    directory = tempfile.mkdtemp()
+    t, c = partymodel_start()
+    c.reporters = OrderedDict([("n_agents", "Nr.Agents"), ("boringgroups", "Nr.BoringGroups")])
+    t.sink = abmtools.ColumnarSink(os.path.join(directory, "run_{run}"), capacity=1000)
+    t.set_step(shuffle_step, c)
+    expected = []
+    for _ in range(2500):
+        t.step()
+        expected.append(c.boringgroups)
+    t.close()
+    columns, meta = abmtools.load_columns(os.path.join(directory, "run_1"))
+    print("Columns: {}, dtypes: {}, rows: {}".format(list(columns.keys()), meta['dtypes'], meta['length']))
+    print("Setup variables: {}".format(meta['setup']))
+    print("First ticks: {}".format(columns['tick'][:5]))
+    assert list(columns.keys()) == ['tick', 'n_agents', 'boringgroups']
+    assert meta['setup'] == {'n': 70, 'k': 10, 'tolerance': 25}
+    assert len(columns['tick']) == 2500 and list(columns['tick'][:3]) == [0, 1, 2]
+    assert list(columns['boringgroups']) == expected
+
+    print("A run without recorded rows has empty columns, a reporter named tick is rejected")
+    t.run = 2
+    t.open_output()
+    t.close()
+    columns, meta = abmtools.load_columns(os.path.join(directory, "run_2"))
+    assert meta['length'] == 0 and [len(column) for column in columns.values()] == [0, 0, 0]
+    assert columns['tick'].dtype == 'int64' and columns['boringgroups'].dtype == 'float64'
+    c.reporters['tick'] = "Tick"
+    try:
+        t.open_output()
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def sqlite_run(path, run, layout):
+    t, c = partymodel_start()
+    c.reporters = OrderedDict([("n_agents", "Nr.Agents"), ("boringgroups", "Nr.BoringGroups")])
+    t.run = run
+    t.sink = abmtools.SQLiteSink(path, layout=layout, batch_size=64)
+    t.set_step(shuffle_step, c)
+    for _ in range(200):
+        t.step()
+    t.close()
+
+
+def test_sqlite_sink():
+    new_test()
+    print("Test abmtools.SQLiteSink with abmtools.Ticker, 4 runs appended concurrently by separate processes")
+    print("Expected behavior: runs table holds every run with its setupvars, reporter table every tick of every run")
+    directory = tempfile.mkdtemp()
+    for layout in ('long', 'wide'):
+        path = os.path.join(directory, layout + ".sqlite")
+        processes = [multiprocessing.Process(target=sqlite_run, args=(path, run, layout)) for run in range(1, 5)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        db = sqlite3.connect(path)
+        runs = db.execute("SELECT run, n, k, tolerance FROM runs ORDER BY run").fetchall()
+        table = "reports" if layout == 'long' else "reports_wide"
+        counts = db.execute("SELECT run, COUNT(DISTINCT tick) FROM {} GROUP BY run".format(table)).fetchall()
+        print("Layout {}: runs {}, ticks per run {}".format(layout, runs, counts))
+        assert runs == [(run, 70, 10, 25) for run in range(1, 5)]
+        assert counts == [(run, 200) for run in range(1, 5)]
+        if layout == 'wide':
+            agents = db.execute("SELECT DISTINCT n_agents FROM reports_wide").fetchall()
+            assert agents == [(70,)]
+        db.close()
+    t, c = partymodel_start()
+    for reserved in ('run', 'tick'):
+        c.reporters = OrderedDict([("n_agents", "Nr.Agents"), (reserved, reserved.capitalize())])
+        t.sink = abmtools.SQLiteSink(os.path.join(directory, "reserved.sqlite"), layout='wide')
+        try:
+            t.open_output()
+        except ValueError:
+            pass
+        else:
+            assert False
+
+
+def test_compressed_sink():
+    new_test()
+    print("Test abmtools.CompressedSink with abmtools.Ticker, chunks of 100 rows with each codec")
+    print("Expected behavior: reading a range of ticks returns exactly those rows, decompressing only some chunks")
+    directory = tempfile.mkdtemp()
+    for codec in ('gzip', 'lzma', 'bz2'):
+        t, c = partymodel_start()
+        c.reporters = OrderedDict([("n_agents", "Nr.Agents"), ("boringgroups", "Nr.BoringGroups")])
+        t.sink = abmtools.CompressedSink(os.path.join(directory, "run_{run}." + codec), codec=codec, chunk_size=100)
+        t.set_step(shuffle_step, c)
+        expected = []
+        for _ in range(1050):
+            t.step()
+            expected.append(c.boringgroups)
+        t.close()
+        path = os.path.join(directory, "run_1." + codec)
+        columns, rows = abmtools.read_compressed(path, start=420, stop=650)
+        rows = list(rows)
+        with open(path + '.idx') as f:
+            chunks = len(f.readlines()) - 1
+        print("Codec {}: {} chunks, columns {}, rows 420-649: {}".format(codec, chunks, columns, len(rows)))
+        assert chunks == 11 and columns == ['tick', 'n_agents', 'boringgroups']
+        assert [r[0] for r in rows] == list(range(420, 650))
+        assert [int(r[2]) for r in rows] == expected[420:650]
+        assert len(list(abmtools.read_compressed(path)[1])) == 1050
+
+
+def test_iter_run():
+    new_test()
+    print("Test abmtools.Ticker.iter_run() and abmtools.MemorySink")
+    print("Expected behavior: iter_run() yields (tick, values) for recorded ticks only, without writing to file")
+    print("MemorySink keeps typed columns which are returned without copying")
+    t, c = partymodel_start()
+    c.reporters = OrderedDict([("n_agents", "Nr.Agents"), ("boringgroups", "Nr.BoringGroups")])
+    t.interval = 10
+    t.set_step(shuffle_step, c)
+    rows = list(t.iter_run(35))
+    print("Recorded ticks: {}".format([tick for tick, values in rows]))
+    assert [tick for tick, values in rows] == [0, 1, 10, 11, 20, 21, 30, 31]
+    assert all(len(values) == 2 and values[0] == 70 for tick, values in rows)
+
+    t, c = partymodel_start()
+    c.reporters = OrderedDict([("n_agents", "Nr.Agents"), ("boringgroups", "Nr.BoringGroups")])
+    t.sink = abmtools.MemorySink()
+    t.set_step(shuffle_step, c)
+    expected = [values[1] for tick, values in t.iter_run(50, write=True)]
+    columns = t.sink.columns()
+    print("Columns: {}".format({k: v.typecode for k, v in columns.items()}))
+    assert list(columns['tick']) == list(range(50)) and list(columns['boringgroups']) == expected
+    assert columns['boringgroups'] is t.sink.columns()['boringgroups']
+    arrays = t.sink.numpy_columns(['boringgroups'])
+    assert arrays['boringgroups'].tolist() == expected
+    del arrays
+    t.newrun()
+    assert list(t.sink.runs[1]['tick']) == list(range(50))
+
+
+def test_lazy_reporters():
+    new_test()
+    print("Test abmtools.Controller.add_reporter() and add_reporter_update() with interval=10")
+    print("Expected behavior: reporter functions are only called on recorded ticks, once per tick")
+    t, c = partymodel_start()
+    c.reporters = OrderedDict()
+    calls = {'update': 0, 'happy': 0}
+
+    def update():
+        calls['update'] += 1
+        c.count_boring()
+
+    def count_happy(controller):
+        calls['happy'] += 1
+        return sum([a.happy for a in controller.agents])
+
+    c.add_reporter_update(update)
+    c.add_reporter('boringgroups', label='Nr.BoringGroups')
+    c.add_reporter('happy', count_happy, label='Nr.Happy')
+    t.interval = 10
+    t.sink = abmtools.MemorySink()
+
+    def quiet_step(c):
+        c.move(random.choice(c.agents), random.choice(c.groups))
+
+    t.set_step(quiet_step, c)
+    rows = list(t.iter_run(100, write=True))
+    print("Recorded rows: {}, reporter update calls: {}, reporter function calls: {}".format(
+        len(rows), calls['update'], calls['happy']))
+    assert len(rows) == 20 and calls == {'update': 20, 'happy': 20}
+    assert list(t.sink.columns()['boringgroups']) == [values[0] for tick, values in rows]
+
+
+def changing_type_run(sink, values):
+    t, c = partymodel_start()
+    c.reporters = OrderedDict()
+    series = iter(values)
+    c.add_reporter('x', lambda controller: next(series))
+    t.sink = sink
+    t.set_step(lambda: None)
+    t.open_output()
+    for _ in values:
+        t.step()
+    return t
+
+
+def test_changing_types():
+    new_test()
+    print("Test abmtools.MemorySink with a reporter whose values change type")
+    print("Expected behavior: the column is widened (bool -> int -> float -> list) and keeps every value")
+    for values, typecode in (([1, 1.5, 2.0], 'd'), ([True, False, 3], 'q'), ([2, 'many', 4], None)):
+        sink = abmtools.MemorySink()
+        changing_type_run(sink, values)
+        column = sink.columns()['x']
+        print("Values {} stored as {}".format(values, column))
+        assert list(column) == values and getattr(column, 'typecode', None) == typecode
+
+    print("Test abmtools.ColumnarSink with a reporter whose values change from int to float")
+    print("Expected behavior: the column is promoted to floats, an explicitly given int dtype raises TypeError")
+    directory = tempfile.mkdtemp()
+    changing_type_run(abmtools.ColumnarSink(os.path.join(directory, "run_{run}"), capacity=2), [1, 1.5, 2.0]).close()
+    columns, meta = abmtools.load_columns(os.path.join(directory, "run_1"))
+    print("Stored as {} with dtype {}".format(columns['x'].tolist(), meta['dtypes']['x']))
+    assert list(columns['x']) == [1, 1.5, 2.0] and columns['x'].dtype == 'float64' and meta['dtypes']['x'] == '<f8'
+    try:
+        changing_type_run(abmtools.ColumnarSink(os.path.join(directory, "strict_{run}"), dtypes={'x': 'i8'}),
+                          [1, 1.5, 2.0])
+    except TypeError:
+        pass
+    else:
+        assert False
+
+
+def test_schedules():
+    new_test()
+    print("Test abmtools.Ticker with recording schedules")
+    print("Expected behavior: TickList records exactly the listed ticks, LogSchedule log-spaced ticks,")
+    print("ChangeSchedule only ticks at which a reporter changed; text output rows start with their tick")
+
+    def counting_step(c):
+        c.counter += 1
+
+    def run_schedule(schedule, steps):
+        t, c = partymodel_start()
+        c.counter = 0
+        c.reporters = OrderedDict([("plateau", "Plateau")])
+        c.add_reporter('plateau', lambda controller: controller.counter // 10)
+        t.schedule = schedule
+        t.set_step(counting_step, c)
+        return t, [tick for tick, values in t.iter_run(steps)]
+
+    t, ticks = run_schedule(abmtools.TickList([3, 5, 8, 200]), 100)
+    print("TickList: {}".format(ticks))
+    assert ticks == [3, 5, 8]
+    t, ticks = run_schedule(abmtools.LogSchedule(per_decade=4), 1000)
+    print("LogSchedule: {}".format(ticks))
+    assert ticks == [0, 1, 2, 3, 6, 10, 18, 32, 56, 100, 178, 316, 562]
+    t, ticks = run_schedule(abmtools.ChangeSchedule(tolerance=0), 50)
+    print("ChangeSchedule: {}".format(ticks))
+    assert ticks == [0, 9, 19, 29, 39, 49]
+    t, ticks = run_schedule(abmtools.ChangeSchedule(tolerance=0, max_gap=4), 12)
+    print("ChangeSchedule with max_gap=4: {}".format(ticks))
+    assert ticks == [0, 4, 8, 9]
+    t.newrun()
+    t.controller.counter = 0
+    t.outfile = os.path.join(tempfile.mkdtemp(), "run.txt")
+    for _ in range(12):
+        t.step()
+    with open(t.outfile) as f:
+        lines = f.read().splitlines()
+    print("Text output: {}".format(lines))
+    assert lines[3:] == ["tick,plateau", "0,0", "4,0", "8,0", "9,1"]
+
+
+def test_run_steps():
+    new_test()
+    print("Test abmtools.Ticker.run_steps() with a stop condition and with abmtools.SteadyState")
+    print("Expected behavior: stops at the first check at which a condition holds, else after max_steps")
+
+    def counting_step(c):
+        c.counter += 1
+
+    t, c = partymodel_start()
+    c.counter = 0
+    t.set_step(counting_step, c)
+    checks = []
+
+    def reached_25(ticker):
+        checks.append(ticker.ticks)
+        return ticker.controller.counter >= 25
+
+    steps = t.run_steps(100, until=reached_25, check_every=10, write=False)
+    print("Steps run: {}, checked at ticks {}".format(steps, checks))
+    assert steps == 30 and checks == [10, 20, 30]
+
+    t, c = partymodel_start()
+    c.counter = 0
+    c.reporters = OrderedDict([("level", "Level")])
+    # Rises for 200 ticks, then stays flat
+    c.add_reporter('level', lambda controller: min(controller.counter, 200) / 200)
+    t.set_step(counting_step, c)
+    steps = t.run_steps(1000, until=abmtools.SteadyState('level', window=10, threshold=1e-9), write=False)
+    print("Steps run until steady state: {}".format(steps))
+    assert steps == 219
+    steps = t.run_steps(50, write=False)
+    assert steps == 50
+
+
+def test_phases():
+    new_test()
+    print("Test abmtools.Ticker.add_phase() / set_phases() and phase_table()")
+    print("Expected behavior: phases run in order after the step function, timings and calls are kept per phase")
+    order = []
+    t = abmtools.Ticker(phase_series=True)
+    t.set_phases([('first', order.append, ('first',)), ('second', order.append, ('second',))])
+    t.add_phase('third', lambda: order.append('third'))
+    for _ in range(5):
+        t.step(write=False)
+    table = t.phase_table()
+    for row in table:
+        print("Phase {}: {} calls, {:.6f} s, {:.6f} s per call, {:.1%} of total".format(*row))
+    assert order == ['first', 'second', 'third'] * 5
+    assert [(name, calls) for name, calls, total, mean, share in table] == [('first', 5), ('second', 5), ('third', 5)]
+    assert abs(sum(share for name, calls, total, mean, share in table) - 1) < 1e-9
+    assert [len(t.phase_series[name]) for name in ('first', 'second', 'third')] == [5, 5, 5]
+    assert sum(t.phase_series['first']) == t.phase_times['first']
+    t.reset_phase_times()
+    assert t.phase_calls['first'] == 0
+
+
 ###########################################################################
 test_define_setup()
 test_header()
-test_report()
\ No newline at end of file
+test_report()
+test_columnar_sink()
+test_sqlite_sink()
+test_compressed_sink()
+test_iter_run()
+test_lazy_reporters()
+test_changing_types()
+test_schedules()
+test_run_steps()
+test_phases()
\ No newline at end of file
@@ -2,13 +2,14 @@ import os
 parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(0, parentdir)
 import pickle
+import random
+import time
 import abmtools
 
 # SETUP TEST ENVIRONMENT
 def clean_start():
     print('### ###  Reloading start state  ### ###')
     cin = pickle.load(open('setup.p', 'rb'))
-    abmtools.a_ident=100000
     cin.census()
     gin = cin.groups[0]
     ain = gin.members[0]
@@ -20,15 +21,149 @@ def new_test():
 
 def test_tie_creation():
     new_test()
-    print('Test abmtools.Tie() creation')
-    print('Expected behavior: Raises NotImplementedError as ties are not yet implemented')
+    print('Test abmtools.Network.add() creating abmtools.Tie objects')
+    print('Expected behavior: ties connect both agents, adding an existing tie only sets its attributes')
+    c = abmtools.Controller()
+    c.create_agents(4)
+    a, b, d, e = c.agents
+    network = abmtools.Network(c)
+    t = network.add(a, b, weight=0.5)
+    network.add(a, d)
+    network.add(b, a, weight=2.0)
+    print('Tie: {}, weight: {}'.format(t, t['weight']))
+    assert len(network) == 2 and t['weight'] == 2.0 and network.tie(d, a)['weight'] is None
+    assert sorted(x.ident for x in network.neighbors(a)) == [b.ident, d.ident] and network.neighbors(b) == [a]
+    assert network.degree(a) == 2 and network.degree(e) == 0 and t.other(a) is b
+    assert (a, b) in network and (b, d) not in network
+
+
+def test_directed():
+    new_test()
+    print('Test a directed abmtools.Network')
+    print('Expected behavior: neighbors are targets of ties, in_neighbors are sources')
+    c = abmtools.Controller()
+    c.create_agents(3)
+    a, b, d = c.agents
+    network = abmtools.Network(c, directed=True)
+    network.add(a, b)
+    network.add(d, b)
+    network.add(b, a)
+    assert network.neighbors(b) == [a] and sorted(x.ident for x in network.in_neighbors(b)) == [a.ident, d.ident]
+    assert network.tie(b, d) is None and network.tie(d, b) is not None
+    print('Out-degrees: {}, in-degrees: {}'.format([network.degree(x) for x in c.agents],
+                                                  [network.in_degree(x) for x in c.agents]))
+    assert [network.in_degree(x) for x in c.agents] == [1, 2, 0]
+
+
+def test_removal():
+    new_test()
+    print('Test removing ties, killing agents and abmtools.Controller.clear_ties()')
+    print('Expected behavior: removed ties and ties of killed agents disappear, attributes stay with their ties')
+    c = abmtools.Controller()
+    c.create_agents(20)
+    network = abmtools.Network(c)
+    network.add_attribute('weight', 0.0, 'd')
     try:
-        t = abmtools.Tie()
+        network.add_attribute('strength', typecode='d')
+    except ValueError:
+        pass
+    else:
         assert False
-    except NotImplementedError as e:
-        print(e)
+    assert 'strength' not in network.attributes
+    rng = random.Random(2)
+    for _ in range(60):
+        x, y = rng.sample(c.agents, 2)
+        network.add(x, y, weight=float(x.ident * 100 + y.ident))
+    victim = c.agents[3]
+    for t in network.ties_of(c.agents[0])[:2]:
+        t.remove()
+    c.kill(victim)
+    for t in network.ties():
+        assert t['weight'] in (t.source.ident * 100 + t.target.ident, t.target.ident * 100 + t.source.ident)
+        assert victim not in (t.source, t.target)
+    assert sum(network.degree(x) for x in c.agents) == 2 * len(network)
+    print('Ties after removals and kill: {}'.format(len(network)))
+    c.clear_ties()
+    assert len(network) == 0 and network.neighbors(c.agents[0]) == []
+
+
+def test_freeze():
+    new_test()
+    print('Test abmtools.Network.freeze()')
+    print('Expected behavior: the CSR snapshot has the same neighbors as the network, and is rebuilt after changes')
+    c = abmtools.Controller()
+    c.create_agents(50)
+    for directed in (False, True):
+        network = abmtools.Network(c, directed=directed)
+        rng = random.Random(3)
+        for _ in range(200):
+            network.add(*rng.sample(c.agents, 2))
+        csr = network.freeze()
+        assert network.freeze() is csr
+        for x in c.agents:
+            assert sorted(csr.neighbors(x.ident)) == sorted(y.ident for y in network.neighbors(x))
+        loop = c.agents[0]
+        network.add(loop, loop)
+        csr = network.freeze()
+        print('Directed {}: neighbors of an agent tied to itself: {}'.format(directed, csr.neighbors(0).tolist()))
+        assert csr.degrees()[0] == len(network.neighbors(loop)) and list(csr.neighbors(0)).count(0) == 1
+        next(network.ties()).remove()
+        removed = csr.degrees().sum() - network.freeze().degrees().sum()
+        assert network.freeze() is not csr and removed == (1 if directed else 2)
+    print('Degrees of the first agents: {}'.format(network.freeze().degrees()[:10].tolist()))
+
+
+def test_freeze_nodes():
+    new_test()
+    print('Test the number of nodes of abmtools.Network.freeze() without a Controller')
+    print('Expected behavior: one more than the largest ident tied by add() or add_edges(), reset by clear()')
+    c = abmtools.Controller()
+    c.create_agents(20)
+    network = abmtools.Network()
+    assert network.freeze().n_nodes == 0
+    network.add(c.agents[3], c.agents[7])
+    assert network.freeze().n_nodes == 8
+    network.add_edges([2, 4], [12, 1], agents=c.agents)
+    csr = network.freeze()
+    print('Nodes: {}, version: {}'.format(csr.n_nodes, csr.version))
+    assert csr.n_nodes == 13 and network.freeze() is csr
+    assert network.freeze(20) is not csr and network.freeze(20).n_nodes == 20
+    network.add_edges([], [])
+    assert network.freeze().n_nodes == 13
+    network.clear()
+    assert network.freeze().n_nodes == 0 and len(network.freeze().indices) == 0
+
+
+def benchmark_ties(n=100000, m=500000):
+    new_test()
+    print('Add {} ties between {} agents, remove half, freeze'.format(m, n))
+    c = abmtools.Controller()
+    c.create_agents(n)
+    network = abmtools.Network(c)
+    rng = random.Random(4)
+    agents = c.agents
+    start = time.perf_counter()
+    for _ in range(m):
+        network.add(agents[rng.randrange(n)], agents[rng.randrange(n)])
+    print('Add: {:.2f} s ({} ties)'.format(time.perf_counter() - start, len(network)))
+    start = time.perf_counter()
+    for _ in range(len(network) // 2):
+        network.remove_edge(rng.randrange(len(network)))
+    print('Remove: {:.2f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    csr = network.freeze()
+    print('Freeze: {:.3f} s, mean degree {:.2f}'.format(time.perf_counter() - start, csr.degrees().mean()))
+    start = time.perf_counter()
+    for _ in range(1000):
+        assert network.freeze() is csr
+    print('Freeze of an unchanged network: {:.1f} us'.format((time.perf_counter() - start) * 1000))
 
 
 ###########################################################################
 c, g, a = clean_start()
-test_tie_creation()
\ No newline at end of file
+test_tie_creation()
+test_directed()
+test_removal()
+test_freeze()
+test_freeze_nodes()
+benchmark_ties()
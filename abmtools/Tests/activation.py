@@ -0,0 +1,132 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import random
+
+
+class Counter(abmtools.Agent):
+    def __init__(self, controller, log, *args, **kwargs):
+        abmtools.Agent.__init__(self, controller, *args, **kwargs)
+        self.log = log
+        self.value = 0
+        self.next_value = None
+
+    def act(self, label=None):
+        self.log.append((label, self.ident))
+
+    def first(self):
+        self.log.append(('first', self.ident))
+
+    def second(self):
+        self.log.append(('second', self.ident))
+
+    def step(self):
+        # Copy the value of the next agent in the list (simultaneous update reads old values only)
+        agents = self.controller.agents
+        self.next_value = agents[(agents.index(self) + 1) % len(agents)].value
+
+    def advance(self):
+        self.value = self.next_value
+
+
+class OtherCounter(Counter):
+    def act(self, label=None):
+        self.log.append(('other', self.ident))
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_controller(n=10):
+    c = abmtools.Controller()
+    log = []
+    c.create_agents(n, Counter, log=log)
+    return c, log
+
+
+def test_sequential():
+    new_test()
+    print('Test abmtools.SequentialActivation')
+    print('Expected behavior: every agent acts once in list order, or class by class with by_class=True')
+    c, log = fresh_controller()
+    c.create_agents(5, OtherCounter, log=log)
+    random.shuffle(c.agents)
+    s = abmtools.SequentialActivation(c, 'act', label='x')
+    s()
+    print('Activations: {}, order: {}'.format(s.activations, [i for l, i in log]))
+    assert [i for l, i in log] == [a.ident for a in c.agents]
+    assert sum(1 for l, i in log if l == 'other') == 5 and sum(1 for l, i in log if l == 'x') == 10
+    del log[:]
+    abmtools.SequentialActivation(c, 'act', by_class=True)()
+    classes = [l for l, i in log]
+    print('Class by class: {}'.format(classes))
+    assert classes == sorted(classes, key=classes.index)
+    assert sorted(i for l, i in log) == sorted(a.ident for a in c.agents)
+
+
+def test_random():
+    new_test()
+    print('Test abmtools.RandomActivation and abmtools.Controller.ask()')
+    print('Expected behavior: every agent acts exactly once per activation, in a new order every time,')
+    print('without the list of agents being copied or reordered')
+    c, log = fresh_controller(50)
+    agents_before = list(c.agents)
+    s = c.ask('act', order='random')
+    first = [i for l, i in log]
+    del log[:]
+    assert c.ask('act', order='random') is s
+    second = [i for l, i in log]
+    print('First order: {}'.format(first[:10]))
+    print('Second order: {}'.format(second[:10]))
+    assert sorted(first) == sorted(second) == sorted(a.ident for a in c.agents)
+    assert first != second
+    assert c.agents == agents_before
+    print('Throughput: {:.0f} activations per second'.format(s.rate()))
+    assert s.activations == 100
+
+
+def test_staged():
+    new_test()
+    print('Test abmtools.StagedActivation')
+    print('Expected behavior: all agents run stage 1 before any agent runs stage 2')
+    c, log = fresh_controller()
+    s = abmtools.StagedActivation(c, ['first', 'second'], shuffle=True)
+    s()
+    stages = [l for l, i in log]
+    print('Stages: {}'.format(stages))
+    assert stages == ['first'] * 10 + ['second'] * 10 and s.activations == 20
+
+
+def test_simultaneous():
+    new_test()
+    print('Test abmtools.SimultaneousActivation')
+    print('Expected behavior: all agents read the old state before any agent changes it')
+    c, log = fresh_controller(5)
+    for i, a in enumerate(c.agents):
+        a.value = i
+    abmtools.SimultaneousActivation(c)()
+    print('Values after one simultaneous update: {}'.format([a.value for a in c.agents]))
+    assert [a.value for a in c.agents] == [1, 2, 3, 4, 0]
+
+
+def benchmark_throughput(n=100000):
+    new_test()
+    print('Throughput of activation schedulers with {} agents (agent-activations per second)'.format(n))
+    c = abmtools.Controller()
+    c.create_agents(n, Counter, log=[])
+    Counter.noop = lambda self: None
+    for scheduler in [abmtools.SequentialActivation(c, 'noop'), abmtools.RandomActivation(c, 'noop')]:
+        for _ in range(5):
+            scheduler()
+        print('{}: {:.0f}'.format(type(scheduler).__name__, scheduler.rate()))
+
+
+###########################################################################
+test_sequential()
+test_random()
+test_staged()
+test_simultaneous()
+benchmark_throughput()
@@ -2,8 +2,7 @@ import os
 parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(0, parentdir)
 
-from abmtools import Controller, Group, Agent, Ticker
-from abmtools import functions
+from abmtools import Controller, Group, Agent, Ticker, GroupRanking
 
 import random
 import collections
@@ -59,10 +58,15 @@ class BGController(Controller):
 
         self.smallest_group_size = None
         self.largest_group_size = None
+        # Groups ordered by size, kept up to date as agents move, die and are born
+        self.group_sizes = GroupRanking(self, 'size')
 
         self.reporters = collections.OrderedDict.fromkeys(['n_agents', 'fraction_shirkers', 'fraction_cooperators',
                                                            'fraction_reciprocators', 'smallest_group_size', 'largest_group_size',
                                                             'shirking_rate'])
+        # Reporter variables are only brought up to date on ticks at which the Ticker records them
+        self.add_reporter_update(self.calculate_population_distribution)
+        self.add_reporter_update(self.calculate_group_sizes)
 
     def calculate_population_distribution(self):
         """
@@ -81,8 +85,8 @@ class BGController(Controller):
         Store size of smallest and largest group
         :return:
         """
-        self.smallest_group_size = functions.min_one_of(self.groups, 'size').size
-        self.largest_group_size = functions.max_one_of(self.groups, 'size').size
+        self.smallest_group_size = self.group_sizes.smallest().size
+        self.largest_group_size = self.group_sizes.largest().size
 
 
 class BGGroup(Group):
@@ -247,12 +251,14 @@ def setup():
     return c
 
 
-def step(i, c):
+def update_distributions(c):
     # Update group level variables
     for g in c.groups:
         g.update_population_distribution()
     #print(random.choice(c.groups).fraction_shirkers)
 
+
+def decide_shirking(c):
     # Decide shirking and calculate shirking rates
     for a in c.agents:
         a.decide_shirking()
@@ -263,12 +269,15 @@ def step(i, c):
     #print([g.shirking_rate for g in c.groups])
 
 
+def calculate_fitness(c):
     # Calculate fitness
     for a in c.agents:
         a.calculate_fitness()
 
     # print([a.fitness for a in c.agents])
 
+
+def reproduce(c):
     # Reproduce
     for a in list(c.agents):
         if a.fitness < 0:
@@ -283,6 +292,8 @@ def step(i, c):
                     new_agent.type = random.choice(["shirker", "cooperator", "reciprocator"])
                     #print("MUTATE to {}".format(new_agent.type))
 
+
+def ostracize(c):
     # Ostracize
         # DIFFERENCE FROM NETLOGO IMPLEMENTATION: NO RECALCULATION OF RELEVANT GROUP VARIABLES
         # RATIONALE: Ostracism should happen based on same variables used to calculate shirking decisions and fitnesses
@@ -292,6 +303,8 @@ def step(i, c):
             c.move(a, None)
             #print("OSTRACIZED to group {}".format(a.group))
 
+
+def migrate(c):
     # Migrate
             # DIFFERENCE FROM NETLOGO IN THAT HERE I CONSTRUCT AN ACTUAL POOL OF MIGRATING AGENTS
             # CHECK IF PERHAPS THERE IS SOME MORE RANODMNESS IN ASSIGNMENT OF MIGRANTS TO GROUPS IN
@@ -332,6 +345,8 @@ def step(i, c):
     c.census()
     c.update_counts()
 
+
+def cull(c):
     # IF GENERATIONS GENERATIONS
 
     # Cull population if above starting total
@@ -340,6 +355,8 @@ def step(i, c):
         #print("CULL {}".format(a.type))
         c.kill(doomed_agent)
 
+
+def repopulate(c):
     # Repopulate small groups
     for g in c.groups:
         if g.size < c.min_group_size:
@@ -347,7 +364,7 @@ def step(i, c):
             g.ungroup()
 
             for _ in range(c.initial_group_size):
-                largest_group = functions.max_one_of(c.groups, 'size')
+                largest_group = c.group_sizes.largest()
                 if largest_group.size > c.min_group_size:
                     #print("TAKE FROM GROUP {} OF SIZE {}".format(largest_group.ident, largest_group.size))
                     migrant = random.choice(largest_group.members)
@@ -363,27 +380,42 @@ def step(i, c):
 
     c.census()
     c.update_counts()
-    c.calculate_population_distribution()
-    c.calculate_group_sizes()
 
     #print(c.n_agents)
     #print([g.size for g in c.groups])
 
+
+# The phases of one step, in order. Use with Ticker.set_phases() to get the time spent in each phase
+PHASES = [('update_distributions', update_distributions), ('decide_shirking', decide_shirking),
+          ('calculate_fitness', calculate_fitness), ('reproduce', reproduce), ('ostracize', ostracize),
+          ('migrate', migrate), ('cull', cull), ('repopulate', repopulate)]
+
+
+def step(i, c):
+    for name, phase in PHASES:
+        phase(c)
+
 if __name__ == "__main__":
     t = Ticker()
     t.set_setup(setup)
     t.setup()
 
-    t.set_step(step, 1, t.controller)
+    t.set_phases([(name, phase, (t.controller,)) for name, phase in PHASES])
 
     def run():
         from datetime import datetime
+        from abmtools import SteadyState, AllSteady
         now = datetime.now()
-        for _ in range(1000):
-            t.step()
+        # Run at most 1000 steps, but stop once the population distribution is in equilibrium
+        equilibrium = AllSteady([SteadyState(r, window=20, threshold=0.005)
+                                 for r in ['fraction_shirkers', 'fraction_cooperators', 'fraction_reciprocators']])
+        steps = t.run_steps(1000, until=equilibrium, check_every=5)
         then = datetime.now()
         diff = then - now
-        print(diff)
+        print("{} steps in {}".format(steps, diff))
+        for name, calls, total, mean, share in t.phase_table():
+            print("{:<22}{:>6} calls {:>9.3f} s {:>9.3f} ms/call {:>6.1%}".format(name, calls, total, mean * 1000,
+                                                                                  share))
 
     #import cProfile
     #import pstats
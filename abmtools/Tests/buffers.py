@@ -0,0 +1,150 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import time
+
+
+class Cell(abmtools.Agent):
+    state = abmtools.Buffered(default=0)
+
+    def step(self):
+        # Copy the state of the next agent in the list: with buffered state every agent reads the old state
+        agents = self.controller.agents
+        self.state = agents[(agents.index(self) + 1) % len(agents)].state
+
+
+class Team(abmtools.Group):
+    score = abmtools.Buffered(default=0.0)
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_controller(n=5):
+    c = abmtools.Controller()
+    c.create_agents(n, Cell)
+    for i, a in enumerate(c.agents):
+        a.state = i
+    # Initial values, like all values, become visible at the swap
+    c.buffers.swap()
+    return c
+
+
+def test_synchronous():
+    new_test()
+    print('Test abmtools.Buffered attributes with abmtools.Ticker')
+    print('Expected behavior: during a tick agents read the states of the previous tick, whatever the order')
+    c = fresh_controller()
+    print('Initial states: {}'.format([a.state for a in c.agents]))
+    assert [a.state for a in c.agents] == [0, 1, 2, 3, 4]
+    t = abmtools.Ticker(c, sink=abmtools.MemorySink())
+    t.set_step(c.ask, 'step')
+    t.step(write=False)
+    print('States after one tick: {}'.format([a.state for a in c.agents]))
+    assert [a.state for a in c.agents] == [1, 2, 3, 4, 0]
+    t.step(write=False)
+    assert [a.state for a in c.agents] == [2, 3, 4, 0, 1]
+    a = c.agents[0]
+    a.state = 10
+    print('Written but not swapped: read {}, pending {}'.format(a.state, c.buffers.pending(a, 'state')))
+    assert a.state == 2 and c.buffers.pending(a, 'state') == 10
+    c.buffers.swap()
+    assert a.state == 10
+
+
+def test_first_write():
+    new_test()
+    print('Test the first value written to an abmtools.Buffered attribute')
+    print('Expected behavior: it is pending like every later value, the default is read until the swap')
+    c = abmtools.Controller()
+    c.create_agents(2, Cell)
+    a, b = c.agents
+    a.state = 5
+    print('Before the swap: read {}, pending {}'.format(a.state, c.buffers.pending(a, 'state')))
+    assert a.state == 0 and b.state == 0 and c.buffers.pending(a, 'state') == 5
+    c.buffers.swap()
+    assert a.state == 5 and b.state == 0
+
+
+def test_setup_swap():
+    new_test()
+    print('Test abmtools.Ticker.setup() with abmtools.Buffered attributes written by the setup function')
+    print('Expected behavior: values written during setup are visible in the first tick')
+    t = abmtools.Ticker()
+
+    def setup():
+        c = abmtools.Controller()
+        c.create_agents(3, Cell)
+        for i, a in enumerate(c.agents):
+            a.state = i + 1
+        return c
+
+    t.set_setup(setup)
+    c = t.setup()
+    assert [a.state for a in c.agents] == [1, 2, 3]
+
+
+def test_hatch_and_kill():
+    new_test()
+    print('Test abmtools.Buffered attributes of hatched and killed agents')
+    print('Expected behavior: a hatched agent gets its own copy of its parent\'s state, slots of killed agents are '
+          'reused')
+    c = fresh_controller(3)
+    c.buffers.swap()
+    parent = c.agents[1]
+    child = parent.hatch()
+    print('Parent state {}, child state {}'.format(parent.state, child.state))
+    assert child.state == parent.state == 1
+    child.state = 7
+    c.buffers.swap()
+    assert child.state == 7 and parent.state == 1
+    slots = c.buffers.size
+    c.kill(parent)
+    c.create_agents(1, Cell)
+    print('Slots before kill {}, after kill and create {}'.format(slots, c.buffers.size))
+    assert c.buffers.size == slots
+    assert c.agents[-1].state == 0
+
+
+def test_groups():
+    new_test()
+    print('Test abmtools.Buffered attributes on groups')
+    print('Expected behavior: group scores written during a tick are only visible after the swap')
+    c = abmtools.Controller()
+    c.create_groups(3, Team)
+    for g in c.groups:
+        g.score = 1.0
+    c.buffers.swap()
+    for g in c.groups:
+        g.score = sum(h.score for h in c.groups)
+    print('Scores during the tick: {}'.format([g.score for g in c.groups]))
+    assert [g.score for g in c.groups] == [1.0, 1.0, 1.0]
+    c.buffers.swap()
+    print('Scores after the swap: {}'.format([g.score for g in c.groups]))
+    assert [g.score for g in c.groups] == [3.0, 3.0, 3.0]
+    assert c.buffers.column('score', c.groups) == [3.0, 3.0, 3.0]
+
+
+def benchmark_swap(n=100000):
+    new_test()
+    print('Swap time with {} agents with buffered state'.format(n))
+    c = abmtools.Controller()
+    c.create_agents(n, Cell)
+    for a in c.agents:
+        a.state = 1
+    start = time.perf_counter()
+    for _ in range(1000):
+        c.buffers.swap()
+    print('Mean swap time: {:.3g} s'.format((time.perf_counter() - start) / 1000))
+
+
+###########################################################################
+test_synchronous()
+test_first_write()
+test_setup_swap()
+test_hatch_and_kill()
+test_groups()
+benchmark_swap()
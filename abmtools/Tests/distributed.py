@@ -0,0 +1,107 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+from abmtools.distributed import mean
+import random
+
+
+class Walker(abmtools.Agent):
+    def __init__(self, controller, *args, **kwargs):
+        abmtools.Agent.__init__(self, controller, *args, **kwargs)
+        self.wealth = 1.0
+
+
+def setup(index, n_partitions, n_groups=12, size=10, seed=0):
+    # Every partition creates its own groups (by ident) and their members
+    c = abmtools.Controller()
+    c.total_groups = n_groups
+    c.rng = random.Random("{}:{}".format(seed, index))
+    for ident in range(n_groups):
+        if ident % n_partitions == index:
+            c.create_groups(1, abmtools.Group, ident=ident)
+    for g in c.groups:
+        c.create_agents(size, Walker)
+        for a in c.agents[-size:]:
+            a.group = g
+    c.census()
+    c.update_counts()
+    return c
+
+
+def wander(c, p):
+    # Every agent moves to a random group (possibly in another partition) with probability p
+    for a in list(c.agents):
+        a.wealth += 1
+        if c.rng.random() < p:
+            c.move(a, target_group_ident=c.rng.randrange(c.total_groups))
+
+
+def n_agents(c):
+    return len(c.agents)
+
+
+def wealth(c):
+    return sum(a.wealth for a in c.agents), len(c.agents)
+
+
+def misplaced(c):
+    # Agents whose group does not belong to this partition, or who are not members of their group
+    return sum(1 for a in c.agents if not c.partition.owns(a.group.ident) or a not in a.group.members)
+
+
+def sizes(c):
+    return {g.ident: g.size for g in c.groups}
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def test_migration():
+    new_test()
+    print('Test abmtools.DistributedController with agents migrating between partitions')
+    print('Expected behavior: no agents are lost, every agent ends up in a group of its own partition')
+    with abmtools.DistributedController(setup, n_workers=3) as dc:
+        total = dc.reduce(n_agents)
+        migrated = [dc.step(wander, 0.2) for _ in range(5)]
+        print('Agents: {} -> {}, migrations per tick: {}'.format(total, dc.reduce(n_agents), migrated))
+        assert dc.reduce(n_agents) == total == 120
+        assert all(m > 0 for m in migrated)
+        assert dc.reduce(misplaced) == 0
+        group_sizes = {}
+        for s in dc.call(sizes):
+            group_sizes.update(s)
+        print('Group sizes: {}'.format(group_sizes))
+        assert sum(group_sizes.values()) == 120 and len(group_sizes) == 12
+        idents = dc.reduce(idents_of, reduce=lambda parts: [i for p in parts for i in p])
+        assert len(set(idents)) == len(idents)
+
+
+def idents_of(c):
+    return [a.ident for a in c.agents]
+
+
+def test_ticker():
+    new_test()
+    print('Test abmtools.DistributedController driven by an abmtools.Ticker with reduced reporters')
+    print('Expected behavior: global reporters are recorded every tick')
+    dc = abmtools.DistributedController(setup, n_workers=2, size=5).start()
+    dc.add_reporter('agents', n_agents, label='Nr.Agents')
+    dc.add_reporter('wealth', wealth, reduce=mean, label='Mean.Wealth')
+    sink = abmtools.MemorySink()
+    t = abmtools.Ticker(dc, sink=sink)
+    t.set_step(dc.step, wander, 0.1)
+    t.run_steps(4)
+    columns = sink.columns()
+    t.close()
+    dc.close()
+    print('Columns: {}'.format(dict(columns)))
+    assert list(columns['agents']) == [60] * 4
+    assert list(columns['wealth']) == [2.0, 3.0, 4.0, 5.0]
+
+
+###########################################################################
+test_migration()
+test_ticker()
@@ -0,0 +1,109 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+from collections import OrderedDict
+import abmtools
+
+
+class Sleeper(abmtools.Agent):
+    # Agent which wakes up after a delay, and then again after a doubled delay
+    def __init__(self, controller, log, *args, **kwargs):
+        abmtools.Agent.__init__(self, controller, *args, **kwargs)
+        self.log = log
+        self.wakeups = 0
+
+    def wake(self, delay):
+        self.log.append((self.controller.events.now, self.ident))
+        self.wakeups += 1
+        self.controller.events.schedule_in(delay * 2, self.wake, delay * 2, owner=self)
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def test_event_order():
+    new_test()
+    print('Test abmtools.EventScheduler.schedule() and run()')
+    print('Expected behavior: events are processed in time order (then priority, then scheduling order),')
+    print('and run(until) stops before later events')
+    e = abmtools.EventScheduler()
+    log = []
+    e.schedule(5, log.append, 'c')
+    e.schedule(1, log.append, 'a')
+    e.schedule(5, log.append, 'b', priority=-1)
+    e.schedule(5, log.append, 'd')
+    e.schedule(9, log.append, 'e')
+    processed = e.run(until=6)
+    print('Processed {} events: {}, time now {}'.format(processed, log, e.now))
+    assert log == ['a', 'b', 'c', 'd'] and e.now == 6 and len(e) == 1
+    e.run()
+    assert log == ['a', 'b', 'c', 'd', 'e'] and len(e) == 0
+
+
+def test_cancel_on_kill():
+    new_test()
+    print('Test cancellation of events when agents are killed through abmtools.Controller.kill()')
+    print('Expected behavior: a killed agent never acts again, other agents keep acting')
+    c = abmtools.Controller()
+    e = abmtools.EventScheduler(c)
+    log = []
+    c.create_agents(3, Sleeper, log=log)
+    for a in c.agents:
+        e.schedule(1, a.wake, 1, owner=a)
+    e.run(until=3)
+    doomed = c.agents[0]
+    print('Wakeups before kill: {}'.format([a.wakeups for a in c.agents]))
+    c.kill(doomed)
+    e.run(until=100)
+    print('Wakeups after kill: {} (killed agent: {})'.format([a.wakeups for a in c.agents], doomed.wakeups))
+    assert doomed.wakeups == 2 and all(a.wakeups == 6 for a in c.agents)
+    assert doomed not in e.owned and all(len(e.events_of(a)) == 1 for a in c.agents)
+
+
+def test_repeat_and_ticker():
+    new_test()
+    print('Test repeating events driving an abmtools.Ticker with an abmtools.MemorySink')
+    print('Expected behavior: every tick which ends during the run is recorded with the state after its events')
+    c = abmtools.Controller()
+    c.counter = 0
+    c.reporters = OrderedDict([("counter", "Counter")])
+    e = abmtools.EventScheduler(c)
+    t = abmtools.Ticker(c, sink=abmtools.MemorySink())
+
+    def count():
+        c.counter += 1
+
+    # Three events per tick, at 0.5, 0.75 and 1 past every tick
+    e.schedule(0.5, count, interval=1)
+    e.schedule(0.75, count, interval=1)
+    e.schedule(1, count, interval=1)
+    e.run(until=10, ticker=t)
+    columns = t.sink.columns()
+    print('Ticks: {}'.format(list(columns['tick'])))
+    print('Counter: {}'.format(list(columns['counter'])))
+    assert list(columns['tick']) == list(range(10))
+    assert list(columns['counter']) == [2] + [2 + 3 * i for i in range(1, 10)]
+
+
+def benchmark_sparse(n=100000):
+    new_test()
+    print('Scheduler with {} agents of which 100 act, each once every 10000 time units'.format(n))
+    import time
+    c = abmtools.Controller()
+    e = abmtools.EventScheduler(c)
+    c.create_agents(n, Sleeper, log=[])
+    for a in c.agents[:100]:
+        e.schedule(10000, a.log.append, a.ident, owner=a, interval=10000)
+    start = time.perf_counter()
+    processed = e.run(until=10 ** 6)
+    print('Processed {} events over 10^6 time units in {:.3f} s'.format(processed, time.perf_counter() - start))
+    assert processed == 100 * 100
+
+
+###########################################################################
+test_event_order()
+test_cancel_on_kill()
+test_repeat_and_ticker()
+benchmark_sparse()
@@ -3,12 +3,12 @@ parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(0,parentdir)
 import abmtools
 import pickle
+import random
 
 # SETUP TEST ENVIRONMENT
 def clean_start():
     print('### ###  Reloading start state  ### ###')
     cin = pickle.load(open('setup.p', 'rb'))
-    abmtools.a_ident=100000
     cin.census()
     gin = cin.groups[0]
     ain = gin.members[0]
@@ -18,12 +18,48 @@ def new_test():
     print('\n')
     print('### ### ### ### ### ### ### ### ### ###')
 
+# Test abmtools.max_n_of(), min_n_of() and related functions
+def test_extremes():
+    new_test()
+    print('Test abmtools.max_one_of(), max_n_of(), with_max() and their min counterparts')
+    print('Expected behavior: the first agents in list order among equal values, as a stable sort would give')
+    c = abmtools.Controller()
+    c.create_agents(3000)
+    rng = random.Random(14)
+    for a in c.agents:
+        a.wealth = rng.randrange(50)
+        a.age = rng.random()
+    agents = c.agents
+    for var in ('wealth', ['wealth', 'age'], lambda agent: agent.wealth % 7):
+        key = abmtools.functions.key_function(var)
+        descending = sorted(agents, key=key, reverse=True)
+        ascending = sorted(agents, key=key)
+        assert abmtools.max_one_of(agents, var) is descending[0]
+        assert abmtools.min_one_of(agents, var) is ascending[0]
+        assert abmtools.with_max(agents, var) == [a for a in descending if key(a) == key(descending[0])]
+        assert abmtools.with_min(agents, var) == [a for a in ascending if key(a) == key(ascending[0])]
+        # Both a heap (small n) and numpy.argpartition() (large n, numeric values) are used
+        for n in (0, 1, 40, 1500, 3000):
+            assert abmtools.max_n_of(agents, var, n) == descending[:n]
+            assert abmtools.min_n_of(agents, var, n) == ascending[:n]
+    print('Wealth of the 5 richest agents: {}'.format([a.wealth for a in abmtools.max_n_of(agents, 'wealth', 5)]))
+    # Many distinct values no longer exceed the recursion limit
+    for a in agents:
+        a.wealth = a.ident
+    assert abmtools.max_n_of(agents, 'wealth', 2500)[-1].wealth == agents[500].wealth
+    try:
+        abmtools.max_n_of(agents, 'wealth', 3001)
+    except ValueError:
+        pass
+    else:
+        assert False
+
 # Test abmtools.other()
 def test_others():
     new_test()
     c, g, a = clean_start()
     print('Test abmtools.other()')
-    print('Expected behavior: others() returns copy of input agentset, excluding given agent')
+    print('Expected behavior: others() returns a view of input agentset, excluding given agent')
     print("Length of g.members: {}".format(len(g.members)))
     print("First member: {}".format(g.members[0]))
     lengthatstart = len(g.members)
@@ -58,5 +94,6 @@ def test_compile_typeset():
     assert (len(returnset) == 10)
 
 ###########################################################################
+test_extremes()
 test_others()
 test_compile_typeset()
\ No newline at end of file
@@ -0,0 +1,91 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import random
+import sys
+import time
+
+"""
+Benchmarks of abmtools.max_one_of(), max_n_of() and with_max() against the implementations they replaced, at 10^4 to
+10^7 agents. Run with a smaller largest size as argument (e.g. python functions_benchmark.py 1000000) to save memory.
+The previous implementations are only run while they take less than LEGACY_BUDGET seconds per call.
+"""
+
+LEGACY_BUDGET = 10.0
+
+
+class Individual:
+    """Agent stand-in without an ident counter or Controller, so that 10^7 of them fit in memory"""
+
+    __slots__ = ('wealth', 'age')
+
+    def __init__(self, wealth, age):
+        self.wealth = wealth
+        self.age = age
+
+
+# PREVIOUS IMPLEMENTATIONS
+
+def legacy_max_one_of(agentset, var):
+    maxval = max([getattr(agent, var) for agent in agentset])
+
+    return next(agent for agent in agentset if getattr(agent, var) == maxval)
+
+
+def legacy_max_n_of(agentset, var, n):
+    if n > len(agentset):
+        raise ValueError('Requested n is larger than length of agentset')
+    maxval = max([getattr(agent, var) for agent in agentset])
+    agentswithmax = [agent for agent in agentset if getattr(agent, var) == maxval]
+    if len(agentswithmax) >= n:
+        return agentswithmax[:n]
+    else:
+        filler = legacy_max_n_of([agent for agent in agentset if getattr(agent, var) < maxval], var,
+                                 (n - len(agentswithmax)))
+
+    return agentswithmax + filler
+
+
+def legacy_with_max(agentset, var):
+    maxval = max([getattr(agent, var) for agent in agentset])
+
+    return [agent for agent in agentset if getattr(agent, var) == maxval]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(sizes):
+    rng = random.Random(15)
+    skipped = set()
+    print('{:>10} {:<34}{:>10}{:>10}{:>9}'.format('agents', 'query', 'new (s)', 'old (s)', 'speedup'))
+    for size in sizes:
+        agents = [Individual(rng.randrange(size), rng.random()) for _ in range(size)]
+        queries = [('max_one_of', abmtools.max_one_of, legacy_max_one_of, ('wealth',)),
+                   ('with_max', abmtools.with_max, legacy_with_max, ('wealth',)),
+                   ('max_n_of n=10', abmtools.max_n_of, legacy_max_n_of, ('wealth', 10)),
+                   ('max_n_of n=100', abmtools.max_n_of, legacy_max_n_of, ('wealth', 100)),
+                   ('max_n_of n=size/10', abmtools.max_n_of, None, ('wealth', size // 10)),
+                   ('max_n_of n=100 by (wealth, age)', abmtools.max_n_of, None, (('wealth', 'age'), 100))]
+        for name, new, old, args in queries:
+            result, new_time = timed(new, agents, *args)
+            if old is None or name in skipped:
+                print('{:>10} {:<34}{:>10.3f}{:>10}{:>9}'.format(size, name, new_time, '-', '-'))
+                continue
+            expected, old_time = timed(old, agents, *args)
+            assert result == expected
+            # The old versions are at least linear, so skip them at the next size if they would take too long
+            if old_time * 10 > LEGACY_BUDGET:
+                skipped.add(name)
+            print('{:>10} {:<34}{:>10.3f}{:>10.3f}{:>8.1f}x'.format(size, name, new_time, old_time,
+                                                                     old_time / new_time))
+        del agents
+
+
+###########################################################################
+largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+benchmark([size for size in (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7) if size <= largest])
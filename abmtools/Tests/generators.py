@@ -0,0 +1,172 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import numpy
+import time
+from abmtools import generators
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_network(n, directed=False, seed=1):
+    c = abmtools.Controller(seed=seed)
+    c.create_agents(n)
+    return c, abmtools.Network(c, directed=directed)
+
+
+def edge_keys(network, n):
+    sources = numpy.array(network.sources)
+    targets = numpy.array(network.targets)
+    if not network.directed:
+        sources, targets = numpy.minimum(sources, targets), numpy.maximum(sources, targets)
+    return sources, targets, sources * n + targets
+
+
+def assert_simple(network, n):
+    sources, targets, keys = edge_keys(network, n)
+    assert not (sources == targets).any(), 'self tie'
+    assert len(numpy.unique(keys)) == len(keys), 'repeated tie'
+
+
+def test_pair_positions():
+    new_test()
+    print('Test abmtools.generators.pair_positions()')
+    print('Expected behavior: positions map to all pairs i > j in order, also for very large positions')
+    i, j = generators.pair_positions(numpy.arange(10))
+    print('Pairs: {}'.format(list(zip(i.tolist(), j.tolist()))))
+    assert list(zip(i.tolist(), j.tolist())) == [(a, b) for a in range(1, 5) for b in range(a)]
+    big = numpy.array([10 ** 12 - 1, 10 ** 12, 10 ** 12 + 1], dtype=numpy.int64)
+    i, j = generators.pair_positions(big)
+    assert ((i * (i - 1) // 2 + j) == big).all() and ((0 <= j) & (j < i)).all()
+
+
+def test_erdos_renyi():
+    new_test()
+    print('Test abmtools.erdos_renyi()')
+    print('Expected behavior: about p * pairs ties, no self or repeated ties, the same ties for the same seed')
+    for directed in (False, True):
+        c, network = fresh_network(2000, directed)
+        abmtools.erdos_renyi(network, 0.01)
+        pairs = 2000 * 1999 // (1 if directed else 2)
+        print('Directed {}: {} ties, expected {:.0f}'.format(directed, len(network), pairs * 0.01))
+        assert abs(len(network) - pairs * 0.01) < 5 * (pairs * 0.01) ** 0.5
+        assert_simple(network, 2000)
+        again = fresh_network(2000, directed)[1]
+        abmtools.erdos_renyi(again, 0.01)
+        assert again.sources == network.sources and again.targets == network.targets
+    c, network = fresh_network(10)
+    abmtools.erdos_renyi(network, 1.0)
+    assert len(network) == 45 and network.degree(c.agents[0]) == 9
+
+
+def test_lattice():
+    new_test()
+    print('Test abmtools.lattice()')
+    print('Expected behavior: every agent has the neighbors of its grid cell')
+    c, network = fresh_network(20)
+    abmtools.lattice(network, 5, 4)
+    assert len(network) == 40 and all(network.degree(a) == 4 for a in c.agents)
+    c, network = fresh_network(20)
+    abmtools.lattice(network, 5, 4, kind='moore', torus=False)
+    degrees = sorted(network.degree(a) for a in c.agents)
+    print('Moore degrees without wrapping: {}'.format(degrees))
+    assert degrees == [3] * 4 + [5] * 10 + [8] * 6
+    c, network = fresh_network(10)
+    abmtools.lattice(network, 10, radius=2)
+    assert all(network.degree(a) == 4 for a in c.agents)
+    c, network = fresh_network(6)
+    abmtools.lattice(network, 3, 2)
+    assert_simple(network, 6)
+
+
+def test_watts_strogatz():
+    new_test()
+    print('Test abmtools.watts_strogatz()')
+    print('Expected behavior: n * k / 2 ties, a ring for p = 0, no self or repeated ties')
+    c, network = fresh_network(100)
+    abmtools.watts_strogatz(network, 4, 0.0)
+    assert all(network.degree(a) == 4 for a in c.agents)
+    assert sorted(x.ident for x in network.neighbors(c.agents[0])) == [1, 2, 98, 99]
+    for p in (0.1, 1.0):
+        c, network = fresh_network(1000)
+        abmtools.watts_strogatz(network, 6, p)
+        assert len(network) == 3000
+        assert_simple(network, 1000)
+        ring = sum(1 for s, t in zip(network.sources, network.targets) if min((s - t) % 1000, (t - s) % 1000) <= 3)
+        print('p = {}: {} of 3000 ties still between ring neighbors'.format(p, ring))
+
+
+def test_barabasi_albert():
+    new_test()
+    print('Test abmtools.barabasi_albert()')
+    print('Expected behavior: m ties per new agent, no self or repeated ties, old agents gather many ties')
+    c, network = fresh_network(5000)
+    abmtools.barabasi_albert(network, 3)
+    assert len(network) == 3 + (5000 - 4) * 3
+    assert_simple(network, 5000)
+    degrees = network.freeze().degrees()
+    print('Largest degrees: {}, mean degree {:.2f}'.format(sorted(degrees.tolist())[-5:], degrees.mean()))
+    assert degrees.min() >= 3 and degrees[:10].mean() > 10 * degrees[-1000:].mean() / 2
+    c, network = fresh_network(50, directed=True)
+    abmtools.barabasi_albert(network, 2)
+    assert all(s > t for s, t in zip(network.sources, network.targets))
+
+
+def test_stochastic_block_model():
+    new_test()
+    print('Test abmtools.stochastic_block_model() on groups')
+    print('Expected behavior: ties within groups with p_in, between groups with p_out')
+    c, network = fresh_network(0)
+    c.create_groups(4)
+    for g in c.groups:
+        c.create_agents(250, group=g)
+    c.census()
+    abmtools.stochastic_block_model(network, (0.05, 0.002))
+    assert_simple(network, 1000)
+    group_of = {a.ident: a.group for a in c.agents}
+    within = sum(1 for s, t in zip(network.sources, network.targets) if group_of[s] is group_of[t])
+    between = len(network) - within
+    print('Within: {} (expected {:.0f}), between: {} (expected {:.0f})'.format(within, 4 * 250 * 249 / 2 * 0.05,
+                                                                            between, 6 * 250 * 250 * 0.002))
+    assert abs(within - 6225) < 400 and abs(between - 750) < 150
+    matrix = [[0.0, 1.0], [0.0, 0.0]]
+    c, network = fresh_network(0, directed=True)
+    c.create_groups(2)
+    for g in c.groups:
+        c.create_agents(5, group=g)
+    c.census()
+    abmtools.stochastic_block_model(network, matrix)
+    first, second = [{a.ident for a in g.members} for g in c.groups]
+    assert len(network) == 25 and set(network.sources) == first and set(network.targets) == second
+
+
+def benchmark_generators(n=1000000, ties=10000000):
+    new_test()
+    print('Generate networks with {} ties between {} agents'.format(ties, n))
+    c, network = fresh_network(n)
+    start = time.perf_counter()
+    abmtools.erdos_renyi(network, ties / (n * (n - 1) / 2))
+    print('Erdos-Renyi: {:.2f} s ({} ties)'.format(time.perf_counter() - start, len(network)))
+    start = time.perf_counter()
+    csr = network.freeze()
+    print('Freeze: {:.2f} s, mean degree {:.2f}'.format(time.perf_counter() - start, csr.degrees().mean()))
+    for name, generate in (('Watts-Strogatz', lambda net: abmtools.watts_strogatz(net, 2 * ties // n, 0.1)),
+                           ('Barabasi-Albert', lambda net: abmtools.barabasi_albert(net, ties // n))):
+        network.clear()
+        start = time.perf_counter()
+        generate(network)
+        print('{}: {:.2f} s ({} ties)'.format(name, time.perf_counter() - start, len(network)))
+
+
+###########################################################################
+test_pair_positions()
+test_erdos_renyi()
+test_lattice()
+test_watts_strogatz()
+test_barabasi_albert()
+test_stochastic_block_model()
+benchmark_generators()
@@ -0,0 +1,145 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import random
+import time
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_controller(n_agents=30, n_groups=6):
+    c = abmtools.Controller()
+    c.create_groups(n_groups)
+    c.create_agents(n_agents)
+    for a in c.agents:
+        a.wealth = float(a.ident)
+    return c
+
+
+def test_join_leave():
+    new_test()
+    print('Test abmtools.Agent.join() and leave() with abmtools.Memberships')
+    print('Expected behavior: agents are members of several groups, Agent.group is not touched')
+    c = fresh_controller()
+    household, workplace, club = c.groups[:3]
+    a, b = c.agents[:2]
+    a.join(household)
+    a.join(workplace)
+    a.join(workplace)
+    b.join(workplace)
+    memberships = c.memberships
+    print('Groups of a: {}, members of workplace: {}'.format([g.ident for g in a.joined_groups()],
+                                                            [x.ident for x in memberships.members_of(workplace)]))
+    assert a.joined_groups() == [household, workplace] and memberships.members_of(workplace) == [a, b]
+    assert memberships.is_member(a, household) and not memberships.is_member(b, household)
+    assert a.group is None and household.members == [] and memberships.size(workplace) == 2
+    a.leave(workplace)
+    a.leave(club)
+    assert memberships.members_of(workplace) == [b] and len(memberships) == 2
+
+
+def test_kill_hatch_move():
+    new_test()
+    print('Test abmtools.Memberships with killed, hatched and moved agents')
+    print('Expected behavior: killed agents leave all groups, hatched agents join their parent\'s groups, '
+          'moves update primary memberships')
+    c = fresh_controller()
+    for a in c.agents:
+        a.group = c.groups[a.ident % 3]
+    c.census()
+    memberships = abmtools.Memberships(c, include_primary=True)
+    a, b = c.agents[:2]
+    a.join(c.groups[5])
+    assert memberships.groups_of(a) == [c.groups[0], c.groups[5]]
+    child = a.hatch()
+    assert memberships.groups_of(child) == [c.groups[0], c.groups[5]] and child in c.groups[0].members
+    c.move(a, c.groups[4])
+    assert memberships.groups_of(a) == [c.groups[5], c.groups[4]]
+    c.kill(child)
+    assert not memberships.is_member(child, c.groups[5]) and memberships.members_of(c.groups[5]) == [a]
+    print('Members of group 4: {}'.format([x.ident for x in memberships.members_of(c.groups[4])]))
+    assert memberships.size(c.groups[4]) == 1
+
+
+def test_ungroup():
+    new_test()
+    print('Test abmtools.Memberships with include_primary=True after Group.ungroup() and Controller.clear_groups()')
+    print('Expected behavior: ungrouped agents lose their primary membership, other memberships are kept')
+    c = fresh_controller()
+    for a in c.agents:
+        a.group = c.groups[a.ident % 3]
+    c.census()
+    memberships = abmtools.Memberships(c, include_primary=True)
+    groups = list(c.groups)
+    club = groups[5]
+    c.agents[0].join(club)
+    c.groups[0].ungroup()
+    counts = memberships.count()
+    print('Members per group after ungrouping group 0: {}'.format(counts.tolist()))
+    assert counts.tolist() == [0, 10, 10, 0, 0, 1] and memberships.sum('wealth')[0] == 0
+    assert memberships.groups_of(c.agents[0]) == [club]
+    c.clear_groups()
+    assert memberships.members_of(club) == [c.agents[0]] and memberships.members_of(groups[1]) == []
+    assert len(memberships) == 1
+
+
+def test_reductions():
+    new_test()
+    print('Test group reductions of abmtools.Memberships')
+    print('Expected behavior: sums, means and counts over the members of every group, as loops would compute them')
+    c = fresh_controller(200, 10)
+    rng = random.Random(9)
+    for a in c.agents:
+        for g in rng.sample(c.groups, rng.randint(0, 4)):
+            a.join(g)
+    memberships = c.memberships
+    sums = memberships.sum('wealth')
+    means = memberships.mean('wealth')
+    counts = memberships.count()
+    doubled = memberships.sum(lambda agent: 2 * agent.wealth)
+    for i, g in enumerate(c.groups):
+        members = memberships.members_of(g)
+        assert sums[i] == sum(a.wealth for a in members) and doubled[i] == 2 * sums[i]
+        assert counts[i] == len(members)
+        assert abs(means[i] - (sums[i] / len(members) if members else 0.0)) < 1e-9
+    print('Members per group: {}'.format(counts.tolist()))
+    rich = next(a for a in c.agents if memberships.groups_of(a))
+    rich.wealth += 1000
+    after = memberships.sum('wealth')
+    for i, g in enumerate(c.groups):
+        assert after[i] == sums[i] + (1000 if memberships.is_member(rich, g) else 0)
+
+
+def benchmark_memberships(n=200000, n_groups=2000, per_agent=3):
+    new_test()
+    print('{} agents in {} groups each, {} groups'.format(n, per_agent, n_groups))
+    c = fresh_controller(n, n_groups)
+    rng = random.Random(10)
+    start = time.perf_counter()
+    for a in c.agents:
+        for g in rng.sample(c.groups, per_agent):
+            a.join(g)
+    print('Joining: {:.2f} s'.format(time.perf_counter() - start))
+    memberships = c.memberships
+    start = time.perf_counter()
+    memberships.mean('wealth')
+    print('Group means (incidence built): {:.3f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    memberships.mean('wealth')
+    print('Group means (incidence cached): {:.3f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    [sum(a.wealth for a in c.agents if memberships.is_member(a, g)) for g in c.groups[:20]]
+    elapsed = time.perf_counter() - start
+    print('Scanning all agents for every group: about {:.1f} s for all groups'.format(elapsed * n_groups / 20))
+
+
+###########################################################################
+test_join_leave()
+test_kill_hatch_move()
+test_ungroup()
+test_reductions()
+benchmark_memberships()
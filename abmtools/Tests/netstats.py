@@ -0,0 +1,166 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import collections
+import random
+import time
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def brute_stats(c, network):
+    """Recompute the statistics from scratch"""
+
+    degrees = collections.Counter()
+    parent = {a.ident: a.ident for a in c.agents}
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    within = 0
+    for t in network.ties():
+        degrees[t.source.ident] += 1
+        degrees[t.target.ident] += 1
+        parent[find(t.source.ident)] = find(t.target.ident)
+        if t.source.group is not None and t.source.group is t.target.group:
+            within += 1
+    histogram = collections.Counter(degrees[a.ident] for a in c.agents)
+    return {'mean_degree': 2 * len(network) / len(c.agents), 'degree_histogram': dict(sorted(histogram.items())),
+            'n_components': len({find(a.ident) for a in c.agents}), 'within_group_ties': within,
+            'between_group_ties': len(network) - within}
+
+
+def fresh_model(n=60, n_groups=4, directed=False):
+    c = abmtools.Controller(seed=5)
+    c.create_groups(n_groups)
+    c.create_agents(n)
+    for i, a in enumerate(c.agents):
+        a.group = c.groups[i % n_groups]
+    c.census()
+    network = abmtools.Network(c, directed=directed)
+    return c, network
+
+
+def test_incremental():
+    new_test()
+    print('Test abmtools.NetworkStats through random tie changes, moves, kills and hatches')
+    print('Expected behavior: the statistics always equal statistics computed from scratch')
+    for directed in (False, True):
+        c, network = fresh_model(directed=directed)
+        stats = abmtools.NetworkStats(network)
+        abmtools.erdos_renyi(network, 0.02, rng=abmtools.RNGManager(1))
+        assert stats.dirty and stats.mean_degree() == brute_stats(c, network)['mean_degree']
+        rng = random.Random(6)
+        for step in range(600):
+            action = rng.random()
+            if action < 0.45:
+                network.add(*rng.sample(c.agents, 2))
+            elif action < 0.7 and len(network):
+                network.remove_edge(rng.randrange(len(network)))
+            elif action < 0.88:
+                c.move(rng.choice(c.agents), rng.choice(c.groups + [None]))
+            elif action < 0.9:
+                rng.choice(c.groups).ungroup()
+            elif action < 0.95:
+                c.kill(rng.choice(c.agents))
+            else:
+                rng.choice(c.agents).hatch()
+            if step % 10 == 0:
+                expected = brute_stats(c, network)
+                for name, value in expected.items():
+                    assert getattr(stats, name)() == value, (step, name, getattr(stats, name)(), value)
+        print('Directed {}: {}'.format(directed, brute_stats(c, network)))
+        network.clear()
+        assert stats.n_components() == len(c.agents) and stats.within_group_ties() == 0
+
+
+def test_self_ties_and_ungroup():
+    new_test()
+    print('Test abmtools.NetworkStats with ties of agents with themselves, Group.ungroup() and clear_groups()')
+    print('Expected behavior: the statistics always equal statistics computed from scratch')
+    for directed in (False, True):
+        c, network = fresh_model(directed=directed)
+        stats = abmtools.NetworkStats(network)
+        a, b = c.agents[0], c.agents[4]
+        network.add(a, a)
+        network.add(a, b)
+        c.move(a, c.groups[1])
+        assert stats.within_group_ties() == brute_stats(c, network)['within_group_ties'] == 1
+        assert stats.between_group_ties() == 1
+        c.move(a, None)
+        assert stats.within_group_ties() == brute_stats(c, network)['within_group_ties'] == 0
+        c.move(a, c.groups[0])
+        assert stats.within_group_ties() == brute_stats(c, network)['within_group_ties'] == 2
+        c.groups[0].ungroup()
+        assert a.group is None and stats.within_group_ties() == brute_stats(c, network)['within_group_ties'] == 0
+        rng = random.Random(17)
+        for _ in range(100):
+            network.add(*rng.sample(c.agents, 2))
+        c.move(a, c.groups[2])
+        assert stats.within_group_ties() == brute_stats(c, network)['within_group_ties']
+        c.clear_groups()
+        print('Directed {}: within group ties after clear_groups(): {}'.format(directed, stats.within_group_ties()))
+        assert stats.within_group_ties() == brute_stats(c, network)['within_group_ties'] == 0
+
+
+def test_reporters():
+    new_test()
+    print('Test abmtools.NetworkStats.add_reporters() with abmtools.Ticker')
+    print('Expected behavior: the reporters record the statistics of every tick')
+    c, network = fresh_model()
+    stats = abmtools.NetworkStats(network)
+    stats.add_reporters()
+    sink = abmtools.MemorySink()
+    t = abmtools.Ticker(c, sink=sink)
+    rng = random.Random(7)
+
+    def add_ties():
+        for _ in range(5):
+            network.add(*rng.sample(c.agents, 2))
+
+    t.set_step(add_ties)
+    t.open_output()
+    for _ in range(4):
+        t.step()
+    columns = sink.columns()
+    print('Components per tick: {}, mean degree per tick: {}'.format(list(columns['n_components']),
+                                                                    list(columns['mean_degree'])))
+    assert list(columns['mean_degree']) == [i * 10 / 60 for i in range(1, 5)]
+    assert columns['n_components'][-1] == brute_stats(c, network)['n_components']
+
+
+def benchmark_stats(n=100000, ties=500000, changes=20000):
+    new_test()
+    print('{} tie changes in a network of {} ties between {} agents'.format(changes, ties, n))
+    c, network = fresh_model(n, 100)
+    abmtools.erdos_renyi(network, ties / (n * (n - 1) / 2))
+    start = time.perf_counter()
+    stats = abmtools.NetworkStats(network)
+    print('Building the statistics: {:.2f} s'.format(time.perf_counter() - start))
+    rng = random.Random(8)
+    network.build_index()
+    start = time.perf_counter()
+    for _ in range(changes):
+        network.add(c.agents[rng.randrange(n)], c.agents[rng.randrange(n)])
+        stats.mean_degree(), stats.within_group_ties(), stats.n_components()
+    print('Adding ties and reading the statistics after each: {:.3f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    for _ in range(100):
+        network.remove_edge(rng.randrange(len(network)))
+        stats.n_components()
+    print('Removing ties and rebuilding the components after each: {:.3f} s per removal'.format(
+        (time.perf_counter() - start) / 100))
+    assert stats.n_components() == brute_stats(c, network)['n_components']
+
+
+###########################################################################
+test_incremental()
+test_self_ties_and_ungroup()
+test_reporters()
+benchmark_stats()
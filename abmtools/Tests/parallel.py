@@ -0,0 +1,171 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import bowles_gintis
+import random
+
+
+class Member(abmtools.Agent):
+    def __init__(self, controller, *args, **kwargs):
+        abmtools.Agent.__init__(self, controller, *args, **kwargs)
+        self.value = random.uniform(0, 1)
+        self.score = None
+
+
+class Team(abmtools.Group):
+    def __init__(self, *args, **kwargs):
+        abmtools.Group.__init__(self, *args, **kwargs)
+        self.mean = None
+
+
+def score(g, rng):
+    # Depends only on the group, its members and the group's own random numbers
+    g.mean = sum(m.value for m in g.members) / len(g.members)
+    for m in g.members:
+        m.score = m.value - g.mean + g.controller.noise * rng.random()
+
+
+class Cell(abmtools.Agent):
+    level = abmtools.Buffered(default=0)
+
+
+class Tissue(abmtools.Group):
+    total = abmtools.Buffered(default=0)
+
+
+def grow(g):
+    # Every member reads the committed levels of all members, whatever the order of the writes
+    total = sum(m.level for m in g.members)
+    for m in g.members:
+        m.level = m.level + total
+    g.total = total
+
+
+class Counted:
+    # Counts how often it is pickled
+    pickled = 0
+
+    def __getstate__(self):
+        Counted.pickled += 1
+        return {}
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_controller(n_groups=25, size=8):
+    random.seed(1)
+    c = abmtools.Controller()
+    c.noise = 0.1
+    # Fixed group idents, so the per-group random numbers are the same for every controller
+    for i in range(n_groups):
+        c.create_groups(1, Team, ident=i)
+    c.create_agents(n_groups * size, Member)
+    for i, a in enumerate(c.agents):
+        a.group = c.groups[i % n_groups]
+    c.census()
+    return c
+
+
+def test_backends():
+    new_test()
+    print('Test abmtools.GroupPhase with serial, thread and process backends')
+    print('Expected behavior: identical results for every backend and number of workers')
+    results = []
+    for backend, workers in [('serial', 1), ('thread', 3), ('process', 2), ('process', 3)]:
+        c = fresh_controller()
+        with abmtools.GroupPhase(c, score, backend=backend, workers=workers, pass_rng=True, seed=7) as phase:
+            phase()
+            phase()
+        results.append(([g.mean for g in c.groups], [a.score for a in c.agents]))
+        print('{} ({} workers): first scores {}'.format(backend, workers, [round(a.score, 4) for a in c.agents[:3]]))
+        assert all(a.group.members.count(a) == 1 for a in c.agents)
+    assert all(r == results[0] for r in results)
+
+
+def test_merge_attributes():
+    new_test()
+    print('Test abmtools.GroupPhase merging only selected attributes with the process backend')
+    print('Expected behavior: only the listed attributes change in the controller\'s groups and agents')
+    c = fresh_controller(4, 3)
+    with abmtools.GroupPhase(c, score, backend='process', workers=2, pass_rng=True, attributes=['mean'],
+                             member_attributes=[]) as phase:
+        phase()
+    print('Means: {}, scores: {}'.format([round(g.mean, 3) for g in c.groups], set(a.score for a in c.agents)))
+    assert all(g.mean is not None for g in c.groups) and all(a.score is None for a in c.agents)
+
+
+def test_detach():
+    new_test()
+    print('Test abmtools.detach() with a cache of picklable attributes')
+    print('Expected behavior: unpicklable attributes are left out, attributes are only test-pickled once per type')
+    c = fresh_controller(4, 3)
+    c.table = Counted()
+    c.callback = lambda x: x
+    picklable = {}
+    for _ in range(3):
+        detached = abmtools.detach(c, picklable)
+        assert detached.noise == 0.1 and detached.table is c.table and not hasattr(detached, 'callback')
+        assert not hasattr(detached, 'agents') and not hasattr(detached, 'groups')
+    print('Times pickled: {}, cached attributes: {}'.format(Counted.pickled, len(picklable)))
+    assert Counted.pickled == 1
+    c.callback = 'now a string'
+    assert abmtools.detach(c, picklable).callback == 'now a string'
+
+
+def test_buffered():
+    new_test()
+    print('Test abmtools.GroupPhase with abmtools.Buffered attributes and the process backend')
+    print('Expected behavior: workers read the committed values, writes are pending until the swap, as with serial')
+    results = []
+    for backend in ('serial', 'process'):
+        c = abmtools.Controller()
+        for i in range(6):
+            c.create_groups(1, Tissue, ident=i)
+        c.create_agents(18, Cell)
+        for i, a in enumerate(c.agents):
+            a.group = c.groups[i % 6]
+            a.level = i
+        c.census()
+        c.buffers.swap()
+        with abmtools.GroupPhase(c, grow, backend=backend, workers=2) as phase:
+            phase()
+            # Written but not swapped: the committed values are still read
+            assert [a.level for a in c.agents] == list(range(18))
+            assert c.buffers.pending(c.agents[0], 'level') == 0 + (0 + 6 + 12)
+            c.buffers.swap()
+            phase()
+            c.buffers.swap()
+        results.append(([a.level for a in c.agents], [g.total for g in c.groups]))
+        print('{}: levels {}, totals {}'.format(backend, results[-1][0][:6], results[-1][1]))
+    assert results[0] == results[1]
+
+
+def test_bowles_gintis():
+    new_test()
+    print('Test abmtools.GroupPhase running a group method of the Bowles-Gintis model in worker processes')
+    print('Expected behavior: the same population distributions as the serial phase')
+    random.seed(3)
+    c = bowles_gintis.setup()
+    bowles_gintis.update_distributions(c)
+    serial = [(g.fraction_shirkers, g.fraction_cooperators, g.fraction_reciprocators) for g in c.groups]
+    for g in c.groups:
+        g.fraction_shirkers = None
+    with abmtools.GroupPhase(c, 'update_population_distribution', backend='process', workers=2,
+                             attributes=['fraction_shirkers', 'fraction_cooperators', 'fraction_reciprocators'],
+                             member_attributes=[]) as phase:
+        phase()
+    parallel = [(g.fraction_shirkers, g.fraction_cooperators, g.fraction_reciprocators) for g in c.groups]
+    print('First group: {}'.format(parallel[0]))
+    assert parallel == serial
+
+
+###########################################################################
+test_backends()
+test_merge_attributes()
+test_detach()
+test_buffered()
+test_bowles_gintis()
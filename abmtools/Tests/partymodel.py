@@ -6,7 +6,6 @@ parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(0,parentdir)
 import abmtools
 import random
-import sys
 
 class Party(abmtools.Controller):
     # Parties have the following attributes:
@@ -67,17 +66,13 @@ def setup(n=70, k=10, tolerance=25):
 
     return c
 
-def step(c, i):
+def converged(t):
+    # Stop condition for Ticker.run_steps(): the model has converged when all agents are happy
+    return all([a.happy for a in t.controller.agents])
+
+def step(c):
     ### One Step
-        # Stop if all agents are happy (model converged)
     print("Happy agents: {}".format(sum([a.happy for a in c.agents])))
-    if all([a.happy for a in c.agents]):
-        print("ALL AGENTS HAPPY, TERMINATING")
-        print("Step {}".format(i))
-        print("Boring groups: {}".format(c.boringgroups))
-        for g in c.groups:
-            print([str(i.sex) for i in g.members])
-        sys.exit()
 
         # Update group memberships
     c.census()
@@ -92,10 +87,17 @@ def step(c, i):
     c.count_boring()
 
         # FOR NOW WE WILL USE THE CONSOLE TO OUTPUT AN UPDATE EACH STEP
-    #print("Step {}".format(i))
     #print("Boring groups: {}".format(c.boringgroups))
 
 if __name__ == '__main__':
-    c = setup()
-    for i in range(2000): # Max 2000 steps, but stops earlier when converged
-        step(c, i)
+    t = abmtools.Ticker()
+    t.set_setup(setup)
+    c = t.setup()
+    t.set_step(step, c)
+    steps = t.run_steps(2000, until=converged, write=False)  # Max 2000 steps, but stops earlier when converged
+    if converged(t):
+        print("ALL AGENTS HAPPY, TERMINATING")
+        print("Step {}".format(steps))
+        print("Boring groups: {}".format(c.boringgroups))
+        for g in c.groups:
+            print([str(i.sex) for i in g.members])
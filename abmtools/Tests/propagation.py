@@ -0,0 +1,124 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import random
+import time
+from abmtools import propagation
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_network(n=300, directed=False, p=0.02):
+    c = abmtools.Controller(seed=3)
+    c.create_agents(n)
+    rng = random.Random(3)
+    for a in c.agents:
+        a.opinion = rng.random()
+        a.infected = rng.random() < 0.05
+    network = abmtools.Network(c, directed=directed)
+    abmtools.erdos_renyi(network, p)
+    network.add_attribute('weight', 1.0, 'd')
+    for index in range(len(network)):
+        network.set_attribute('weight', index, rng.uniform(0.5, 2.0))
+    return c, network
+
+
+def loop_reduce(network, a, attribute, how, weight=None, incoming=False):
+    neighbors = network.in_neighbors(a) if incoming else network.neighbors(a)
+    values = [getattr(b, attribute) for b in neighbors]
+    weights = [(network.tie(b, a) if incoming else network.tie(a, b))[weight] if weight else 1.0 for b in neighbors]
+    if how == 'sum':
+        return sum(v * w for v, w in zip(values, weights))
+    if how == 'mean':
+        return sum(v * w for v, w in zip(values, weights)) / sum(weights) if values else 0.0
+    if how == 'max':
+        return max(values) if values else 0
+    if how == 'min':
+        return min(values) if values else 0
+    return any(values)
+
+
+def test_reductions():
+    new_test()
+    print('Test the neighbor reductions of abmtools.propagation against loops over neighbors')
+    print('Expected behavior: the same results, for directed and undirected networks, with and without weights')
+    for directed in (False, True):
+        for incoming in ((False, True) if directed else (False,)):
+            c, network = fresh_network(directed=directed)
+            # Self-ties count once, as in Network.neighbors()
+            for a in c.agents[:10]:
+                network.add(a, a, weight=1.5)
+            opinions = propagation.gather(network, 'opinion')
+            infected = propagation.gather(network, 'infected', dtype=bool, default=False)
+            for how in ('sum', 'mean', 'max', 'min'):
+                for weight in ((None, 'weight') if how in ('sum', 'mean') else (None,)):
+                    reduce = propagation.REDUCTIONS[how]
+                    if weight is None:
+                        result = reduce(network, opinions, incoming=incoming)
+                    else:
+                        result = reduce(network, opinions, weight=weight, incoming=incoming)
+                    for a in c.agents:
+                        assert abs(result[a.ident] - loop_reduce(network, a, 'opinion', how, weight, incoming)) < 1e-9
+            degrees = network.freeze(reverse=incoming).degrees()
+            neighbors = network.in_neighbors if incoming else network.neighbors
+            assert all(degrees[a.ident] == len(neighbors(a)) for a in c.agents[:10])
+            exposed = abmtools.neighbor_any(network, infected, incoming=incoming)
+            assert all(exposed[a.ident] == loop_reduce(network, a, 'infected', 'any', None, incoming) for a in c.agents)
+            print('Directed {}, incoming {}: {} of {} agents have an infected neighbor'.format(
+                directed, incoming, int(exposed.sum()), len(c.agents)))
+
+
+def test_propagate():
+    new_test()
+    print('Test abmtools.propagate()')
+    print('Expected behavior: all agents update at once from the values before the step, isolated agents get 0')
+    c, network = fresh_network(50, p=0.1)
+    before = {a: loop_reduce(network, a, 'opinion', 'mean') for a in c.agents}
+    abmtools.propagate(network, 'opinion')
+    assert all(abs(a.opinion - before[a]) < 1e-9 for a in c.agents)
+    loner = c.agents[0]
+    loner.hatch()
+    c.kill(c.agents[1])
+    abmtools.propagate(network, 'infected', 'any', target='exposed')
+    child = c.agents[-1]
+    print('Exposed agents: {}, hatched agent without ties: {}'.format(sum(a.exposed for a in c.agents), child.exposed))
+    assert child.exposed is False and isinstance(c.agents[0].exposed, bool)
+
+
+def benchmark_propagation(n=1000000, ties=10000000, sample=20000):
+    new_test()
+    print('Neighbor means over {} ties between {} agents'.format(ties, n))
+    c = abmtools.Controller(seed=3)
+    c.create_agents(n)
+    for a in c.agents:
+        a.opinion = a.ident % 7
+    network = abmtools.Network(c)
+    abmtools.erdos_renyi(network, ties / (n * (n - 1) / 2))
+    network.freeze()
+    start = time.perf_counter()
+    abmtools.propagate(network, 'opinion', target='mean_opinion')
+    print('abmtools.propagate(): {:.2f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    values = propagation.gather(network, 'opinion')
+    for _ in range(10):
+        values = abmtools.neighbor_mean(network, values)
+    print('10 steps on the array alone: {:.2f} s'.format(time.perf_counter() - start))
+    network.build_index()
+    start = time.perf_counter()
+    for a in c.agents[:sample]:
+        neighbors = network.neighbors(a)
+        a.loop_opinion = sum(b.opinion for b in neighbors) / len(neighbors) if neighbors else 0.0
+    elapsed = time.perf_counter() - start
+    print('Loop over neighbors: {:.2f} s for {} agents (about {:.0f} s for all)'.format(elapsed, sample,
+                                                                                      elapsed * n / sample))
+    assert all(abs(a.loop_opinion - a.mean_opinion) < 1e-9 for a in c.agents[:sample])
+
+
+###########################################################################
+test_reductions()
+test_propagate()
+benchmark_propagation()
@@ -0,0 +1,118 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import random
+import time
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_controller(n_agents=200, n_groups=15, seed=11):
+    c = abmtools.Controller()
+    c.create_groups(n_groups)
+    c.create_agents(n_agents)
+    rng = random.Random(seed)
+    for a in c.agents:
+        a.group = rng.choice(c.groups + [None])
+    c.census()
+    return c
+
+
+def expected_order(groups, largest=True):
+    return sorted(groups, key=lambda g: -g.size if largest else g.size)
+
+
+def test_ranking():
+    new_test()
+    print('Test abmtools.GroupRanking through random moves, kills, hatches, ungroups and censuses')
+    print('Expected behavior: largest(), smallest() and top() always agree with max_one_of(), min_one_of() and sorting')
+    c = fresh_controller()
+    ranking = abmtools.GroupRanking(c)
+    rng = random.Random(12)
+    for step in range(2000):
+        action = rng.random()
+        if action < 0.7:
+            c.move(rng.choice(c.agents), rng.choice(c.groups + [None]))
+        elif action < 0.8:
+            c.kill(rng.choice(c.agents))
+        elif action < 0.9:
+            rng.choice(c.agents).hatch()
+        elif action < 0.95:
+            rng.choice(c.groups).ungroup()
+        elif action < 0.99:
+            c.census()
+        else:
+            # Groups are not ranked before their first census
+            c.create_groups(1)
+            assert len(ranking) == len(c.groups) - 1
+            c.census()
+        assert ranking.largest() is abmtools.max_one_of(c.groups, 'size')
+        assert ranking.smallest() is abmtools.min_one_of(c.groups, 'size')
+        assert ranking.top(5) == expected_order(c.groups)[:5]
+        assert ranking.bottom(5) == expected_order(c.groups, largest=False)[:5]
+    print('Largest group: {}, smallest group: {}'.format(ranking.largest(), ranking.smallest()))
+    print('Sizes of the 5 largest groups: {}'.format([g.size for g in ranking.top(5)]))
+    assert len(ranking.top(1000)) == len(ranking) == len(c.groups)
+
+
+def test_kill():
+    new_test()
+    print('Test abmtools.GroupRanking after abmtools.Controller.kill() without a census')
+    print('Expected behavior: killing members of the largest group makes the next group the largest')
+    c = fresh_controller(60, 4)
+    ranking = abmtools.GroupRanking(c)
+    first, second = expected_order(c.groups)[:2]
+    while first.size >= second.size:
+        c.kill(first.members[-1])
+    print('Sizes after the kills: {}'.format([g.size for g in c.groups]))
+    assert all(g.size == len(g.members) for g in c.groups)
+    assert ranking.largest() is second and ranking.top(4) == expected_order(c.groups)
+
+
+def test_other_attribute():
+    new_test()
+    print('Test abmtools.GroupRanking by an attribute other than size')
+    print('Expected behavior: Groups are ranked by the attribute, updates are reported with update()')
+    c = fresh_controller(20, 6)
+    for g in c.groups:
+        g.wealth = g.ident % 4
+    ranking = abmtools.GroupRanking(c, 'wealth')
+    assert c.group_rankings['wealth'] is ranking
+    assert ranking.top(6) == sorted(c.groups, key=lambda g: -g.wealth)
+    c.groups[-1].wealth = 10
+    ranking.update(c.groups[-1])
+    print('Richest group: {}'.format(ranking.largest()))
+    assert ranking.largest() is c.groups[-1] and ranking.smallest() is abmtools.min_one_of(c.groups, 'wealth')
+    c.clear_groups()
+    assert ranking.largest() is None and ranking.top(3) == []
+
+
+def benchmark_ranking(n_groups=10000, n_agents=200000, queries=20000):
+    new_test()
+    print('{} moves to or from the largest group among {} groups'.format(queries, n_groups))
+    c = fresh_controller(n_agents, n_groups)
+    ranking = abmtools.GroupRanking(c)
+    rng = random.Random(13)
+    start = time.perf_counter()
+    for _ in range(queries):
+        largest = ranking.largest()
+        c.move(largest.members[-1], rng.choice(c.groups))
+    print('abmtools.GroupRanking: {:.3f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    for _ in range(queries // 100):
+        largest = abmtools.max_one_of(c.groups, 'size')
+        c.move(largest.members[-1], rng.choice(c.groups))
+    elapsed = time.perf_counter() - start
+    print('abmtools.max_one_of(): {:.3f} s for {} moves (about {:.1f} s for all)'.format(elapsed, queries // 100,
+                                                                                        elapsed * 100))
+
+
+###########################################################################
+test_ranking()
+test_kill()
+test_other_attribute()
+benchmark_ranking()
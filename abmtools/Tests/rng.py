@@ -0,0 +1,93 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import partymodel
+import pickle
+import random
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def test_streams():
+    new_test()
+    print('Test abmtools.RNGManager streams')
+    print('Expected behavior: a stream only depends on the root seed and its key, not on other streams')
+    a = abmtools.RNGManager(42)
+    b = abmtools.RNGManager(42)
+    b.stream('phase', 'reproduce').random()
+    first = [a.stream('agents').random() for _ in range(3)]
+    second = [b.stream('agents').random() for _ in range(3)]
+    print('Stream "agents": {} and {}'.format(first, second))
+    assert first == second
+    assert a.stream('phase', 'migrate').random() != a.stream('phase', 'reproduce').random()
+    assert a.stream('agents') is a.stream('agents')
+    assert a.run(1).seed == b.run(1).seed != a.run(2).seed
+    assert a.partition(0).seed != a.run(0).seed
+    assert abmtools.RNGManager().seed != abmtools.RNGManager().seed
+
+
+def test_batches():
+    new_test()
+    print('Test batched draws of abmtools.RNGManager')
+    print('Expected behavior: blocks of draws of the requested size and range, reproducible from the seed')
+    rng = abmtools.RNGManager(7)
+    uniforms = rng.uniform(1000, -1, 0)
+    integers = rng.integers(1000, 0, 10)
+    normals = rng.normal(1000, 5, 1)
+    print('Uniforms: {:.3f}..{:.3f}, integers: {}..{}, mean of normals: {:.2f}'.format(
+        min(uniforms), max(uniforms), min(integers), max(integers), sum(normals) / len(normals)))
+    assert len(uniforms) == len(integers) == len(normals) == 1000
+    assert -1 <= min(uniforms) and max(uniforms) < 0
+    assert 0 <= min(integers) and max(integers) < 10
+    assert 4.8 < sum(normals) / len(normals) < 5.2
+    assert list(abmtools.RNGManager(7).uniform(1000, -1, 0)) == list(uniforms)
+
+
+def test_state():
+    new_test()
+    print('Test saving and restoring abmtools.RNGManager, alone and as part of a controller')
+    print('Expected behavior: a restored manager continues exactly where the saved one stopped')
+    rng = abmtools.RNGManager(3)
+    rng.stream('a').random()
+    rng.uniform(5)
+    state = rng.getstate()
+    expected = (rng.stream('a').random(), list(rng.uniform(5)))
+    rng.setstate(state)
+    assert (rng.stream('a').random(), list(rng.uniform(5))) == expected
+    c = abmtools.Controller(seed=3)
+    c.rng.stream('a').random()
+    copy = pickle.loads(pickle.dumps(c))
+    print('Next draws: {} and {}'.format(c.rng.stream('a').random(), copy.rng.stream('a').random()))
+    assert copy.rng.stream('b').random() == c.rng.stream('b').random()
+
+
+def test_ticker_runs():
+    new_test()
+    print('Test seeding of runs by abmtools.Ticker')
+    print('Expected behavior: the same run number gives the same model, different runs give different models')
+
+    def setup_run(run):
+        t = abmtools.Ticker(seed=11, run=run)
+        t.set_setup(partymodel.setup, n=70, k=10, tolerance=25)
+        c = t.setup()
+        return [a.group.ident - c.groups[0].ident for a in c.agents], c.rng.seed
+
+    first, seed = setup_run(1)
+    again, seed_again = setup_run(1)
+    other, other_seed = setup_run(2)
+    print('Run 1: {}'.format(first[:15]))
+    print('Run 2: {}'.format(other[:15]))
+    assert first == again and seed == seed_again
+    assert first != other and seed != other_seed
+    random.seed()
+
+
+###########################################################################
+test_streams()
+test_batches()
+test_state()
+test_ticker_runs()
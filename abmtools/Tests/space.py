@@ -0,0 +1,107 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import math
+import random
+import time
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_space(n=300, mode='hash', dims=2, cell_size=1.0, size=10.0):
+    rng = random.Random(5)
+    c = abmtools.Controller()
+    space = abmtools.SpatialIndex(cell_size, c, mode=mode)
+    c.create_agents(n)
+    for a in c.agents:
+        space.place(a, tuple(rng.uniform(-size, size) for _ in range(dims)))
+    return c, space
+
+
+def brute_in_radius(space, agent, r):
+    p = space.position(agent)
+    return sorted(b.ident for b in space.positions if b is not agent and math.dist(p, space.position(b)) <= r)
+
+
+def brute_nearest(space, agent, k):
+    p = space.position(agent)
+    others = sorted((math.dist(p, space.position(b)), b.ident) for b in space.positions if b is not agent)
+    return [ident for d, ident in others[:k]]
+
+
+def test_queries():
+    new_test()
+    print('Test abmtools.SpatialIndex queries against brute force, in both modes and in 2D and 3D')
+    print('Expected behavior: the same agents as comparing every pair of agents')
+    for mode in ('hash', 'kdtree'):
+        for dims in (2, 3):
+            c, space = fresh_space(mode=mode, dims=dims)
+            for a in c.agents[:20]:
+                assert sorted(b.ident for b in space.in_radius(a, 2.5)) == brute_in_radius(space, a, 2.5)
+                assert [b.ident for b in space.nearest(a, 5)] == brute_nearest(space, a, 5)
+            pairs = sorted(tuple(sorted((a.ident, b.ident))) for a, b in space.pairs_within(1.5))
+            brute = sorted((a.ident, b.ident) for a in c.agents for b in c.agents
+                           if a.ident < b.ident and math.dist(space.position(a), space.position(b)) <= 1.5)
+            print('Mode {}, {}D: {} pairs within 1.5'.format(mode, dims, len(pairs)))
+            assert pairs == brute
+    assert abmtools.SpatialIndex().nearest(None, 3, position=(0, 0)) == []
+
+
+def test_sparse_queries():
+    new_test()
+    print('Test abmtools.SpatialIndex hash queries with buckets much smaller than the gaps between agents')
+    print('Expected behavior: the same agents as brute force, without visiting every empty bucket in between')
+    for dims in (2, 3):
+        c, space = fresh_space(60, dims=dims, cell_size=0.001, size=100.0)
+        start = time.perf_counter()
+        for a in c.agents[:20]:
+            assert sorted(b.ident for b in space.in_radius(a, 40.0)) == brute_in_radius(space, a, 40.0)
+            assert [b.ident for b in space.nearest(a, 3)] == brute_nearest(space, a, 3)
+        pairs = sorted(tuple(sorted((a.ident, b.ident))) for a, b in space.pairs_within(30.0))
+        assert pairs == sorted((a.ident, b.ident) for a in c.agents for b in c.agents
+                               if a.ident < b.ident and math.dist(space.position(a), space.position(b)) <= 30.0)
+        elapsed = time.perf_counter() - start
+        print('{}D: 20 radius and nearest queries and all pairs within 30 in {:.3f} s'.format(dims, elapsed))
+        # Visiting every bucket within the radius would take hours
+        assert elapsed < 5
+
+
+def test_kill_hatch_move():
+    new_test()
+    print('Test abmtools.SpatialIndex with moving, killed and hatched agents')
+    print('Expected behavior: queries see new positions, killed agents disappear, hatched agents appear at the parent')
+    for mode in ('hash', 'kdtree'):
+        c, space = fresh_space(50, mode=mode)
+        a, b = c.agents[:2]
+        space.move_to(a, (100.0, 100.0))
+        space.move_to(b, (100.5, 100.0))
+        assert space.in_radius(a, 1.0) == [b] and space.nearest(a) == [b]
+        c.kill(b)
+        child = a.hatch()
+        print('Mode {}: near a after kill and hatch: {}'.format(mode, [x.ident for x in space.in_radius(a, 1.0)]))
+        assert space.in_radius(a, 1.0) == [child] and space.position(b) is None and len(space) == 50
+
+
+def benchmark_queries(n=20000):
+    new_test()
+    print('Radius queries (r = 1) for {} agents'.format(n))
+    c, space = fresh_space(n, size=50.0)
+    start = time.perf_counter()
+    found = sum(len(space.in_radius(a, 1.0)) for a in c.agents)
+    print('Spatial hash: {:.3f} s ({} neighbors found)'.format(time.perf_counter() - start, found))
+    start = time.perf_counter()
+    for a in c.agents:
+        x, y = space.position(a)
+        space.move_to(a, (x + 0.1, y))
+    print('Moving all agents: {:.3f} s'.format(time.perf_counter() - start))
+
+
+###########################################################################
+test_queries()
+test_sparse_queries()
+test_kill_hatch_move()
+benchmark_queries()
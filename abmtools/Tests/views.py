@@ -0,0 +1,116 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import collections
+import random
+import time
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def fresh_controller(n_agents=100, n_groups=10):
+    c = abmtools.Controller()
+    c.create_groups(n_groups)
+    c.create_agents(n_agents)
+    for a in c.agents:
+        a.group = c.groups[a.ident % n_groups]
+        a.happy = a.ident % 3 == 0
+    c.census()
+    return c
+
+
+def test_excluding():
+    new_test()
+    print('Test abmtools.Excluding and abmtools.other()')
+    print('Expected behavior: the collection without one instance, in order, without copying it')
+    c = fresh_controller()
+    g = c.groups[4]
+    others = abmtools.other(g, c.groups)
+    expected = [x for x in c.groups if x is not g]
+    print('Length: {}, first: {}, last: {}'.format(len(others), others[0], others[-1]))
+    assert isinstance(others, abmtools.Excluding) and others.collection is c.groups
+    assert list(others) == expected and [others[i] for i in range(len(others))] == expected
+    assert others[2:6] == expected[2:6] and others[-1] is expected[-1]
+    assert g not in others and c.groups[5] in others and len(c.groups) == 10
+    assert abmtools.max_one_of(others, 'ident') is c.groups[-1]
+    # Views of views
+    fewer = abmtools.other(c.groups[0], others)
+    assert list(fewer) == expected[1:]
+    try:
+        abmtools.other(abmtools.Group(c), c.groups)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_where():
+    new_test()
+    print('Test abmtools.Where')
+    print('Expected behavior: the instances for which the predicate is true, following changes to the instances')
+    c = fresh_controller()
+    unhappy = abmtools.Where(c.agents, lambda a: not a.happy)
+    assert list(unhappy) == [a for a in c.agents if not a.happy] and len(unhappy) == 66
+    assert unhappy[0] is c.agents[1] and unhappy[-1] is c.agents[98] and c.agents[0] not in unhappy
+    c.agents[0].happy = False
+    assert c.agents[0] in unhappy and unhappy[0] is c.agents[0] and len(unhappy) == 67
+    members = abmtools.Where(c.groups[1].members, lambda a: a.happy)
+    print('Happy members of group 1: {}'.format([a.ident for a in members]))
+    assert [a.ident for a in members] == [21, 51, 81]
+    nobody = abmtools.Where(c.agents, lambda a: False)
+    assert not nobody and len(nobody) == 0
+    try:
+        nobody.choice()
+    except IndexError:
+        pass
+    else:
+        assert False
+    try:
+        abmtools.View(c.agents)
+    except TypeError:
+        pass
+    else:
+        assert False
+
+
+def test_choice():
+    new_test()
+    print('Test random choices from abmtools.Excluding and abmtools.Where')
+    print('Expected behavior: every instance of the view is drawn about equally often, others never')
+    c = fresh_controller(30, 5)
+    rng = random.Random(16)
+    others = abmtools.other(c.groups[2], c.groups)
+    counts = collections.Counter(random.choice(others) for _ in range(8000))
+    counts.update(others.choice(rng) for _ in range(8000))
+    print('Draws per group: {}'.format([counts[g] for g in c.groups]))
+    assert counts[c.groups[2]] == 0 and all(3500 < counts[g] < 4500 for g in others)
+    rare = abmtools.Where(c.agents, lambda a: a.ident in (3, 17))
+    counts = collections.Counter(rare.choice(rng) for _ in range(4000))
+    assert set(counts) == set(rare) and all(1800 < n < 2200 for n in counts.values())
+
+
+def benchmark_other(n_groups=1000, n_agents=100000):
+    new_test()
+    print('Choosing another group for each of {} agents among {} groups'.format(n_agents, n_groups))
+    c = fresh_controller(n_agents, n_groups)
+    start = time.perf_counter()
+    for a in c.agents:
+        random.choice(abmtools.other(a.group, c.groups))
+    print('abmtools.other(): {:.3f} s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    for a in c.agents:
+        groups = list(c.groups)
+        groups.remove(a.group)
+        random.choice(groups)
+    print('Copying the list of groups: {:.3f} s'.format(time.perf_counter() - start))
+
+
+###########################################################################
+test_excluding()
+test_where()
+test_choice()
+benchmark_other()
@@ -0,0 +1,97 @@
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0, parentdir)
+import abmtools
+import numpy
+import random
+import time
+
+
+def new_test():
+    print('\n')
+    print('### ### ### ### ### ### ### ### ### ###')
+
+
+def test_neighborhoods():
+    new_test()
+    print('Test neighborhoods of abmtools.Grid')
+    print('Expected behavior: 8 Moore, 4 von Neumann and 12 radius-2 neighbors, wrapped on a torus, cut off otherwise')
+    torus = abmtools.Grid(10, 10)
+    box = abmtools.Grid(10, 10, torus=False)
+    print('Moore neighbors of (0, 0) on a torus: {}'.format(sorted(torus.neighbors(0, 0))))
+    assert sorted(torus.neighbors(0, 0)) == [(0, 1), (0, 9), (1, 0), (1, 1), (1, 9), (9, 0), (9, 1), (9, 9)]
+    assert len(torus.neighbors(5, 5, 'von_neumann')) == 4
+    assert len(torus.neighbors(5, 5, 'radius', 2)) == 12
+    assert len(torus.neighbors(5, 5, include_center=True)) == 9
+    print('Moore neighbors of (0, 0) without wrapping: {}'.format(sorted(box.neighbors(0, 0))))
+    assert sorted(box.neighbors(0, 0)) == [(0, 1), (1, 0), (1, 1)]
+
+
+def test_occupancy():
+    new_test()
+    print('Test the occupancy index of abmtools.Grid with abmtools.Controller.kill() and abmtools.Agent.hatch()')
+    print('Expected behavior: killed agents leave the grid, hatched agents appear on their parent\'s patch')
+    c = abmtools.Controller()
+    grid = abmtools.Grid(5, 5, c)
+    c.create_agents(4)
+    a, b, d, e = c.agents
+    grid.place(a, 2, 2)
+    grid.place(b, 3, 3)
+    grid.place(d, 2, 2)
+    grid.place(e, 0, 0)
+    assert c.grid is grid
+    print('Agents near a: {}'.format([x.ident for x in grid.agents_near(a)]))
+    assert sorted(x.ident for x in grid.agents_near(a)) == [b.ident, d.ident]
+    grid.move_by(e, -1, -1)
+    assert grid.position(e) == (4, 4) and grid.agents_near(e) == [b]
+    c.kill(d)
+    child = a.hatch()
+    print('Patch (2, 2) after kill and hatch: {}'.format([x.ident for x in grid.agents_at(2, 2)]))
+    assert grid.agents_at(2, 2) == [a, child] and grid.position(d) is None
+    assert grid.counts.sum() == 4 and grid.counts[2, 2] == 2
+
+
+def test_patch_operations():
+    new_test()
+    print('Test diffuse, evaporate and neighbor sums of abmtools.Grid')
+    print('Expected behavior: diffusion conserves the total, neighbor sums match a loop over patches')
+    for torus in (True, False):
+        grid = abmtools.Grid(6, 4, torus=torus)
+        chemical = grid.add_patch_variable('chemical')
+        chemical[0, 0] = 80.0
+        grid.diffuse('chemical', 0.5)
+        print('Torus {}: after diffusion (0, 0) = {}, (1, 1) = {}, total = {}'.format(
+            torus, chemical[0, 0], chemical[1, 1], chemical.sum()))
+        assert abs(chemical.sum() - 80.0) < 1e-9 and chemical[1, 1] == 5.0
+        assert chemical[0, 0] == (40.0 if torus else 40.0 + 5 * 5.0)
+        grid.evaporate('chemical', 0.25)
+        assert abs(chemical.sum() - 60.0) < 1e-9
+        grid['food'] = numpy.arange(24).reshape(6, 4)
+        sums = grid.neighbor_sum('food', 'von_neumann', include_center=True)
+        for x in range(6):
+            for y in range(4):
+                expected = sum(grid['food'][cell] for cell in grid.neighbors(x, y, 'von_neumann', include_center=True))
+                assert sums[x, y] == expected
+
+
+def benchmark_neighbors(n=20000, size=200):
+    new_test()
+    print('Neighbor queries for {} agents on a {}x{} grid'.format(n, size, size))
+    c = abmtools.Controller()
+    grid = abmtools.Grid(size, size, c)
+    c.create_agents(n)
+    grid.place_randomly(c.agents, random.Random(1))
+    start = time.perf_counter()
+    found = sum(len(grid.agents_near(a)) for a in c.agents)
+    print('Grid index: {:.3f} s ({} neighbors found)'.format(time.perf_counter() - start, found))
+    start = time.perf_counter()
+    sums = grid.neighbor_sum(grid.counts)
+    print('Neighbor counts of all patches by array operations: {:.4f} s'.format(time.perf_counter() - start))
+    assert sum(int(sums[grid.position(a)]) + int(grid.counts[grid.position(a)]) - 1 for a in c.agents) == found
+
+
+###########################################################################
+test_neighborhoods()
+test_occupancy()
+test_patch_operations()
+benchmark_neighbors()
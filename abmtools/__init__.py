@@ -2,23 +2,85 @@
 
 # MODULES WHICH DEPEND ON OTHER MODULES ARE IMPORTED AFTER THOSE MODULES
 
-# functions relies on nothing
+# views rely on nothing
+from .views import View, Excluding, Where
+
+# functions relies on views
 from .functions import max_one_of, max_n_of, with_max, min_one_of, min_n_of, with_min, other, compile_typeset
 
-# tie is not yet implemented so has no dependencies and no real functionality
-from .tie import Tie
+# tie relies on nothing (numpy is needed for frozen networks)
+from .tie import Tie, Network, CSR
+
+# sinks rely on nothing (ColumnarSink requires numpy)
+from .sinks import Sink, MemorySink, ColumnarSink, load_columns, SQLiteSink, CompressedSink, read_compressed
+
+# schedules rely on nothing
+from .schedules import Schedule, IntervalSchedule, TickList, LogSchedule, ChangeSchedule
+
+# stopping relies on nothing
+from .stopping import SteadyState, AllSteady
+
+# rng relies on nothing (numpy is optional)
+from .rng import RNGManager, derive_seed
 
-# ticker relies on nothing
+# ticker relies on rng
 from .ticker import Ticker
 
-# agent relies on nothing
+# events rely on nothing
+from .events import Event, EventScheduler
+
+# activation relies on nothing
+from .activation import Activation, SequentialActivation, RandomActivation, StagedActivation, SimultaneousActivation
+
+# buffers rely on nothing
+from .buffers import BufferStore, Buffered
+
+# world relies on nothing (requires numpy)
+from .world import Grid
+
+# space relies on nothing (scipy is optional)
+from .space import SpatialIndex
+
+# generators rely on world and rng (require numpy)
+from .generators import erdos_renyi, watts_strogatz, barabasi_albert, stochastic_block_model, lattice
+
+# propagation relies on nothing (requires numpy, scipy is optional)
+from .propagation import propagate, neighbor_sum, neighbor_mean, neighbor_max, neighbor_min, neighbor_any
+
+# netstats relies on nothing (numpy is optional)
+from .netstats import NetworkStats
+
+# idents rely on nothing
+from .idents import IdentAllocator
+
+# membership relies on nothing (numpy is needed for group reductions)
+from .membership import Memberships
+
+# ranking relies on nothing
+from .ranking import GroupRanking
+
+# agent relies on membership
 from .agent import a_ident, Agent
 
 # group relies on agent
 from .group import g_ident, Group
 
-# controller relies on agent and group
+# parallel relies on agent, group and rng
+from .parallel import GroupPhase, detach
+
+# distributed relies on idents and rng
+from .distributed import DistributedController, Partition, PipeTransport
+
+# controller relies on agent, group, activation, rng and idents
 from .controller import Controller
 
-__all__ = ['max_one_of', 'max_n_of', 'with_max', 'min_one_of', 'min_n_of', 'with_min', 'other', 'compile_typeset',
-           'Tie', 'Ticker', 'a_ident', 'Agent', 'g_ident', 'Group', 'Controller']
+__all__ = ['View', 'Excluding', 'Where', 'max_one_of', 'max_n_of', 'with_max', 'min_one_of', 'min_n_of', 'with_min',
+           'other', 'compile_typeset', 'Tie', 'Network', 'CSR', 'Sink', 'MemorySink', 'ColumnarSink', 'load_columns',
+           'SQLiteSink', 'CompressedSink', 'read_compressed', 'Schedule', 'IntervalSchedule', 'TickList',
+           'LogSchedule', 'ChangeSchedule', 'SteadyState', 'AllSteady', 'RNGManager', 'derive_seed', 'Ticker',
+           'Activation', 'SequentialActivation', 'RandomActivation', 'StagedActivation', 'SimultaneousActivation',
+           'Event', 'EventScheduler', 'BufferStore', 'Buffered', 'Grid', 'SpatialIndex', 'erdos_renyi',
+           'watts_strogatz', 'barabasi_albert', 'stochastic_block_model', 'lattice', 'propagate', 'neighbor_sum',
+           'neighbor_mean', 'neighbor_max', 'neighbor_min', 'neighbor_any', 'NetworkStats', 'IdentAllocator',
+           'Memberships', 'GroupRanking', 'a_ident', 'Agent', 'g_ident', 'Group', 'GroupPhase', 'detach',
+           'DistributedController', 'Partition', 'PipeTransport', 'Controller']
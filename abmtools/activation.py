@@ -0,0 +1,228 @@
+
+import random
+import time
+
+
+class Activation:
+    """
+
+    An activation scheduler. Calls a method on every Agent in one of the Controller's lists of Agents, in an order
+    decided by the scheduler. Activation objects are callable without arguments, so they can be used directly as a
+    phase of an ABMTools.Ticker (see ABMTools.Ticker.add_phase()).
+
+    The method to call is looked up once per Agent class rather than once per Agent. The number of activations and
+    the time spent on them are kept, so the throughput of a scheduler can be read with rate().
+
+    The list of Agents should not change (by killing or hatching Agents) while the Agents are being activated.
+
+    This class activates Agents in list order and is meant to be extended with other orders by overriding order().
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Agents are activated
+    :param method (string): Name of the method to call on every Agent
+    :param agentlist='agents' (string): String name of the list of Agents to activate (an attribute of the controller)
+    :param args: Any non-keyword arguments to pass to the method
+    :param kwargs: Any keyword arguments to pass to the method
+
+    """
+
+    def __init__(self, controller, method, agentlist='agents', *args, **kwargs):
+        self.controller = controller
+        self.method = method
+        self.agentlist = agentlist
+        self.args = args
+        self.kwargs = kwargs
+        self.activations = 0
+        self.seconds = 0.0
+
+    def agents(self):
+        """Return the list of Agents to activate"""
+
+        return getattr(self.controller, self.agentlist)
+
+    def order(self, agents):
+        """Return an iterable of the Agents in the order in which they are activated"""
+
+        return agents
+
+    def dispatch(self, agents, method, args=(), kwargs=None):
+        """
+
+        Call a method on Agents, looking the method up once per Agent class.
+
+        Args:
+        :param agents (iterable of ABMTools.Agent or subclasses): Agents to call the method on, in order
+        :param method (string): Name of the method
+        :param args=() (tuple): Non-keyword arguments to pass to the method
+        :param kwargs=None (dict): Keyword arguments to pass to the method
+
+        Returns:
+        :return (int): Number of Agents the method was called on
+
+        """
+
+        functions = {}
+        n = 0
+        if kwargs:
+            for a in agents:
+                cls = a.__class__
+                func = functions.get(cls)
+                if func is None:
+                    func = functions[cls] = getattr(cls, method)
+                func(a, *args, **kwargs)
+                n += 1
+        else:
+            for a in agents:
+                cls = a.__class__
+                func = functions.get(cls)
+                if func is None:
+                    func = functions[cls] = getattr(cls, method)
+                func(a, *args)
+                n += 1
+        return n
+
+    def activate(self):
+        """Activate all Agents once. Returns the number of activations"""
+
+        return self.dispatch(self.order(self.agents()), self.method, self.args, self.kwargs)
+
+    def __call__(self):
+        start = time.perf_counter()
+        self.activations += self.activate()
+        self.seconds += time.perf_counter() - start
+
+    def rate(self):
+        """Return the throughput of this scheduler so far, in Agent activations per second"""
+
+        return self.activations / self.seconds if self.seconds else 0.0
+
+
+class SequentialActivation(Activation):
+    """
+
+    Activate Agents in a fixed order: list order, or class by class if by_class is True. Activating class by class
+    calls all Agents of one class in a row with the same function (in list order within each class), which is
+    faster when there are several Agent classes with different implementations of the method, but changes the
+    order in which Agents of different classes act.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Agents are activated
+    :param method (string): Name of the method to call on every Agent
+    :param agentlist='agents' (string): String name of the list of Agents to activate
+    :param by_class=False (bool): If True, activate Agents class by class
+    :param args: Any non-keyword arguments to pass to the method
+    :param kwargs: Any keyword arguments to pass to the method
+
+    """
+
+    def __init__(self, controller, method, agentlist='agents', by_class=False, *args, **kwargs):
+        Activation.__init__(self, controller, method, agentlist, *args, **kwargs)
+        self.by_class = by_class
+
+    def activate(self):
+        agents = self.agents()
+        if not self.by_class:
+            return self.dispatch(agents, self.method, self.args, self.kwargs)
+        classes = {}
+        for a in agents:
+            cls = a.__class__
+            if cls not in classes:
+                classes[cls] = []
+            classes[cls].append(a)
+        n = 0
+        for cls, members in classes.items():
+            func = getattr(cls, self.method)
+            args, kwargs = self.args, self.kwargs
+            for a in members:
+                func(a, *args, **kwargs)
+            n += len(members)
+        return n
+
+
+class RandomActivation(Activation):
+    """
+
+    Activate Agents in a new random order every time. Instead of shuffling a copy of the list of Agents, a list of
+    indices into the list of Agents is shuffled. This list is kept between activations and only rebuilt when the
+    number of Agents changes.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Agents are activated
+    :param method (string): Name of the method to call on every Agent
+    :param agentlist='agents' (string): String name of the list of Agents to activate
+    :param rng=None (random.Random): Random number generator to shuffle with (the random module if None)
+    :param args: Any non-keyword arguments to pass to the method
+    :param kwargs: Any keyword arguments to pass to the method
+
+    """
+
+    def __init__(self, controller, method, agentlist='agents', rng=None, *args, **kwargs):
+        Activation.__init__(self, controller, method, agentlist, *args, **kwargs)
+        self.rng = rng
+        self.indices = []
+
+    def order(self, agents):
+        if len(self.indices) != len(agents):
+            self.indices = list(range(len(agents)))
+        if self.rng is None:
+            random.shuffle(self.indices)
+        else:
+            self.rng.shuffle(self.indices)
+        return (agents[i] for i in self.indices)
+
+
+class StagedActivation(Activation):
+    """
+
+    Activate Agents in stages: all Agents run the first stage's method, then all Agents run the second stage's method,
+    and so on. Every activation of one Agent in one stage counts as one activation.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Agents are activated
+    :param stages (list of strings): Names of the methods to call, in order
+    :param agentlist='agents' (string): String name of the list of Agents to activate
+    :param shuffle=False (bool): If True, Agents are activated in a new random order in every stage
+    :param rng=None (random.Random): Random number generator to shuffle with (the random module if None)
+
+    """
+
+    def __init__(self, controller, stages, agentlist='agents', shuffle=False, rng=None):
+        Activation.__init__(self, controller, None, agentlist)
+        self.stages = list(stages)
+        self.shuffle = shuffle
+        self.random = RandomActivation(controller, None, agentlist, rng=rng)
+
+    def activate(self):
+        agents = self.agents()
+        n = 0
+        for method in self.stages:
+            order = self.random.order(agents) if self.shuffle else agents
+            n += self.dispatch(order, method)
+        return n
+
+
+class SimultaneousActivation(Activation):
+    """
+
+    Activate Agents simultaneously: every Agent first runs its step method, which should only read the current state
+    and store what it intends to change, and only then every Agent runs its advance method, which applies the stored
+    changes. The result therefore does not depend on the order in which Agents are activated. Each Agent counts as
+    one activation.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Agents are activated
+    :param step='step' (string): Name of the method which decides on changes
+    :param advance='advance' (string): Name of the method which applies the changes
+    :param agentlist='agents' (string): String name of the list of Agents to activate
+
+    """
+
+    def __init__(self, controller, step='step', advance='advance', agentlist='agents'):
+        Activation.__init__(self, controller, step, agentlist)
+        self.advance = advance
+
+    def activate(self):
+        agents = self.agents()
+        n = self.dispatch(agents, self.method)
+        self.dispatch(agents, self.advance)
+        return n
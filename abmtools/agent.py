@@ -1,6 +1,8 @@
 
 import copy
 
+from abmtools import membership
+
 a_ident = 0
 
 
@@ -23,7 +25,7 @@ class Agent:
     @staticmethod
     def get_ident():
         """ Get current global agent ident from ABMtools module and return it. Increment ident value for
-        the next Agent."""
+        the next Agent. Only used for Agents without a Controller (see ABMTools.Agent.new_ident())."""
 
         global a_ident
         ident = a_ident
@@ -34,10 +36,21 @@ class Agent:
         self.controller = controller
         if ident is not None:
             self.ident = ident
+            if controller is not None and hasattr(controller, 'ident_allocator'):
+                controller.ident_allocator('agent').reserve(ident)
         else:
-            self.ident = self.get_ident()
+            self.ident = self.new_ident()
         self.group = group
 
+    def new_ident(self):
+        """Return a new ident from the Agent's Controller (see ABMTools.idents.IdentAllocator), or from the global
+        counter if the Agent has no Controller."""
+
+        controller = self.controller
+        if controller is None or not hasattr(controller, 'ident_allocator'):
+            return self.get_ident()
+        return controller.ident_allocator('agent').allocate()
+
     def __str__(self):
         return "Type = Agent, Identity = {}, Group = {}".format(self.ident, self.group)
 
@@ -57,7 +70,7 @@ class Agent:
         """
 
         new_agent = copy.copy(self)
-        new_agent.ident = new_agent.get_ident()
+        new_agent.ident = new_agent.new_ident()
         if register_with_group and self.group is not None:
             group = self.group
             group.members.append(new_agent)
@@ -65,4 +78,23 @@ class Agent:
         if register_with_controller and self.controller is not None:
             self.controller.agents.append(new_agent)
             self.controller.update_counts()
+        if self.controller is not None and hasattr(self.controller, 'notify'):
+            self.controller.notify('agent_hatched', new_agent, self)
         return new_agent
+
+    def join(self, group):
+        """Make this Agent a member of a Group, in addition to the Groups it already is a member of (see
+        ABMTools.membership.Memberships). Agent.group is not changed."""
+
+        membership.memberships_of(self).join(self, group)
+
+    def leave(self, group):
+        """Remove this Agent from a Group it joined with ABMTools.Agent.join()"""
+
+        membership.memberships_of(self).leave(self, group)
+
+    def joined_groups(self):
+        """Return the Groups this Agent joined with ABMTools.Agent.join()"""
+
+        memberships = getattr(self.controller, 'memberships', None)
+        return memberships.groups_of(self) if memberships is not None else []
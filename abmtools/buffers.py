@@ -0,0 +1,249 @@
+
+class BufferStore:
+    """
+
+    Double-buffered storage for attributes of Agents and Groups. Every buffered attribute is stored as a column with
+    two value buffers, and every Agent or Group using buffered attributes has a slot in these columns. Reading an
+    attribute returns the value it had at the end of the previous tick; writing it stores the value for the next
+    tick. Synchronous updates are therefore explicit: within a tick the order in which Agents act does not change
+    what they read.
+
+    Every value carries the generation (tick) in which it becomes visible, so swap() only increments the generation:
+    its cost does not depend on the number of Agents or attributes. An Agent which did not write an attribute in a
+    tick keeps its old value.
+
+    The store is created automatically, as controller.buffers, when an object with ABMTools.buffers.Buffered
+    attributes first uses them, and registers itself with the Controller so that slots of killed Agents are reused and
+    hatched Agents get a slot of their own with a copy of their parent's values. ABMTools.Ticker swaps the buffers at
+    the end of every step.
+
+    Every value written to an attribute, also the first one (e.g. in an object's __init__), becomes visible at the
+    next swap; until then the attribute reads as its default. ABMTools.Ticker.setup() swaps the buffers after the
+    setup function, so values written during setup are visible in the first tick. A hatched Agent starts with the
+    visible values of its parent.
+
+    Args:
+    :param controller=None (ABMTools.Controller or subclass): Controller to register with
+
+    """
+
+    def __init__(self, controller=None):
+        self.generation = 0
+        self.columns = {}
+        self.defaults = {}
+        self.size = 0
+        self.free = []
+        if controller is not None:
+            controller.register(self)
+
+    def slot(self, instance):
+        """Return the slot of an Agent or Group, allocating one if it does not have one yet"""
+
+        slot = instance.__dict__.get('_buffer_slot')
+        if slot is None:
+            slot = self.allocate()
+            instance.__dict__['_buffer_slot'] = slot
+        return slot
+
+    def allocate(self):
+        """Allocate a slot, reusing a freed one if possible, filled with the default values of all columns"""
+
+        if self.free:
+            slot = self.free.pop()
+            for name, (values, stamps) in self.columns.items():
+                default = self.defaults[name]
+                values[0][slot] = values[1][slot] = default
+                stamps[0][slot] = stamps[1][slot] = -1
+        else:
+            slot = self.size
+            self.size += 1
+            for name, (values, stamps) in self.columns.items():
+                default = self.defaults[name]
+                values[0].append(default)
+                values[1].append(default)
+                stamps[0].append(-1)
+                stamps[1].append(-1)
+        return slot
+
+    def add_column(self, name, default=None):
+        """Add a buffered attribute. Existing slots get the default value"""
+
+        if name in self.columns:
+            return
+        n = self.size
+        self.defaults[name] = default
+        self.columns[name] = ([[default] * n, [default] * n], [[-1] * n, [-1] * n])
+
+    def visible(self, stamps, slot):
+        """Return the index (0 or 1) of the buffer holding the value visible in the current generation"""
+
+        a = stamps[0][slot]
+        b = stamps[1][slot]
+        g = self.generation
+        if a <= g and (b > g or a >= b):
+            return 0
+        return 1
+
+    def read(self, instance, name):
+        """Return the value of a buffered attribute at the end of the previous tick"""
+
+        slot = self.slot(instance)
+        values, stamps = self.columns[name]
+        return values[self.visible(stamps, slot)][slot]
+
+    def pending(self, instance, name):
+        """Return the value of a buffered attribute as it will be in the next tick"""
+
+        slot = self.slot(instance)
+        values, stamps = self.columns[name]
+        v = self.visible(stamps, slot)
+        if stamps[1 - v][slot] == self.generation + 1:
+            return values[1 - v][slot]
+        return values[v][slot]
+
+    def write(self, instance, name, value):
+        """Set the value of a buffered attribute for the next tick"""
+
+        slot = self.slot(instance)
+        values, stamps = self.columns[name]
+        target = 1 - self.visible(stamps, slot)
+        values[target][slot] = value
+        stamps[target][slot] = self.generation + 1
+
+    def swap(self):
+        """Make all values written in this tick visible. O(1)"""
+
+        self.generation += 1
+
+    def column(self, name, instances):
+        """Return the visible values of a buffered attribute for a list of Agents or Groups"""
+
+        values, stamps = self.columns[name]
+        result = []
+        for instance in instances:
+            slot = self.slot(instance)
+            result.append(values[self.visible(stamps, slot)][slot])
+        return result
+
+    def detached(self):
+        """Return an empty BufferStore with the same attributes, defaults and generation, for a worker process"""
+
+        store = BufferStore()
+        store.generation = self.generation
+        for name, default in self.defaults.items():
+            store.add_column(name, default)
+        return store
+
+    def export(self, instance):
+        """
+
+        Return the buffered attributes of an Agent or Group, to copy them to another BufferStore with restore().
+
+        Returns:
+        :return (dict): 'attribute name:(visible value, pending value or None, whether a pending value was written)'
+            pairs (empty if the object has no slot)
+
+        """
+
+        slot = instance.__dict__.get('_buffer_slot')
+        if slot is None:
+            return {}
+        state = {}
+        next_generation = self.generation + 1
+        for name, (values, stamps) in self.columns.items():
+            v = self.visible(stamps, slot)
+            written = stamps[1 - v][slot] == next_generation
+            state[name] = (values[v][slot], values[1 - v][slot] if written else None, written)
+        return state
+
+    def restore(self, instance, state):
+        """Give an Agent or Group the buffered attributes exported by ABMTools.buffers.BufferStore.export()"""
+
+        instance.__dict__.pop('_buffer_slot', None)
+        slot = self.slot(instance)
+        for name, (value, pending, written) in state.items():
+            self.add_column(name)
+            values, stamps = self.columns[name]
+            values[0][slot] = values[1][slot] = value
+            stamps[0][slot] = stamps[1][slot] = -1
+            if written:
+                values[1][slot] = pending
+                stamps[1][slot] = self.generation + 1
+
+    def written(self, instance):
+        """Return the values written to the buffered attributes of an Agent or Group in the current tick"""
+
+        return {name: pending for name, (value, pending, written) in self.export(instance).items() if written}
+
+    def release(self, instance):
+        """Free the slot of an Agent or Group so it can be reused"""
+
+        slot = instance.__dict__.pop('_buffer_slot', None)
+        if slot is not None:
+            self.free.append(slot)
+
+    def agent_killed(self, agent, group):
+        self.release(agent)
+
+    def agent_hatched(self, agent, parent):
+        slot = parent.__dict__.get('_buffer_slot')
+        if slot is None:
+            return
+        new_slot = self.allocate()
+        agent.__dict__['_buffer_slot'] = new_slot
+        for name, (values, stamps) in self.columns.items():
+            values[0][new_slot] = values[1][new_slot] = values[self.visible(stamps, slot)][slot]
+            stamps[0][new_slot] = stamps[1][new_slot] = -1 if stamps[0][slot] < 0 else self.generation
+
+    def tick_ended(self):
+        self.swap()
+
+
+def store_of(instance):
+    """Return the BufferStore of an Agent's or Group's Controller, creating it if needed"""
+
+    controller = instance.controller
+    store = getattr(controller, 'buffers', None)
+    if store is None:
+        store = BufferStore(controller)
+        controller.buffers = store
+    return store
+
+
+class Buffered:
+    """
+
+    A double-buffered attribute for Agent or Group subclasses (opt-in). Declare it in the class body:
+
+        class Worker(abmtools.Agent):
+            effort = abmtools.Buffered(default=0)
+
+    Reading worker.effort returns the value at the end of the previous tick, assigning worker.effort sets the value
+    for the next tick (see ABMTools.buffers.BufferStore). Values are stored in the BufferStore of the object's
+    Controller, not in the object itself.
+
+    Args:
+    :param default=None: Value of the attribute before it is first assigned
+
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        store = store_of(instance)
+        if self.name not in store.columns:
+            store.add_column(self.name, self.default)
+        return store.read(instance, self.name)
+
+    def __set__(self, instance, value):
+        store = store_of(instance)
+        if self.name not in store.columns:
+            store.add_column(self.name, self.default)
+        store.write(instance, self.name, value)
@@ -1,6 +1,6 @@
 
 import collections
-from abmtools import agent, group
+from abmtools import agent, group, activation, rng, idents
 
 
 class Controller:
@@ -26,10 +26,18 @@ class Controller:
         variables whose values should be recorded in output at the start of the simulation. Keys are variable names,
         as strings, which should correspond to attributes of the Controller object. These are read by the Ticker
         at the start of the simulation.
+    :param reporter_updates=None (list of callables): Functions which bring reporter variables up to date. They are
+        called by the Ticker, without arguments, only on ticks at which reporter values are recorded (see
+        ABMTools.Controller.add_reporter_update()).
+    :param seed=None (int): Root seed of the Controller's random number streams, Controller.rng (see
+        ABMTools.rng.RNGManager). Drawn from the operating system if None
+    :param reuse_idents=False (bool): If True, idents of killed Agents and cleared Groups are given to new ones (see
+        ABMTools.idents.IdentAllocator)
 
     """
 
-    def __init__(self, agents=None, groups=None, reporters=None, setupvars=None):
+    def __init__(self, agents=None, groups=None, reporters=None, setupvars=None, reporter_updates=None, seed=None,
+                 reuse_idents=False):
 
         if agents is None:
             self.agents = []
@@ -47,9 +55,163 @@ class Controller:
             self.setupvars = collections.OrderedDict()
         else:
             self.setupvars = setupvars
+        if reporter_updates is None:
+            self.reporter_updates = []
+        else:
+            self.reporter_updates = reporter_updates
+        self.lazy_reporters = {}
+        self.schedulers = {}
+        self.components = []
+        self.rng = rng.RNGManager(seed)
+        self.agent_idents = idents.allocator_for(self.agents, reuse_idents)
+        self.group_idents = idents.allocator_for(self.groups, reuse_idents)
         self.n_agents = len(self.agents)
         self.n_groups = len(self.groups)
 
+    def ident_allocator(self, kind='agent'):
+        """
+
+        Return the allocator of Agent or Group idents of this Controller. Controllers pickled before allocators
+        existed get one which continues after their largest ident.
+
+        Args:
+        :param kind='agent' (string): 'agent' or 'group'
+
+        Returns:
+        :return (ABMTools.idents.IdentAllocator): The allocator
+
+        """
+
+        name = kind + '_idents'
+        allocator = self.__dict__.get(name)
+        if allocator is None:
+            allocator = idents.allocator_for(self.agents if kind == 'agent' else self.groups)
+            setattr(self, name, allocator)
+        return allocator
+
+    def add_reporter(self, name, func=None, label=None):
+        """
+
+        Add a reporter variable to this Controller's reporters.
+
+        Reporters are read by the Ticker only on ticks at which it records them, so a reporter which is expensive to
+        calculate should be a property of the Controller (subclass) or be added here with a function, instead of being
+        an attribute which the step function keeps up to date on every tick.
+
+        Args:
+        :param name (string): Name of the reporter. If func is None this must be the name of an attribute or property
+            of the Controller
+        :param func=None (callable): Function which is called with this Controller as its only argument to calculate
+            the reporter's value
+        :param label=None (string): Label of the reporter, stored as the value in the reporters dictionary
+
+        """
+
+        self.reporters[name] = label
+        if func is not None:
+            if getattr(self, 'lazy_reporters', None) is None:
+                self.lazy_reporters = {}
+            self.lazy_reporters[name] = func
+
+    def add_reporter_update(self, func):
+        """
+
+        Add a function which brings one or more reporter variables up to date (e.g. a method which calculates several
+        summary statistics in one pass and stores them as attributes). The Ticker calls these functions, without
+        arguments and in the order in which they were added, once before it reads the reporters on a recorded tick.
+
+        Args:
+        :param func (callable): Function to call before reporters are read
+
+        """
+
+        if getattr(self, 'reporter_updates', None) is None:
+            self.reporter_updates = []
+        self.reporter_updates.append(func)
+
+    def register(self, component):
+        """
+
+        Register a component which keeps state about this Controller's Agents (e.g. an event scheduler or a spatial
+        index) so that it is notified of changes to the population. Notifications are method calls on the component,
+        which only need to be defined for the notifications the component is interested in:
+            agent_killed(agent, group): agent was killed (group is the Group it was a member of, or None)
+            agent_hatched(agent, parent): agent was hatched from parent (see ABMTools.Agent.hatch())
+            agent_moved(agent, old_group, new_group): agent was moved between Groups by ABMTools.Controller.move(), or
+                taken out of its Group (new_group None) by ABMTools.Group.ungroup() or Controller.clear_groups()
+            group_resized(group): size of group was recounted by ABMTools.Group.update_size() (e.g. in census())
+            tick_ended(): a tick of ABMTools.Ticker or ABMTools.EventScheduler ended
+
+        Args:
+        :param component: Component to notify
+
+        """
+
+        if getattr(self, 'components', None) is None:
+            self.components = []
+        if component not in self.components:
+            self.components.append(component)
+
+    def unregister(self, component):
+        """Stop notifying a component registered with ABMTools.Controller.register()"""
+
+        self.components.remove(component)
+
+    def notify(self, event, *args):
+        """
+
+        Notify all registered components of an event, by calling their method named after the event (if they have
+        one) with the given arguments.
+
+        Args:
+        :param event (string): Name of the event (e.g. 'agent_killed')
+        :param args: Arguments to pass to the components' methods
+
+        """
+
+        for component in getattr(self, 'components', None) or ():
+            handler = getattr(component, event, None)
+            if handler is not None:
+                handler(*args)
+
+    def ask(self, method, order='sequential', agentlist='agents', *args, **kwargs):
+        """
+
+        Call a method on all Agents in one of this Controller's lists of Agents, using an activation scheduler from
+        ABMTools.activation. Schedulers are kept between calls, so e.g. the index list of a random order is reused.
+
+        Args:
+        :param method (string): Name of the method to call on every Agent
+        :param order='sequential' (string): Activation order: 'sequential' (list order), 'by_class' (class by class)
+            or 'random' (new random order every call)
+        :param agentlist='agents' (string): String name of the list of Agents to activate
+        :param args: Any non-keyword arguments to pass to the method
+        :param kwargs: Any keyword arguments to pass to the method
+
+        Returns:
+        :return (ABMTools.activation.Activation): The scheduler which was used (its rate() gives the throughput)
+
+        """
+
+        if getattr(self, 'schedulers', None) is None:
+            self.schedulers = {}
+        key = (method, order, agentlist)
+        scheduler = self.schedulers.get(key)
+        if scheduler is None:
+            if order == 'sequential':
+                scheduler = activation.SequentialActivation(self, method, agentlist)
+            elif order == 'by_class':
+                scheduler = activation.SequentialActivation(self, method, agentlist, by_class=True)
+            elif order == 'random':
+                scheduler = activation.RandomActivation(self, method, agentlist)
+            else:
+                raise ValueError("ABMTools: unknown activation order '{}'".format(order))
+            self.schedulers[key] = scheduler
+        scheduler.args = args
+        scheduler.kwargs = kwargs
+        scheduler()
+        return scheduler
+
     def update_counts(self):
         """Update counts of Agents and Groups controlled by this Controller"""
 
@@ -96,6 +258,13 @@ class Controller:
 
         """
 
+        if getattr(self, 'components', None):
+            for agent in getattr(self, agentlist):
+                self.notify('agent_killed', agent, agent.group)
+        allocator = self.ident_allocator('agent')
+        if allocator.reuse:
+            for agent in getattr(self, agentlist):
+                allocator.release(agent.ident)
         setattr(self, agentlist, [])
         self.update_counts()
 
@@ -147,13 +316,30 @@ class Controller:
 
         """
 
+        if getattr(self, 'components', None):
+            ungrouped = [(agent, agent.group) for agent in self.agents if agent.group is not None]
+        else:
+            ungrouped = []
         for agent in self.agents:
             agent.group = None
         for group in self.groups:
             group.members = []
             group.update_size()
+        allocator = self.ident_allocator('group')
+        if allocator.reuse:
+            for group in self.groups:
+                allocator.release(group.ident)
         self.groups = []
+        for agent, group in ungrouped:
+            self.notify('agent_moved', agent, group, None)
         if kill:
+            if getattr(self, 'components', None):
+                for agent in self.agents:
+                    self.notify('agent_killed', agent, None)
+            allocator = self.ident_allocator('agent')
+            if allocator.reuse:
+                for agent in self.agents:
+                    allocator.release(agent.ident)
             self.agents = []
         self.update_counts()
 
@@ -163,24 +349,28 @@ class Controller:
         self.clear_groups(*args, **kwargs)
 
     def clear_ties(self):
-        """NOT IMPLEMENTED YET"""
-        raise NotImplementedError("ABMTools: Ties are not yet implemented")
+        """Remove all ties of this Controller's Network (see ABMTools.tie.Network), if it has one"""
+
+        network = getattr(self, 'network', None)
+        if network is not None:
+            network.clear()
 
     def cl(self):
         """Shorthand for ABMTools.Controller.clear_ties()"""
         self.clear_ties()
 
     def clear_all(self):
-        """Shorthand for running both ABMTools.Controller.clear_groups and ABMTools.Controller.clear_agents()"""
+        """Shorthand for running ABMTools.Controller.clear_groups(), clear_ties() and clear_agents()"""
 
         self.clear_groups()
-        # self.clear_ties()
+        self.clear_ties()
         self.clear_agents()
 
     def kill(self, agent=None,  ident=None):
         """
 
-        Kill an Agent, by removing it from its Group and the Controller's Agent list.
+        Kill an Agent, by removing it from its Group and the Controller's Agent list. Updates the size of its Group
+        (unless the Group was never counted).
         Agent can be passed to the method either as an object or by its ident. At least one of these must be
         specified. If more than one are specified the object is used.
 
@@ -196,11 +386,16 @@ class Controller:
         elif agent is None and ident is None:
             raise TypeError("Too few arguments. At least one of agent= and ident= must be specified.")
 
-        if agent.group is not None:
-            agent.group.members.remove(agent)
+        group = agent.group
+        if group is not None:
+            group.members.remove(agent)
+            if group.size is not None:
+                group.decrement_size()
             agent.group = None
         self.agents.remove(agent)
         self.update_counts()
+        self.notify('agent_killed', agent, group)
+        self.ident_allocator('agent').release(agent.ident)
 
     def move(self, agent, target_group=None, target_group_ident=None):
         """
@@ -211,6 +406,10 @@ class Controller:
         Updates size of original and
         target group.
 
+        In a worker of a distributed simulation (see ABMTools.distributed.DistributedController), an agent moved to
+        the ident of a group in another partition leaves this Controller and joins its new group at the next tick
+        boundary.
+
         Args:
         :param agent: agent to be moved
         :param target_group: group object to move agent to
@@ -219,7 +418,14 @@ class Controller:
         """
         # Get target group from ident if only ident is given
         if target_group is None and target_group_ident is not None:
-            target_group = self.group(target_group_ident)
+            partition = getattr(self, 'partition', None)
+            if partition is not None:
+                if not partition.owns(target_group_ident):
+                    partition.emigrate(agent, target_group_ident)
+                    return
+                target_group = partition.local_group(target_group_ident)
+            else:
+                target_group = self.group(target_group_ident)
 
         # Remove from original group if agent was in one
         original_group = agent.group
@@ -234,6 +440,7 @@ class Controller:
             target_group.increment_size()
         else:
             agent.group = None
+        self.notify('agent_moved', agent, original_group, target_group)
 
     def agent(self, ident):
         """
@@ -0,0 +1,314 @@
+
+import collections
+import multiprocessing
+
+from abmtools import idents, rng
+
+def modulo(group_ident, n_partitions):
+    """Default assignment of Groups to partitions: by Group ident modulo the number of partitions"""
+
+    return group_ident % n_partitions
+
+
+class Partition:
+    """
+
+    The part of a distributed simulation held by one worker process (see ABMTools.distributed.DistributedController).
+    Registers itself with the worker's Controller as controller.partition, which makes ABMTools.Controller.move()
+    send Agents moving to a Group of another partition to this Partition's outbox instead. Outboxes are exchanged at
+    tick boundaries, after which the Agents arrive in their new Group.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): The worker's Controller, holding the Groups of this partition
+    :param index (int): Index of this partition
+    :param n_partitions (int): Total number of partitions
+    :param assign=modulo (callable): Function (group_ident, n_partitions) -> index of the partition owning the Group
+
+    """
+
+    def __init__(self, controller, index, n_partitions, assign=modulo):
+        self.controller = controller
+        self.index = index
+        self.n_partitions = n_partitions
+        self.assign = assign
+        self.outbox = collections.defaultdict(list)
+        self.emigrated = 0
+        self.immigrated = 0
+        self.groups = {}
+        controller.partition = self
+        controller.register(self)
+
+    def owner(self, group_ident):
+        """Return the index of the partition which owns a Group"""
+
+        return self.assign(group_ident, self.n_partitions)
+
+    def owns(self, group_ident):
+        """Return True if a Group belongs to this partition"""
+
+        return self.owner(group_ident) == self.index
+
+    def local_group(self, group_ident):
+        """Return the Group of this partition with the given ident"""
+
+        g = self.groups.get(group_ident)
+        if g is None:
+            self.groups = {g.ident: g for g in self.controller.groups}
+            g = self.groups[group_ident]
+        return g
+
+    def emigrate(self, emigrant, group_ident):
+        """
+
+        Remove an Agent from this partition and put it in the outbox, to join a Group of another partition at the
+        next tick boundary. Components of the Controller are notified as if the Agent was killed.
+
+        Args:
+        :param emigrant (ABMTools.Agent or subclass): Agent to move
+        :param group_ident (int): Ident of the Group to move the Agent to
+
+        """
+
+        c = self.controller
+        group = emigrant.group
+        if group is not None:
+            group.members.remove(emigrant)
+            group.decrement_size()
+            emigrant.group = None
+        c.agents.remove(emigrant)
+        c.update_counts()
+        c.notify('agent_killed', emigrant, group)
+        emigrant.controller = None
+        self.outbox[self.owner(group_ident)].append((group_ident, emigrant))
+        self.emigrated += 1
+
+    def take_outbox(self):
+        """Return and empty the outbox: a dict of partition index -> list of (group ident, Agent)"""
+
+        outbox = dict(self.outbox)
+        self.outbox.clear()
+        return outbox
+
+    def immigrate(self, messages):
+        """Add Agents sent by other partitions to their new Groups"""
+
+        c = self.controller
+        for group_ident, immigrant in messages:
+            immigrant.controller = c
+            c.agents.append(immigrant)
+            c.move(immigrant, self.local_group(group_ident))
+            c.notify('agent_arrived', immigrant)
+        c.update_counts()
+        self.immigrated += len(messages)
+
+
+def worker(setup, setup_kwargs, index, n_partitions, assign, connection, seed=None):
+    """
+
+    Main loop of a worker process. Builds the partition's Controller with setup(index, n_partitions, **setup_kwargs)
+    and then answers commands from the DistributedController until told to stop. With a seed, the global random
+    module is seeded and the Controller's rng replaced with the partition's stream of the seed. Agents and Groups
+    created in worker i get the idents i, i + n_partitions, i + 2 * n_partitions, ..., so idents are unique across
+    workers.
+
+    """
+
+    idents.layout = (index, n_partitions)
+    partition_rng = None
+    if seed is not None:
+        partition_rng = rng.RNGManager(seed).partition(index)
+        partition_rng.seed_global()
+    c = setup(index, n_partitions, **setup_kwargs)
+    if partition_rng is not None:
+        c.rng = partition_rng
+    partition = Partition(c, index, n_partitions, assign)
+    while True:
+        command, args = connection.recv()
+        if command == 'stop':
+            break
+        elif command == 'step':
+            func, func_args = args
+            func(c, *func_args)
+            connection.send(partition.take_outbox())
+        elif command == 'deliver':
+            partition.immigrate(args)
+            connection.send(len(args))
+        elif command == 'call':
+            func, func_args = args
+            connection.send(func(c, *func_args))
+    connection.close()
+
+
+class PipeTransport:
+    """
+
+    Transport between a DistributedController and its workers over multiprocessing pipes. This class is meant to be
+    replaced with other transports (e.g. sockets) implementing connect(), which returns a pair of connected endpoints
+    with send(obj) and recv() methods; the second endpoint is passed to the worker process.
+
+    """
+
+    def connect(self):
+        return multiprocessing.Pipe()
+
+
+class DistributedController:
+    """
+
+    A simulation distributed over worker processes by domain decomposition: Groups are partitioned across workers,
+    every worker holds a Controller with the Groups of its partition and their members, and steps only those.
+
+    Moving an Agent with ABMTools.Controller.move(agent, target_group_ident=...) to a Group of another partition
+    becomes a migration message. Messages are batched per destination and exchanged at the end of every step, so
+    migrants arrive in their new Group before the next step.
+
+    Reporters are computed by reduction: every worker computes a partial value from its own Controller, and the
+    partial values are combined with a reduce function. The DistributedController can be used as the Controller of an
+    ABMTools.Ticker, with its step() as the Ticker's step function.
+
+    Functions sent to the workers (setup, step functions and reporters) must be picklable, i.e. defined at module
+    level.
+
+    Args:
+    :param setup (callable): Function (index, n_partitions, **setup_kwargs) returning the Controller of one partition,
+        with the Groups assigned to that partition (see assign)
+    :param n_workers=2 (int): Number of worker processes (partitions)
+    :param transport=None: Transport between this process and the workers (ABMTools.distributed.PipeTransport if None)
+    :param assign=modulo (callable): Function (group_ident, n_partitions) -> index of the partition owning the Group
+    :param context=None (string): multiprocessing start method (the default if None)
+    :param seed=None (int): Root seed. Every partition gets an independent stream derived from it (see
+        ABMTools.rng.RNGManager.partition()). If None, workers are not seeded
+    :param setup_kwargs: Keyword arguments to pass to setup
+
+    """
+
+    def __init__(self, setup, n_workers=2, transport=None, assign=modulo, context=None, seed=None, **setup_kwargs):
+        self.setup = setup
+        self.n_workers = n_workers
+        self.transport = transport if transport is not None else PipeTransport()
+        self.assign = assign
+        self.context = context
+        self.seed = seed
+        self.setup_kwargs = setup_kwargs
+        self.connections = []
+        self.processes = []
+        self.reporters = collections.OrderedDict()
+        self.reductions = {}
+        self.setupvars = collections.OrderedDict()
+        self.reporter_updates = [self.update_reporters]
+        self.migrations = 0
+
+    def start(self):
+        """Start the worker processes"""
+
+        context = multiprocessing.get_context(self.context)
+        for index in range(self.n_workers):
+            parent, child = self.transport.connect()
+            process = context.Process(target=worker, args=(self.setup, self.setup_kwargs, index, self.n_workers,
+                                                           self.assign, child, self.seed), daemon=True)
+            process.start()
+            self.connections.append(parent)
+            self.processes.append(process)
+        return self
+
+    def broadcast(self, command, args):
+        """Send a command to all workers and return their replies, in order of partition"""
+
+        for connection in self.connections:
+            connection.send((command, args))
+        return [connection.recv() for connection in self.connections]
+
+    def step(self, func, *args):
+        """
+
+        Run a step function on every partition's Controller, then exchange migration messages.
+
+        Args:
+        :param func (callable): Function (controller, *args) to run on every worker
+        :param args: Any non-keyword arguments to pass to func
+
+        Returns:
+        :return (int): Number of Agents which migrated between partitions
+
+        """
+
+        outboxes = self.broadcast('step', (func, args))
+        inboxes = [[] for _ in range(self.n_workers)]
+        for outbox in outboxes:
+            for index, messages in outbox.items():
+                inboxes[index].extend(messages)
+        for connection, inbox in zip(self.connections, inboxes):
+            connection.send(('deliver', inbox))
+        migrated = sum(connection.recv() for connection in self.connections)
+        self.migrations += migrated
+        return migrated
+
+    def call(self, func, *args):
+        """Run a function (controller, *args) on every partition's Controller and return the results as a list"""
+
+        return self.broadcast('call', (func, args))
+
+    def reduce(self, local, reduce=sum):
+        """Compute a value from every partition with local(controller) and combine the values with reduce(list)"""
+
+        return reduce(self.call(local))
+
+    def add_reporter(self, name, local, reduce=sum, label=None):
+        """
+
+        Add a reporter computed by reduction. Its value is stored as an attribute of this DistributedController before
+        every report of a Ticker.
+
+        Args:
+        :param name (string): Name of the reporter (and of the attribute holding its value)
+        :param local (callable): Function (controller) returning the partial value of one partition
+        :param reduce=sum (callable): Function combining the list of partial values into the reporter's value
+        :param label=None (string): Label of the reporter in output files (defaults to name)
+
+        """
+
+        self.reporters[name] = label if label is not None else name
+        self.reductions[name] = (local, reduce)
+        setattr(self, name, None)
+
+    def update_reporters(self):
+        """Compute all reporters with a single round trip to the workers"""
+
+        if not self.reductions:
+            return
+        names = list(self.reductions)
+        partials = self.call(gather, [self.reductions[name][0] for name in names])
+        for i, name in enumerate(names):
+            setattr(self, name, self.reductions[name][1]([p[i] for p in partials]))
+
+    def close(self):
+        """Stop the worker processes"""
+
+        for connection in self.connections:
+            connection.send(('stop', None))
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        if not self.processes:
+            self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def gather(controller, funcs):
+    """Return the values of several functions of a Controller (used to compute all reporters at once)"""
+
+    return [func(controller) for func in funcs]
+
+
+def mean(partials):
+    """Reduce function for means: combines partial (sum, count) tuples into a mean (None if the count is zero)"""
+
+    total = sum(p[0] for p in partials)
+    count = sum(p[1] for p in partials)
+    return total / count if count else None
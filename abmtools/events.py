@@ -0,0 +1,234 @@
+
+import heapq
+import itertools
+
+
+class Event:
+    """
+
+    A scheduled event: a function to call at a given time. Returned by ABMTools.events.EventScheduler.schedule() and
+    used to cancel the event.
+
+    Args:
+    :param time (float): Time at which the event happens
+    :param func (callable): Function to call
+    :param args (tuple): Non-keyword arguments to pass to func
+    :param kwargs (dict): Keyword arguments to pass to func
+    :param owner=None: Agent or Group the event belongs to (its events are cancelled when it is killed)
+    :param interval=None (float): If given, the event repeats every interval time units until it is cancelled
+
+    """
+
+    __slots__ = ('time', 'func', 'args', 'kwargs', 'owner', 'interval', 'cancelled')
+
+    def __init__(self, time, func, args, kwargs, owner=None, interval=None):
+        self.time = time
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.owner = owner
+        self.interval = interval
+        self.cancelled = False
+
+    def __str__(self):
+        return "Type = Event, Time = {}, Function = {}, Owner = {}".format(self.time, getattr(self.func, '__name__',
+                                                                                             self.func), self.owner)
+
+
+class EventScheduler:
+    """
+
+    A discrete-event scheduler. Instead of visiting every Agent on every tick, Agents and Groups schedule callbacks at
+    the (future) times at which they need to act, and the scheduler jumps from event to event in time order. Events
+    are kept in a binary heap, so scheduling and processing an event cost O(log n) for n pending events.
+
+    Events can be cancelled. When the scheduler is attached to a Controller, all events owned by an Agent are
+    cancelled when the Controller kills it. Cancelled events are removed lazily from the heap.
+
+    The scheduler can drive an ABMTools.Ticker: when run() is given a Ticker, every tick which ends while events are
+    processed is observed by the Ticker (and recorded according to its interval or schedule), as if the Ticker had
+    stepped through it. Tick T covers the times T <= time < T + 1.
+
+    Args:
+    :param controller=None (ABMTools.Controller or subclass): Controller to attach to. The scheduler registers itself
+        with the Controller and is available as controller.events
+    :param start=0 (float): Time at which the simulation starts
+
+    """
+
+    def __init__(self, controller=None, start=0):
+        self.now = start
+        self.heap = []
+        self.counter = itertools.count()
+        self.owned = {}
+        self.n_cancelled = 0
+        self.processed = 0
+        self.controller = controller
+        if controller is not None:
+            controller.register(self)
+            controller.events = self
+
+    def __len__(self):
+        return len(self.heap) - self.n_cancelled
+
+    def schedule(self, time, func, *args, owner=None, priority=0, interval=None, **kwargs):
+        """
+
+        Schedule a function to be called at an absolute time.
+
+        Args:
+        :param time (float): Time at which to call the function (must not be in the past)
+        :param func (callable): Function to call (e.g. a bound method of an Agent)
+        :param args: Any non-keyword arguments to pass to the function
+        :param owner=None: Agent or Group the event belongs to. Events owned by an Agent are cancelled when the Agent
+            is killed through the Controller
+        :param priority=0 (int): Events at the same time are processed in order of priority (lowest first), then in
+            the order in which they were scheduled
+        :param interval=None (float): If given, the event repeats every interval time units until it is cancelled
+        :param kwargs: Any keyword arguments to pass to the function
+
+        Returns:
+        :return (ABMTools.events.Event): The scheduled event (pass it to cancel() to cancel it)
+
+        """
+
+        if time < self.now:
+            raise ValueError("ABMTools: cannot schedule an event at time {} before the current time {}".format(
+                time, self.now))
+        event = Event(time, func, args, kwargs, owner, interval)
+        self.push(event, priority)
+        if owner is not None:
+            self.owned.setdefault(owner, set()).add(event)
+        return event
+
+    def schedule_in(self, delay, func, *args, **kwargs):
+        """Schedule a function to be called delay time units from now. Takes the same arguments as schedule()"""
+
+        return self.schedule(self.now + delay, func, *args, **kwargs)
+
+    def push(self, event, priority=0):
+        heapq.heappush(self.heap, (event.time, priority, next(self.counter), event))
+
+    def cancel(self, event):
+        """
+
+        Cancel a scheduled event. Cancelling an event which already happened (or was cancelled) does nothing.
+
+        Args:
+        :param event (ABMTools.events.Event): Event to cancel
+
+        """
+
+        if event.cancelled:
+            return
+        event.cancelled = True
+        self.n_cancelled += 1
+        self.disown(event)
+        if self.n_cancelled > 64 and self.n_cancelled > len(self.heap) // 2:
+            self.heap = [entry for entry in self.heap if not entry[3].cancelled]
+            heapq.heapify(self.heap)
+            self.n_cancelled = 0
+
+    def disown(self, event):
+        if event.owner is not None:
+            events = self.owned.get(event.owner)
+            if events is not None:
+                events.discard(event)
+                if not events:
+                    del self.owned[event.owner]
+
+    def cancel_owner(self, owner):
+        """
+
+        Cancel all scheduled events owned by an Agent or Group.
+
+        Args:
+        :param owner: Owner whose events should be cancelled
+
+        """
+
+        for event in list(self.owned.get(owner, ())):
+            self.cancel(event)
+
+    def agent_killed(self, agent, group):
+        """Cancel the events of an Agent killed by the Controller (called by ABMTools.Controller.notify())"""
+
+        if agent in self.owned:
+            self.cancel_owner(agent)
+
+    def events_of(self, owner):
+        """Return the pending events owned by an Agent or Group"""
+
+        return set(self.owned.get(owner, ()))
+
+    def next_time(self):
+        """Return the time of the next pending event, or None if there are no pending events"""
+
+        while self.heap and self.heap[0][3].cancelled:
+            heapq.heappop(self.heap)
+            self.n_cancelled -= 1
+        return self.heap[0][0] if self.heap else None
+
+    def step(self):
+        """
+
+        Process the next pending event: advance the current time to its time and call its function.
+
+        Returns:
+        :return (ABMTools.events.Event): The processed event, or None if there were no pending events
+
+        """
+
+        if self.next_time() is None:
+            return None
+        time, priority, seq, event = heapq.heappop(self.heap)
+        self.now = time
+        if event.interval is not None:
+            event.time = time + event.interval
+            self.push(event, priority)
+        else:
+            event.cancelled = True
+            self.disown(event)
+        event.func(*event.args, **event.kwargs)
+        self.processed += 1
+        return event
+
+    def observe_until(self, time, ticker, write=True):
+        """Let a Ticker observe every tick which ended before the given time, notifying the Controller of each"""
+
+        while ticker.ticks + 1 <= time:
+            if self.controller is not None:
+                self.controller.notify('tick_ended')
+            ticker.observe(write)
+            ticker.ticks += 1
+
+    def run(self, until=None, ticker=None, write=True):
+        """
+
+        Process events in time order until there are none left or the next event is later than until.
+
+        Args:
+        :param until=None (float): Process events up to and including this time. Afterwards the current time is
+            until. If None, process all events (events which repeat forever then never let the run end)
+        :param ticker=None (ABMTools.Ticker): Ticker to record reporter values. Every tick which ends during the run
+            is observed by the Ticker (see ABMTools.Ticker.observe()), with the state after all events of that tick
+        :param write=True (bool): Passed on to ABMTools.Ticker.observe()
+
+        Returns:
+        :return (int): Number of events processed
+
+        """
+
+        processed = self.processed
+        while True:
+            time = self.next_time()
+            if time is None or (until is not None and time > until):
+                break
+            if ticker is not None:
+                self.observe_until(time, ticker, write)
+            self.step()
+        if until is not None:
+            self.now = max(self.now, until)
+        if ticker is not None:
+            self.observe_until(self.now, ticker, write)
+        return self.processed - processed
@@ -1,5 +1,98 @@
 
-import copy
+import heapq
+import operator
+
+from abmtools import views
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Smallest n for which max_n_of() and min_n_of() select with numpy.argpartition() rather than a heap of n Agents
+PARTITION_MIN_N = 1000
+
+
+def key_function(var):
+    """
+
+    Return a function of an instance which gives the value(s) to compare instances by.
+
+    Args:
+    :param var (string, list of strings or callable): Name of a variable, names of several variables (compared in
+        order, the first name deciding unless values are equal) or a function of an instance
+
+    Returns:
+    :return (callable): Function of an instance returning its value (a tuple of values for several variables)
+
+    """
+
+    if callable(var):
+        return var
+    if isinstance(var, str):
+        return operator.attrgetter(var)
+    return operator.attrgetter(*var)
+
+
+def partition_order(values, n, largest=True):
+    """
+
+    Return the positions of the n highest (or lowest) values in a numpy array, ordered from the highest (lowest)
+    value, positions with equal values in increasing order. Selects the n values with numpy.argpartition() in O(N)
+    and only sorts those n.
+
+    Args:
+    :param values (numpy.ndarray): One-dimensional array of numbers
+    :param n (int): Number of positions to return
+    :param largest=True (bool): If True return the positions of the highest values, else of the lowest
+
+    Returns:
+    :return (numpy.ndarray): Positions of the n values
+
+    """
+
+    kth = len(values) - n if largest else n - 1
+    threshold = values[numpy.argpartition(values, kth)[kth]]
+    beyond = numpy.flatnonzero(values > threshold if largest else values < threshold)
+    # Of the values equal to the n-th value only the first ones are needed
+    ties = numpy.flatnonzero(values == threshold)[:n - len(beyond)]
+    chosen = numpy.sort(numpy.concatenate([beyond, ties]))
+    if not largest:
+        return chosen[numpy.argsort(values[chosen], kind='stable')]
+    # A stable sort of the reversed positions, reversed, orders by decreasing value and increasing position
+    chosen = chosen[::-1]
+    return chosen[numpy.argsort(values[chosen], kind='stable')][::-1]
+
+
+def _n_of(agentset, var, n, largest):
+    if n > len(agentset):
+        raise ValueError('Requested n is larger than length of agentset')
+    key = key_function(var)
+    if numpy is not None and n >= PARTITION_MIN_N:
+        values = numpy.asarray(list(map(key, agentset)))
+        if values.ndim == 1 and values.dtype.kind in 'biuf' and not (values.dtype.kind == 'f' and
+                                                                      numpy.isnan(values).any()):
+            return [agentset[i] for i in partition_order(values, n, largest).tolist()]
+    # heapq.nlargest() and nsmallest() keep Agents with equal values in the order of agentset
+    if largest:
+        return heapq.nlargest(n, agentset, key=key)
+    return heapq.nsmallest(n, agentset, key=key)
+
+
+def _with_extreme(agentset, var, largest):
+    key = key_function(var)
+    extreme = None
+    found = []
+    for agent in agentset:
+        value = key(agent)
+        if not found or (value > extreme if largest else value < extreme):
+            extreme = value
+            found = [agent]
+        elif value == extreme:
+            found.append(agent)
+    if not found:
+        raise ValueError('agentset is empty')
+    return found
 
 
 def max_one_of(agentset, var):
@@ -10,16 +103,15 @@ def max_one_of(agentset, var):
 
     Args:
     :param agentset (list of ABMTools.Agent or subclass): List of Agents within which to search
-    :param var (string): Name of the variable to maximize
+    :param var (string, list of strings or callable): Name of the variable to maximize, names of several variables
+        (later ones break ties on earlier ones) or a function of an Agent giving the value to maximize
 
     Returns:
     :return (ABMTools.Agent or subclass): Agent with the highest value on the specified variable
 
     """
 
-    maxval = max([getattr(agent, var) for agent in agentset])
-
-    return next(agent for agent in agentset if getattr(agent, var) == maxval)
+    return max(agentset, key=key_function(var))
 
 
 def max_n_of(agentset, var, n):
@@ -29,9 +121,13 @@ def max_n_of(agentset, var, n):
     such Agents if there are more which share the maximum value. Returns Agents with second-highest value and so on
     if less than N Agents share the maximum value
 
+    Selects the Agents in one pass, with a heap of N Agents (O(len(agentset) log N)), or for large N and numeric
+    values with numpy.argpartition() (O(len(agentset) + N log N)).
+
     Args:
     :param agentset (list of ABMTools.Agent or subclass): List of Agents within which to search
-    :param var (string): Name of the variable to maximize
+    :param var (string, list of strings or callable): Name of the variable to maximize, names of several variables
+        (later ones break ties on earlier ones) or a function of an Agent giving the value to maximize
     :param n (int): Number of Agents to return
 
     Returns:
@@ -40,16 +136,7 @@ def max_n_of(agentset, var, n):
 
     """
 
-    if n > len(agentset):
-        raise ValueError('Requested n is larger than length of agentset')
-    maxval = max([getattr(agent, var) for agent in agentset])
-    agentswithmax = [agent for agent in agentset if getattr(agent, var) == maxval]
-    if len(agentswithmax) >= n:
-        return agentswithmax[:n]
-    else:
-        filler = max_n_of([agent for agent in agentset if getattr(agent, var) < maxval], var, (n - len(agentswithmax)))
-
-    return agentswithmax + filler
+    return _n_of(agentset, var, n, largest=True)
 
 
 def with_max(agentset, var):
@@ -59,16 +146,15 @@ def with_max(agentset, var):
 
     Args:
     :param agentset (list of ABMTools.Agent or subclass): List of Agents within which to search
-    :param var (string): Name of the variable to maximize
+    :param var (string, list of strings or callable): Name of the variable to maximize, names of several variables
+        (later ones break ties on earlier ones) or a function of an Agent giving the value to maximize
 
     Returns:
     :return (list of ABMTools.Agent or subclass): List of all Agents with the highest value on the specified variable
 
     """
 
-    maxval = max([getattr(agent, var) for agent in agentset])
-
-    return [agent for agent in agentset if getattr(agent, var) == maxval]
+    return _with_extreme(agentset, var, largest=True)
 
 
 def min_one_of(agentset, var):
@@ -79,16 +165,15 @@ def min_one_of(agentset, var):
 
     Args:
     :param agentset (list of ABMTools.Agent or subclass): List of Agents within which to search
-    :param var (string): Name of the variable to minimize
+    :param var (string, list of strings or callable): Name of the variable to minimize, names of several variables
+        (later ones break ties on earlier ones) or a function of an Agent giving the value to minimize
 
     Returns:
     :return (ABMTools.Agent or subclass): Agent with the lowest value on the specified variable
 
     """
 
-    minval = min([getattr(agent, var) for agent in agentset])
-
-    return next(agent for agent in agentset if getattr(agent, var) == minval)
+    return min(agentset, key=key_function(var))
 
 
 def min_n_of(agentset, var, n):
@@ -98,9 +183,13 @@ def min_n_of(agentset, var, n):
     such Agents if there are more which share the minimum value. Returns Agents with second-lowest value and so on
     if less than N Agents share the minimum value
 
+    Selects the Agents in one pass, with a heap of N Agents (O(len(agentset) log N)), or for large N and numeric
+    values with numpy.argpartition() (O(len(agentset) + N log N)).
+
     Args:
     :param agentset (list of ABMTools.Agent or subclass): List of Agents within which to search
-    :param var (string): Name of the variable to minimize
+    :param var (string, list of strings or callable): Name of the variable to minimize, names of several variables
+        (later ones break ties on earlier ones) or a function of an Agent giving the value to minimize
     :param n (int): Number of Agents to return
 
     Returns:
@@ -109,16 +198,7 @@ def min_n_of(agentset, var, n):
 
     """
 
-    if n > len(agentset):
-        raise ValueError('Requested n is larger than length of agentset')
-    minval = min([getattr(agent, var) for agent in agentset])
-    agentswithmin = [agent for agent in agentset if getattr(agent, var) == minval]
-    if len(agentswithmin) >= n:
-        return agentswithmin[:n]
-    else:
-        filler = min_n_of([agent for agent in agentset if getattr(agent, var) > minval], var, (n - len(agentswithmin)))
-
-    return agentswithmin + filler
+    return _n_of(agentset, var, n, largest=False)
 
 
 def with_min(agentset, var):
@@ -128,16 +208,15 @@ def with_min(agentset, var):
 
     Args:
     :param agentset (list of ABMTools.Agent or subclass): List of Agents within which to search
-    :param var (string): Name of the variable to minimize
+    :param var (string, list of strings or callable): Name of the variable to minimize, names of several variables
+        (later ones break ties on earlier ones) or a function of an Agent giving the value to minimize
 
     Returns:
     :return (list of ABMTools.Agent or subclass): List of all Agents with the lowest value on the specified variable
 
     """
 
-    minval = min([getattr(agent, var) for agent in agentset])
-
-    return [agent for agent in agentset if getattr(agent, var) == minval]
+    return _with_extreme(agentset, var, largest=False)
 
 
 def other(instance, instanceset):
@@ -150,16 +229,14 @@ def other(instance, instanceset):
     :param instanceset: List of instances
 
     Returns:
-    :return: The same list of instances, minus the one specified to be removed. To prevent accidentally removing
-        instances from lists which were not intended to be modified the list returned is actually a copy of the
-        input list. The input list is not modified.
+    :return (ABMTools.views.Excluding): View of the list of instances, minus the one specified to be removed. The
+        input list is neither copied nor modified; the view supports len(), iteration, indexing and random.choice()
+        in O(1) per element. Use list() on the result for a list which can be modified. Raises ValueError if the
+        instance is not in the list
 
     """
 
-    new_instanceset = copy.copy(instanceset)
-    new_instanceset.remove(instance)
-
-    return instanceset
+    return views.Excluding(instanceset, instance)
 
 
 def compile_typeset(individuals=None, iterables=None, instancetype=None):
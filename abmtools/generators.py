@@ -0,0 +1,361 @@
+
+import math
+
+from abmtools import world
+from abmtools.rng import RNGManager
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("ABMTools: network generators require numpy, which could not be imported")
+
+
+def _generator(network, rng, name):
+    """Return the numpy Generator to draw from: rng (an RNGManager or numpy Generator), else the Controller's"""
+
+    if rng is None:
+        controller = network.controller
+        rng = getattr(controller, 'rng', None) if controller is not None else None
+        if rng is None:
+            rng = RNGManager()
+    if isinstance(rng, RNGManager):
+        return rng.generator('network', name)
+    return rng
+
+
+def _agents(network, agents):
+    if agents is None:
+        if network.controller is None:
+            raise ValueError("ABMTools: give the agents to connect, or a Network registered with a Controller")
+        agents = network.controller.agents
+    agents = list(agents)
+    return agents, numpy.fromiter((a.ident for a in agents), dtype=numpy.int64, count=len(agents))
+
+
+def skip_sample(total, p, generator):
+    """
+
+    Return the positions in range(total) chosen independently with probability p, in increasing order, in time
+    proportional to the number chosen. The gaps between chosen positions are geometric, so they are drawn in batches
+    instead of drawing one number per position.
+
+    Args:
+    :param total (int): Number of positions
+    :param p (float): Probability of choosing a position
+    :param generator (numpy.random.Generator): Source of random numbers
+
+    Returns:
+    :return (numpy.ndarray): Chosen positions
+
+    """
+
+    if total <= 0 or p <= 0:
+        return numpy.zeros(0, dtype=numpy.int64)
+    if p >= 1:
+        return numpy.arange(total, dtype=numpy.int64)
+    batch = int(total * p + 4 * math.sqrt(total * p) + 16)
+    chunks = []
+    position = -1
+    while True:
+        chunk = position + numpy.cumsum(generator.geometric(p, batch))
+        chunks.append(chunk)
+        if chunk[-1] >= total:
+            break
+        position = int(chunk[-1])
+        batch = max(batch // 4, 16)
+    result = numpy.concatenate(chunks)
+    return result[:numpy.searchsorted(result, total)]
+
+
+def pair_positions(positions):
+    """Turn positions in the list of pairs (i, j), i > j, ordered by i then j, into the arrays of i and of j"""
+
+    i = ((1 + numpy.sqrt(1 + 8 * positions.astype(numpy.float64))) // 2).astype(numpy.int64)
+    # Correct the rounding of the square root for large positions
+    i -= (i * (i - 1) // 2 > positions)
+    i += ((i + 1) * i // 2 <= positions)
+    return i, positions - i * (i - 1) // 2
+
+
+def erdos_renyi(network, p, agents=None, rng=None):
+    """
+
+    Add a G(n, p) random network: every pair of agents is tied with probability p. For directed networks both
+    directions are drawn separately. Runs in O(agents + ties).
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to add the ties to
+    :param p (float): Probability of a tie
+    :param agents=None (list of ABMTools.Agent or subclass): Agents to connect. Defaults to all agents of the
+        Network's Controller
+    :param rng=None (ABMTools.RNGManager or numpy.random.Generator): Source of random numbers. Defaults to the
+        Controller's RNGManager
+
+    Returns:
+    :return (range): Indices of the new ties
+
+    """
+
+    _require_numpy()
+    agents, idents = _agents(network, agents)
+    generator = _generator(network, rng, 'erdos_renyi')
+    n = len(idents)
+    if network.directed:
+        positions = skip_sample(n * (n - 1), p, generator)
+        i, j = numpy.divmod(positions, max(n - 1, 1))
+        j += (j >= i)
+    else:
+        i, j = pair_positions(skip_sample(n * (n - 1) // 2, p, generator))
+    return network.add_edges(idents[i], idents[j], agents)
+
+
+def lattice(network, width, height=1, agents=None, kind='von_neumann', radius=1, torus=True):
+    """
+
+    Add a lattice: agents are laid out row by row on a width x height grid and tied to the agents in their
+    neighborhood (see ABMTools.world.offsets()). A height of 1 gives a ring (or a line if torus is False) in which
+    every agent is tied to the agents up to radius places away.
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to add the ties to
+    :param width (int): Width of the grid
+    :param height=1 (int): Height of the grid
+    :param agents=None (list of ABMTools.Agent or subclass): width * height Agents. Defaults to all agents of the
+        Network's Controller
+    :param kind='von_neumann' (string): 'von_neumann', 'moore' or 'radius'
+    :param radius=1 (int): Size of the neighborhood
+    :param torus=True (bool): If True, the grid wraps around at its edges
+
+    Returns:
+    :return (range): Indices of the new ties
+
+    """
+
+    _require_numpy()
+    agents, idents = _agents(network, agents)
+    if len(idents) != width * height:
+        raise ValueError("ABMTools: a {}x{} lattice needs {} agents, not {}".format(width, height, width * height,
+                                                                                  len(idents)))
+    x, y = numpy.divmod(numpy.arange(width * height, dtype=numpy.int64), height)
+    sources, targets = [], []
+    for dx, dy in world.offsets(kind, radius):
+        # Every tie once: only offsets pointing forward (both directions for directed networks)
+        if not network.directed and (dx, dy) < (0, 0):
+            continue
+        nx, ny = x + dx, y + dy
+        if torus:
+            nx, ny, keep = nx % width, ny % height, slice(None)
+        else:
+            keep = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+        sources.append((x * height + y)[keep])
+        targets.append((nx * height + ny)[keep])
+    sources = numpy.concatenate(sources)
+    targets = numpy.concatenate(targets)
+    # On small tori different offsets can reach the same cell; keep one tie per pair and no self ties
+    a, b = (sources, targets) if network.directed else (numpy.minimum(sources, targets),
+                                                        numpy.maximum(sources, targets))
+    first = numpy.unique(a * (width * height) + b, return_index=True)[1]
+    first = numpy.sort(first[a[first] != b[first]])
+    return network.add_edges(idents[sources[first]], idents[targets[first]], agents)
+
+
+def _first_occurrences(keys):
+    """Return a mask which is True for the first occurrence of every value in keys"""
+
+    mask = numpy.zeros(len(keys), dtype=bool)
+    mask[numpy.unique(keys, return_index=True)[1]] = True
+    return mask
+
+
+def watts_strogatz(network, k, p, agents=None, rng=None):
+    """
+
+    Add a Watts-Strogatz small world: a ring in which every agent is tied to its k nearest agents (k // 2 on each
+    side), after which every tie is rewired to a random agent with probability p, avoiding self ties and repeated
+    ties. Runs in O(agents * k).
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to add the ties to
+    :param k (int): Number of neighbors of every agent in the ring (even)
+    :param p (float): Probability of rewiring a tie
+    :param agents=None (list of ABMTools.Agent or subclass): Agents to connect. Defaults to all agents of the
+        Network's Controller
+    :param rng=None (ABMTools.RNGManager or numpy.random.Generator): Source of random numbers. Defaults to the
+        Controller's RNGManager
+
+    Returns:
+    :return (range): Indices of the new ties
+
+    """
+
+    _require_numpy()
+    agents, idents = _agents(network, agents)
+    generator = _generator(network, rng, 'watts_strogatz')
+    n = len(idents)
+    if k >= n:
+        raise ValueError("ABMTools: a Watts-Strogatz network needs k < number of agents")
+    half = k // 2
+    sources = numpy.repeat(numpy.arange(n, dtype=numpy.int64), half)
+    targets = (sources + numpy.tile(numpy.arange(1, half + 1, dtype=numpy.int64), n)) % n
+    rewire = generator.random(len(sources)) < p
+    # Ties which are not rewired come first, so a repeated tie is always a rewired one and can be drawn again
+    order = numpy.argsort(rewire, kind='stable')
+    sources, targets, rewire = sources[order], targets[order], rewire[order]
+    redraw = rewire
+    while True:
+        targets[redraw] = generator.integers(0, n, int(redraw.sum()))
+        keys = numpy.minimum(sources, targets) * n + numpy.maximum(sources, targets)
+        redraw = (sources == targets) | ~_first_occurrences(keys)
+        if not redraw.any():
+            break
+    order = numpy.argsort(order, kind='stable')
+    return network.add_edges(idents[sources[order]], idents[targets[order]], agents)
+
+
+def _resolve(ties, picks, sources, targets, m):
+    """Set the targets of ties from their picks of tie ends, following picks of targets back to a known end"""
+
+    end = picks[ties]
+    pending = numpy.arange(len(ties))
+    while len(pending):
+        tie, is_target = numpy.divmod(end[pending], 2)
+        done = (is_target == 0) | (tie < m)
+        targets[ties[pending[done]]] = numpy.where(is_target[done] == 0, sources[tie[done]], targets[tie[done]])
+        pending = pending[~done]
+        end[pending] = picks[tie[~done]]
+
+
+def barabasi_albert(network, m, agents=None, rng=None):
+    """
+
+    Add a Barabasi-Albert scale free network: agents arrive one at a time and tie themselves to m earlier agents,
+    chosen with probability proportional to their number of ties. The first m + 1 agents start as a star around
+    agent m. Directed ties point from the newer to the older agent.
+
+    Every tie is drawn at once (Batagelj and Brandes): the list of tie ends is implicit, and a new tie picks a random
+    earlier tie end, which is either a known source or the target of an earlier tie, resolved by following the picks
+    back with array operations. Repeated ties are drawn again. Runs in O(agents * m).
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to add the ties to
+    :param m (int): Number of ties of every new agent
+    :param agents=None (list of ABMTools.Agent or subclass): Agents to connect, in order of arrival. Defaults to all
+        agents of the Network's Controller
+    :param rng=None (ABMTools.RNGManager or numpy.random.Generator): Source of random numbers. Defaults to the
+        Controller's RNGManager
+
+    Returns:
+    :return (range): Indices of the new ties
+
+    """
+
+    _require_numpy()
+    agents, idents = _agents(network, agents)
+    generator = _generator(network, rng, 'barabasi_albert')
+    n = len(idents)
+    if not 1 <= m < n:
+        raise ValueError("ABMTools: a Barabasi-Albert network needs 1 <= m < number of agents")
+    n_ties = m + (n - m - 1) * m
+    sources = numpy.empty(n_ties, dtype=numpy.int64)
+    sources[:m] = m
+    sources[m:] = numpy.repeat(numpy.arange(m + 1, n, dtype=numpy.int64), m)
+    # Tie t of agent v may pick any of the 2 * (v - m) * m tie ends of the agents before v: end 2t is the source of
+    # tie t, end 2t + 1 its target
+    limits = 2 * (sources[m:] - m) * m
+    picks = numpy.zeros(n_ties, dtype=numpy.int64)
+    targets = numpy.empty(n_ties, dtype=numpy.int64)
+    targets[:m] = numpy.arange(m, dtype=numpy.int64)
+    redraw = affected = numpy.arange(m, n_ties, dtype=numpy.int64)
+    picks[redraw] = numpy.floor(generator.random(len(redraw)) * limits).astype(numpy.int64)
+    sorted_picks = order = None
+    moved = numpy.zeros(0, dtype=numpy.int64)
+    while True:
+        _resolve(affected, picks, sources, targets, m)
+        # Ties of the same agent must have different targets: redraw the later of two equal ones
+        rows = numpy.unique((affected - m) // m)
+        block = targets[m:].reshape(-1, m)[rows]
+        columns = numpy.argsort(block, axis=1, kind='stable')
+        ordered = numpy.take_along_axis(block, columns, axis=1)
+        row, column = numpy.nonzero(ordered[:, 1:] == ordered[:, :-1])
+        redraw = m + rows[row] * m + columns[row, column + 1]
+        if not len(redraw):
+            break
+        if order is None:
+            order = numpy.argsort(picks, kind='stable')
+            sorted_picks = picks[order]
+        picks[redraw] = numpy.floor(generator.random(len(redraw)) * limits[redraw - m]).astype(numpy.int64)
+        moved = numpy.union1d(moved, redraw)
+        # Ties which picked the target of a redrawn tie (directly or through other ties) get a new target as well
+        affected = [redraw]
+        frontier = redraw
+        while len(frontier):
+            ends = 2 * frontier + 1
+            low = numpy.searchsorted(sorted_picks, ends, 'left')
+            counts = numpy.searchsorted(sorted_picks, ends, 'right') - low
+            offsets = numpy.repeat(low - numpy.cumsum(counts) + counts, counts)
+            children = order[offsets + numpy.arange(counts.sum())]
+            children = numpy.union1d(children[picks[children] == sorted_picks[offsets + numpy.arange(counts.sum())]],
+                                     moved[numpy.isin(picks[moved], ends)])
+            affected.append(children)
+            frontier = children
+        affected = numpy.unique(numpy.concatenate(affected))
+    return network.add_edges(idents[sources], idents[targets], agents)
+
+
+def stochastic_block_model(network, p, groups=None, rng=None):
+    """
+
+    Add a stochastic block model keyed on Group membership: two agents in Groups i and j are tied with probability
+    p[i][j] (or, if p is a pair (p_in, p_out), with probability p_in within a Group and p_out between Groups). Each
+    block of pairs is drawn with geometric skipping, so this runs in O(agents + ties + groups ** 2).
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to add the ties to
+    :param p (tuple or list of lists): (p_in, p_out), or a matrix of tie probabilities between Groups
+    :param groups=None (list of ABMTools.Group or subclass): Groups whose members to connect. Defaults to all groups
+        of the Network's Controller
+    :param rng=None (ABMTools.RNGManager or numpy.random.Generator): Source of random numbers. Defaults to the
+        Controller's RNGManager
+
+    Returns:
+    :return (range): Indices of the new ties
+
+    """
+
+    _require_numpy()
+    if groups is None:
+        if network.controller is None:
+            raise ValueError("ABMTools: give the groups to connect, or a Network registered with a Controller")
+        groups = network.controller.groups
+    generator = _generator(network, rng, 'stochastic_block_model')
+    if len(p) == 2 and not hasattr(p[0], '__len__'):
+        p_in, p_out = p
+        p = [[p_in if i == j else p_out for j in range(len(groups))] for i in range(len(groups))]
+    members = [numpy.fromiter((a.ident for a in g.members), dtype=numpy.int64, count=len(g.members)) for g in groups]
+    sources, targets = [], []
+    for i, block in enumerate(members):
+        for j, other in enumerate(members):
+            if j < i and not network.directed:
+                continue
+            if i == j:
+                n = len(block)
+                if network.directed:
+                    positions = skip_sample(n * (n - 1), p[i][i], generator)
+                    s, t = numpy.divmod(positions, max(n - 1, 1))
+                    t += (t >= s)
+                else:
+                    s, t = pair_positions(skip_sample(n * (n - 1) // 2, p[i][i], generator))
+            else:
+                positions = skip_sample(len(block) * len(other), p[i][j], generator)
+                s, t = numpy.divmod(positions, max(len(other), 1))
+            sources.append(block[s])
+            targets.append(other[t])
+    if not sources:
+        return network.add_edges([], [])
+    return network.add_edges(numpy.concatenate(sources), numpy.concatenate(targets),
+                             [a for g in groups for a in g.members])
@@ -23,7 +23,8 @@ class Group:
 
     @staticmethod
     def get_ident():
-        """ Get current global group ident from ABMtools module and return it."""
+        """ Get current global group ident from ABMtools module and return it. Only used for Groups without a
+        Controller (see ABMTools.Group.new_ident())."""
 
         global g_ident
         ident = g_ident
@@ -36,11 +37,22 @@ class Group:
         self.controller = controller
         if ident is not None:
             self.ident = ident
+            if controller is not None and hasattr(controller, 'ident_allocator'):
+                controller.ident_allocator('group').reserve(ident)
         else:
-            self.ident = self.get_ident()
+            self.ident = self.new_ident()
         self.size = size
         self.members = members
 
+    def new_ident(self):
+        """Return a new ident from the Group's Controller (see ABMTools.idents.IdentAllocator), or from the global
+        counter if the Group has no Controller."""
+
+        controller = self.controller
+        if controller is None or not hasattr(controller, 'ident_allocator'):
+            return self.get_ident()
+        return controller.ident_allocator('group').allocate()
+
     def __str__(self):
         return "Type = Group, Identity = {}, size = {}".format(self.ident, self.size)
 
@@ -50,9 +62,13 @@ class Group:
         return [str(m) for m in self.members]
 
     def update_size(self):
-        """Update Group.size with the number of current members."""
+        """Update Group.size with the number of current members, notifying the components of the Group's Controller
+        (see ABMTools.Controller.register())."""
 
         self.size = len(self.members)
+        controller = self.controller
+        if controller is not None and getattr(controller, 'components', None):
+            controller.notify('group_resized', self)
 
     def increment_size(self):
         """Add one to Group.size."""
@@ -91,6 +107,8 @@ class Group:
 
         Remove all members from the group. Group members are either destroyed (by removing them from their
             controller's Agent list, when kill=True) or just assigned to None group (when kill=False).
+            Components registered with the controller (see ABMTools.Controller.register()) are notified of every
+            Agent assigned to None group.
 
         Args:
         :param kill=False (Bool): Should agents in the group also be killed? True -> Yes, False -> No
@@ -101,9 +119,11 @@ class Group:
 
         if controller is None:
             controller = self.controller
+        ungrouped = []
         if not kill:
             for agent in self.members:
                 agent.group = None
+            ungrouped = self.members
             self.members = []
         else:
             while len(self.members) > 0:
@@ -112,6 +132,9 @@ class Group:
                 a.group = None
             self.members = []
         self.update_size()
+        if ungrouped and controller is not None and getattr(controller, 'components', None):
+            for agent in ungrouped:
+                controller.notify('agent_moved', agent, self, None)
 
     def sprout(self, n, *args, **kwargs):
         """
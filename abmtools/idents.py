@@ -0,0 +1,96 @@
+
+import heapq
+
+# Ident layout of new allocators in this process: (offset, step). Workers of a distributed simulation use
+# (worker index, number of workers), so idents are unique across workers (see ABMTools.distributed)
+layout = (0, 1)
+
+
+class IdentAllocator:
+    """
+
+    Allocator of dense ident numbers for Agents or Groups. Every Controller has one for its Agents and one for its
+    Groups, so idents of different Controllers in one process do not interfere, and idents are the numbers 0, 1, 2,
+    ... without gaps. Attribute stores and indexes can therefore be plain arrays indexed by ident, of length
+    IdentAllocator.high.
+
+    If reuse is True, idents which are released (e.g. of killed Agents) are allocated again, lowest first, which
+    keeps the range of idents as small as the largest population rather than the number of Agents ever created.
+
+    Args:
+    :param offset=0 (int): First ident
+    :param step=1 (int): Distance between consecutive idents (e.g. the number of workers, if every worker allocates
+        the idents offset, offset + step, offset + 2 * step, ...)
+    :param reuse=False (bool): If True, reuse released idents
+
+    """
+
+    def __init__(self, offset=None, step=None, reuse=False):
+        if offset is None and step is None:
+            offset, step = layout
+        self.offset = offset or 0
+        self.step = step or 1
+        self.next = self.offset
+        self.reuse = reuse
+        self.free = []
+
+    @property
+    def high(self):
+        """One more than the largest ident allocated so far"""
+
+        return self.next - self.step + 1 if self.next > self.offset else 0
+
+    def allocate(self):
+        """Return a new ident"""
+
+        if self.free:
+            return heapq.heappop(self.free)
+        ident = self.next
+        self.next += self.step
+        return ident
+
+    def allocate_block(self, n):
+        """
+
+        Allocate n consecutive idents at once (e.g. for Agents created in bulk, or to hand out to a worker which
+        creates Agents on its own).
+
+        Returns:
+        :return (range): The allocated idents
+
+        """
+
+        block = range(self.next, self.next + n * self.step, self.step)
+        self.next += n * self.step
+        return block
+
+    def release(self, ident):
+        """Make an ident available for reuse (does nothing if reuse is False)"""
+
+        if self.reuse:
+            heapq.heappush(self.free, ident)
+
+    def reserve(self, ident):
+        """Mark an ident chosen by hand as used, so it is not allocated again"""
+
+        if ident >= self.next:
+            self.next = ident + self.step - (ident - self.offset) % self.step
+        elif self.free and ident in self.free:
+            self.free.remove(ident)
+            heapq.heapify(self.free)
+
+    def reset(self):
+        """Forget all allocated idents"""
+
+        self.next = self.offset
+        self.free = []
+
+
+def allocator_for(instances, reuse=False):
+    """Return an IdentAllocator which continues after the largest ident of existing Agents or Groups"""
+
+    allocator = IdentAllocator(reuse=reuse)
+    for instance in instances:
+        if isinstance(instance.ident, int):
+            allocator.reserve(instance.ident)
+    return allocator
@@ -0,0 +1,206 @@
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("ABMTools: group reductions require numpy, which could not be imported")
+
+
+class Memberships:
+    """
+
+    Index of memberships of Agents in several Groups at once (e.g. a household, a workplace and a club). The index is
+    a bipartite incidence structure: a dictionary of members for every Group and a dictionary of Groups for every
+    Agent, so joining, leaving and testing membership cost O(1) and iterating over the members of a Group or the
+    Groups of an Agent costs O(number of them). Group-level reductions of Agent attributes (sum(), mean(), count())
+    are computed as a product of the sparse Group x Agent incidence matrix with the attribute column.
+
+    Agent.group and Group.members are not changed by the index, so models with one Group per Agent keep using them
+    as before and pay nothing for the index. With include_primary=True the Group of every Agent is also a membership,
+    kept in sync by ABMTools.Controller.move().
+
+    The index is created automatically, as controller.memberships, by ABMTools.Agent.join() and leave(). It registers
+    itself with the Controller so that killed Agents leave all their Groups and hatched Agents join the Groups of
+    their parent.
+
+    Args:
+    :param controller=None (ABMTools.Controller or subclass): Controller to register with
+    :param include_primary=False (bool): If True, the Group in Agent.group is also a membership
+
+    """
+
+    def __init__(self, controller=None, include_primary=False):
+        self.members = {}
+        self.groups = {}
+        self.version = 0
+        self.cache = None
+        self.include_primary = include_primary
+        self.controller = controller
+        if controller is not None:
+            controller.register(self)
+            controller.memberships = self
+            if include_primary:
+                for agent in controller.agents:
+                    if agent.group is not None:
+                        self.join(agent, agent.group)
+
+    def __len__(self):
+        return sum(len(groups) for groups in self.groups.values())
+
+    def join(self, agent, group):
+        """Make an Agent a member of a Group (does nothing if it already is)"""
+
+        groups = self.groups.setdefault(agent, {})
+        if group not in groups:
+            groups[group] = None
+            self.members.setdefault(group, {})[agent] = None
+            self.version += 1
+
+    def leave(self, agent, group):
+        """Remove an Agent from a Group (does nothing if it is not a member)"""
+
+        groups = self.groups.get(agent)
+        if groups is not None and group in groups:
+            del groups[group]
+            if not groups:
+                del self.groups[agent]
+            members = self.members[group]
+            del members[agent]
+            if not members:
+                del self.members[group]
+            self.version += 1
+
+    def leave_all(self, agent):
+        """Remove an Agent from all its Groups"""
+
+        for group in list(self.groups.get(agent, ())):
+            self.leave(agent, group)
+
+    def is_member(self, agent, group):
+        """Return whether an Agent is a member of a Group. O(1)"""
+
+        return group in self.groups.get(agent, ())
+
+    def groups_of(self, agent):
+        """Return the Groups an Agent is a member of, in the order it joined them"""
+
+        return list(self.groups.get(agent, ()))
+
+    def members_of(self, group):
+        """Return the members of a Group, in the order they joined it"""
+
+        return list(self.members.get(group, ()))
+
+    def size(self, group):
+        """Return the number of members of a Group. O(1)"""
+
+        return len(self.members.get(group, ()))
+
+    # NOTIFICATIONS FROM THE CONTROLLER
+
+    def agent_killed(self, agent, group):
+        self.leave_all(agent)
+
+    def agent_hatched(self, agent, parent):
+        for group in self.groups.get(parent, ()):
+            self.join(agent, group)
+
+    def agent_moved(self, agent, old_group, new_group):
+        if not self.include_primary:
+            return
+        if old_group is not None:
+            self.leave(agent, old_group)
+        if new_group is not None:
+            self.join(agent, new_group)
+
+    # GROUP REDUCTIONS
+
+    def incidence(self, groups):
+        """
+
+        Return the incidence of Groups and Agents as arrays: for every membership, the position of the Group in groups
+        and the position of the Agent in the returned list of Agents. Cached until the memberships change.
+
+        Args:
+        :param groups (list of ABMTools.Group or subclass): Groups (rows of the incidence matrix)
+
+        Returns:
+        :return (tuple): (rows, columns, agents)
+
+        """
+
+        _require_numpy()
+        key = (self.version, tuple(id(group) for group in groups))
+        if self.cache is not None and self.cache[0] == key:
+            return self.cache[1]
+        positions = {}
+        rows, columns = [], []
+        for row, group in enumerate(groups):
+            for agent in self.members.get(group, ()):
+                rows.append(row)
+                columns.append(positions.setdefault(agent, len(positions)))
+        incidence = (numpy.array(rows, dtype=numpy.int64), numpy.array(columns, dtype=numpy.int64), list(positions))
+        self.cache = (key, incidence)
+        return incidence
+
+    def sum(self, attribute, groups=None):
+        """
+
+        Return the sum of an Agent attribute over the members of every Group, as the product of the sparse incidence
+        matrix with the attribute column (scipy if installed, numpy.bincount otherwise).
+
+        Args:
+        :param attribute (string or callable): Name of the Agent attribute, or a function of an Agent
+        :param groups=None (list of ABMTools.Group or subclass): Groups to sum over. Defaults to the Controller's
+            Groups
+
+        Returns:
+        :return (numpy.ndarray): Sum for every Group, in the order of groups
+
+        """
+
+        groups = self.controller.groups if groups is None else groups
+        rows, columns, agents = self.incidence(groups)
+        read = attribute if callable(attribute) else (lambda agent: getattr(agent, attribute))
+        values = numpy.fromiter((read(agent) for agent in agents), dtype=float, count=len(agents))
+        if scipy is not None and len(rows):
+            matrix = scipy.sparse.csr_matrix((numpy.ones(len(rows)), (rows, columns)),
+                                             shape=(len(groups), len(agents)))
+            return matrix @ values
+        return numpy.bincount(rows, weights=values[columns], minlength=len(groups))
+
+    def count(self, groups=None):
+        """Return the number of members of every Group, in the order of groups"""
+
+        _require_numpy()
+        groups = self.controller.groups if groups is None else groups
+        return numpy.array([self.size(group) for group in groups], dtype=numpy.int64)
+
+    def mean(self, attribute, groups=None, empty=0.0):
+        """Return the mean of an Agent attribute over the members of every Group (empty for Groups without members)"""
+
+        groups = self.controller.groups if groups is None else groups
+        sums = self.sum(attribute, groups)
+        counts = self.count(groups)
+        result = numpy.full(len(groups), empty, dtype=float)
+        numpy.divide(sums, counts, out=result, where=counts != 0)
+        return result
+
+
+def memberships_of(instance):
+    """Return the Memberships index of an Agent's or Group's Controller, creating it if needed"""
+
+    controller = instance.controller
+    memberships = getattr(controller, 'memberships', None)
+    if memberships is None:
+        memberships = Memberships(controller)
+    return memberships
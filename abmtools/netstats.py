@@ -0,0 +1,285 @@
+
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def components(sources, targets, n_nodes):
+    """
+
+    Label the connected components of a network given as arrays of tie ends (ties are treated as undirected), by
+    hooking every tie's larger label onto its smaller label and then compressing label chains, until every tie
+    connects equal labels. Every pass is an array operation over all ties; a few passes are usually enough.
+
+    Args:
+    :param sources (numpy.ndarray): Idents of one end of every tie
+    :param targets (numpy.ndarray): Idents of the other end of every tie
+    :param n_nodes (int): Number of nodes (at least one more than the largest ident)
+
+    Returns:
+    :return (numpy.ndarray): Label of every node: the smallest ident in its component
+
+    """
+
+    labels = numpy.arange(n_nodes, dtype=numpy.int64)
+    while True:
+        a, b = labels[sources], labels[targets]
+        differ = a != b
+        if not differ.any():
+            return labels
+        low, high = numpy.minimum(a[differ], b[differ]), numpy.maximum(a[differ], b[differ])
+        numpy.minimum.at(labels, high, low)
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all():
+                break
+            labels = jumped
+
+
+class NetworkStats:
+    """
+
+    Statistics of an ABMTools.tie.Network which are kept up to date as ties are added and removed and as Agents move
+    between Groups, so reading them costs O(1) instead of a pass over the network every tick:
+        mean_degree(): mean number of ties per Agent (counting both ends of every tie)
+        degree_histogram(): number of Agents with every number of ties
+        n_components(): number of connected components, counting Agents without ties (ties are treated as undirected)
+        within_group_ties() / between_group_ties(): ties between two Agents in the same Group / all other ties
+
+    Components are tracked with union-find while ties are only added. Removing a tie may split a component, which
+    union-find cannot undo, so the components are rebuilt (with array operations) at the next n_components() after a
+    removal. Ties added in bulk (ABMTools.tie.Network.add_edges()) also lead to a rebuild of all statistics when they
+    are next read.
+
+    The statistics are notified by the Network of changes to its ties, and by the Controller of Agents moved between
+    Groups with ABMTools.Controller.move() or taken out of their Group by ABMTools.Group.ungroup() and
+    Controller.clear_groups(). Agents whose group attribute is changed directly are not seen; call
+    rebuild() afterwards.
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to keep statistics of
+    :param controller=None (ABMTools.Controller or subclass): Controller whose Agents are counted and whose moves are
+        followed. Defaults to the Network's Controller
+
+    """
+
+    def __init__(self, network, controller=None):
+        self.network = network
+        self.controller = controller if controller is not None else network.controller
+        network.register(self)
+        if self.controller is not None:
+            self.controller.register(self)
+            self.controller.network_stats = self
+        self.rebuild()
+
+    # MAINTENANCE
+
+    def rebuild(self):
+        """Recompute all statistics from the Network"""
+
+        network = self.network
+        self.dirty = False
+        self.degrees = {}
+        self.histogram = collections.Counter()
+        self.groups = {}
+        self.within = 0
+        agents = network.agents
+        if numpy is not None and len(network):
+            sources = numpy.array(network.sources, dtype=numpy.int64)
+            targets = numpy.array(network.targets, dtype=numpy.int64)
+            nodes, counts = numpy.unique(numpy.concatenate([sources, targets]), return_counts=True)
+            self.degrees = dict(zip(nodes.tolist(), counts.tolist()))
+            degrees, numbers = numpy.unique(counts, return_counts=True)
+            self.histogram.update(dict(zip(degrees.tolist(), numbers.tolist())))
+            # Number the Groups to compare the Groups of both ends of all ties at once
+            numbers = {None: -1}
+            codes = numpy.full(int(nodes[-1]) + 1, -1, dtype=numpy.int64)
+            for ident in self.degrees:
+                group = self.groups[ident] = agents[ident].group
+                codes[ident] = numbers.setdefault(group, len(numbers) - 1)
+            self.within = int(((codes[sources] == codes[targets]) & (codes[sources] >= 0)).sum())
+        else:
+            for ident in list(network.sources) + list(network.targets):
+                self.degrees[ident] = self.degrees.get(ident, 0) + 1
+            self.histogram.update(self.degrees.values())
+            for ident in self.degrees:
+                self.groups[ident] = agents[ident].group
+            for source, target in zip(network.sources, network.targets):
+                if self.same_group(source, target):
+                    self.within += 1
+        self.rebuild_components()
+
+    def rebuild_components(self):
+        """Recompute the components (after ties were removed)"""
+
+        network = self.network
+        self.parent = {}
+        self.unions = 0
+        self.split = False
+        if not len(network):
+            return
+        if numpy is not None:
+            sources = numpy.array(network.sources, dtype=numpy.int64)
+            targets = numpy.array(network.targets, dtype=numpy.int64)
+            nodes = numpy.unique(numpy.concatenate([sources, targets]))
+            labels = components(sources, targets, int(nodes[-1]) + 1)[nodes]
+            self.parent = dict(zip(nodes.tolist(), labels.tolist()))
+            self.unions = len(nodes) - len(numpy.unique(labels))
+        else:
+            for source, target in zip(network.sources, network.targets):
+                self.union(source, target)
+
+    def find(self, ident):
+        parent = self.parent
+        root = ident
+        while parent.get(root, root) != root:
+            root = parent[root]
+        # Path compression
+        while ident != root:
+            parent[ident], ident = root, parent[ident]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+            self.unions += 1
+
+    def change_degree(self, ident, change):
+        histogram = self.histogram
+        old = self.degrees.get(ident, 0)
+        new = old + change
+        if old:
+            histogram[old] -= 1
+            if not histogram[old]:
+                del histogram[old]
+        if new:
+            histogram[new] += 1
+            self.degrees[ident] = new
+        else:
+            del self.degrees[ident]
+            del self.groups[ident]
+
+    def same_group(self, a, b):
+        group = self.groups[a]
+        return group is not None and group is self.groups[b]
+
+    # NOTIFICATIONS FROM THE NETWORK AND THE CONTROLLER
+
+    def tie_added(self, source, target):
+        if self.dirty:
+            return
+        for ident in (source, target):
+            if ident not in self.groups:
+                self.groups[ident] = self.network.agents[ident].group
+            self.change_degree(ident, 1)
+        if self.same_group(source, target):
+            self.within += 1
+        if not self.split:
+            self.union(source, target)
+
+    def tie_removed(self, source, target):
+        if self.dirty:
+            return
+        if self.same_group(source, target):
+            self.within -= 1
+        self.change_degree(source, -1)
+        self.change_degree(target, -1)
+        self.split = True
+
+    def ties_added(self, indices):
+        self.dirty = True
+
+    def ties_cleared(self):
+        self.rebuild()
+
+    def agent_moved(self, agent, old_group, new_group):
+        ident = agent.ident
+        if self.dirty or ident not in self.groups:
+            return
+        groups = self.groups
+        groups[ident] = new_group
+        network = self.network
+        neighbors = list(network.out.get(ident, ()))
+        if network.directed:
+            neighbors += list(network.into.get(ident, ()))
+        for neighbor in neighbors:
+            if neighbor == ident:
+                continue
+            group = groups[neighbor]
+            if group is None:
+                continue
+            self.within += (group is new_group) - (group is old_group)
+        # A tie of the Agent with itself is within its Group whenever it has one
+        if ident in network.out.get(ident, ()):
+            self.within += (new_group is not None) - (old_group is not None)
+
+    # STATISTICS
+
+    def n_agents(self):
+        if self.controller is not None:
+            return len(self.controller.agents)
+        return len(self.network.agents)
+
+    def mean_degree(self):
+        """Return the mean number of ties per Agent, counting both ends of every tie"""
+
+        n = self.n_agents()
+        return 2 * len(self.network) / n if n else 0.0
+
+    def degree_histogram(self):
+        """Return a dictionary of number of ties -> number of Agents with that many ties, in increasing order"""
+
+        if self.dirty:
+            self.rebuild()
+        histogram = {0: self.n_agents() - len(self.degrees)}
+        for degree in sorted(self.histogram):
+            histogram[degree] = self.histogram[degree]
+        return histogram
+
+    def max_degree(self):
+        if self.dirty:
+            self.rebuild()
+        return max(self.histogram) if self.histogram else 0
+
+    def n_components(self):
+        """Return the number of connected components, counting every Agent without ties as a component"""
+
+        if self.dirty:
+            self.rebuild()
+        elif self.split:
+            self.rebuild_components()
+        return self.n_agents() - self.unions
+
+    def within_group_ties(self):
+        if self.dirty:
+            self.rebuild()
+        return self.within
+
+    def between_group_ties(self):
+        return len(self.network) - self.within_group_ties()
+
+    def within_group_fraction(self):
+        return self.within_group_ties() / len(self.network) if len(self.network) else 0.0
+
+    def add_reporters(self, controller=None, prefix=''):
+        """
+
+        Add the statistics as reporters of a Controller (see ABMTools.Controller.add_reporter()): mean_degree,
+        max_degree, n_components, within_group_ties, between_group_ties, within_group_fraction and degree_histogram.
+
+        Args:
+        :param controller=None (ABMTools.Controller or subclass): Controller to add the reporters to. Defaults to the
+            Controller the statistics follow
+        :param prefix='' (string): Prefix for the reporter names
+
+        """
+
+        controller = controller if controller is not None else self.controller
+        for name in ('mean_degree', 'max_degree', 'n_components', 'within_group_ties', 'between_group_ties',
+                     'within_group_fraction', 'degree_histogram'):
+            method = getattr(self, name)
+            controller.add_reporter(prefix + name, lambda c, method=method: method())
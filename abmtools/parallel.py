@@ -0,0 +1,302 @@
+
+import concurrent.futures
+import multiprocessing
+import pickle
+import random
+
+from abmtools import agent, group, rng
+
+# Controller attributes which are never copied to worker processes
+DETACHED_SKIP = {'components', 'schedulers', 'events', 'buffers', 'lazy_reporters', 'reporter_updates', 'grid', 'space',
+                 'network', 'network_stats', 'memberships', 'group_rankings'}
+
+
+def holds_agents(value):
+    """Return True if value is an Agent or Group, or a container whose first item is one"""
+
+    if isinstance(value, (agent.Agent, group.Group)):
+        return True
+    if isinstance(value, (list, tuple, set)):
+        for item in value:
+            return isinstance(item, (agent.Agent, group.Group))
+    if isinstance(value, dict):
+        for item in value.values():
+            return isinstance(item, (agent.Agent, group.Group))
+    return False
+
+
+def detach(controller, picklable=None):
+    """
+
+    Return a copy of a Controller without its Agents, Groups and components, for use in worker processes. Attributes
+    which can not be pickled are left out. The BufferStore (see ABMTools.buffers.BufferStore) is replaced by an empty
+    one with the same attributes, which ABMTools.parallel.unpack() fills for the Groups sent to the worker.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller to copy
+    :param picklable=None (dict): Cache of whether an attribute can be pickled, keyed by attribute name and type of
+        its value. Pass the same dictionary on later calls to only try to pickle new attributes (or attributes whose
+        type changed)
+
+    Returns:
+    :return (ABMTools.Controller or subclass): Detached copy of the Controller (same class, without calling __init__)
+
+    """
+
+    cls = controller.__class__
+    detached = cls.__new__(cls)
+    if picklable is None:
+        picklable = {}
+    for name, value in controller.__dict__.items():
+        if name in DETACHED_SKIP or holds_agents(value):
+            continue
+        key = (name, type(value))
+        if key not in picklable:
+            try:
+                pickle.dumps(value)
+                picklable[key] = True
+            except Exception:
+                picklable[key] = False
+        if picklable[key]:
+            detached.__dict__[name] = value
+    buffers = getattr(controller, 'buffers', None)
+    if buffers is not None:
+        detached.buffers = buffers.detached()
+    return detached
+
+
+def group_rng(seed, tick, ident):
+    """Return a random.Random for one Group in one tick, which only depends on the seed, tick and Group ident"""
+
+    return random.Random(rng.derive_seed(seed, tick, ident))
+
+
+# Attributes of Groups and of their members which are not copied between processes
+GROUP_SKIP = ('controller', 'members', '_buffer_slot')
+MEMBER_SKIP = ('controller', 'group', '_buffer_slot')
+
+
+def pack(g):
+    """
+
+    Return a picklable state of a Group and its members, without references to the Controller. Buffered attributes
+    (see ABMTools.buffers.Buffered) are packed with their visible and pending values.
+
+    """
+
+    buffers = getattr(g.controller, 'buffers', None)
+    state = {k: v for k, v in g.__dict__.items() if k not in GROUP_SKIP}
+    members = [(m.__class__, {k: v for k, v in m.__dict__.items() if k not in MEMBER_SKIP}) for m in g.members]
+    if buffers is None:
+        buffered = None
+    else:
+        buffered = (buffers.export(g), [buffers.export(m) for m in g.members])
+    return g.__class__, state, members, buffered
+
+
+def unpack(packed, controller):
+    """Rebuild a Group and its members packed by pack(), attached to a (detached) Controller"""
+
+    cls, state, members, buffered = packed
+    g = cls.__new__(cls)
+    g.__dict__.update(state)
+    g.controller = controller
+    g.members = []
+    for member_cls, member_state in members:
+        m = member_cls.__new__(member_cls)
+        m.__dict__.update(member_state)
+        m.controller = controller
+        m.group = g
+        g.members.append(m)
+    if buffered is not None:
+        buffers = controller.buffers
+        buffers.restore(g, buffered[0])
+        for m, member_buffered in zip(g.members, buffered[1]):
+            buffers.restore(m, member_buffered)
+    return g
+
+
+def changes(g, attributes, member_attributes):
+    """
+
+    Return the attributes of a Group and its members which are merged back into the Controller, and the values
+    written to their buffered attributes (which are merged back as pending values).
+
+    """
+
+    buffers = getattr(g.controller, 'buffers', None)
+    buffered = buffers.columns if buffers is not None else ()
+    if attributes is None:
+        state = {k: v for k, v in g.__dict__.items() if k not in GROUP_SKIP}
+    else:
+        state = {k: getattr(g, k) for k in attributes if k not in buffered}
+    if member_attributes is None:
+        members = [{k: v for k, v in m.__dict__.items() if k not in MEMBER_SKIP} for m in g.members]
+    else:
+        members = [{k: getattr(m, k) for k in member_attributes if k not in buffered} for m in g.members]
+    if buffers is None:
+        written = None
+    else:
+        written = (buffers.written(g), [buffers.written(m) for m in g.members])
+    return state, members, written
+
+
+def call(func, g, generator):
+    """Run a phase function (or the name of a Group method) on one Group"""
+
+    if isinstance(func, str):
+        func = getattr(g.__class__, func)
+    if generator is None:
+        func(g)
+    else:
+        func(g, generator)
+
+
+def run_chunk(controller, func, packed_groups, seed, tick, pass_rng, attributes, member_attributes):
+    """Run a phase on a chunk of Groups in a worker process, with the detached Controller pickled to bytes (so it is
+    only pickled once for all chunks). Returns the changes to merge back"""
+
+    controller = pickle.loads(controller)
+    results = []
+    for packed in packed_groups:
+        g = unpack(packed, controller)
+        call(func, g, group_rng(seed, tick, g.ident) if pass_rng else None)
+        results.append(changes(g, attributes, member_attributes))
+    return results
+
+
+def run_local(func, groups, seed, tick, pass_rng):
+    """Run a phase on a chunk of Groups in this process (serial and thread backends)"""
+
+    for g in groups:
+        call(func, g, group_rng(seed, tick, g.ident) if pass_rng else None)
+
+
+class GroupPhase:
+    """
+
+    A phase which only depends on the state of one Group and its members at a time (e.g. updating group statistics or
+    the fitness of members), run on all Groups of a Controller in parallel. GroupPhase objects are callable without
+    arguments, so they can be used directly as a phase of an ABMTools.Ticker (see ABMTools.Ticker.add_phase()).
+
+    Groups are partitioned into contiguous chunks, one or more per worker. Three backends are available:
+        'serial': run in this process (for testing and as a reference)
+        'thread': run in a pool of threads on the Groups themselves. Only faster on free-threaded CPython builds or
+            when the phase releases the GIL (e.g. numpy code)
+        'process': run in a pool of processes. Each worker gets a detached copy of the Controller (without Agents,
+            Groups and components) and copies of the Groups in its chunk and their members; afterwards the changed
+            attributes are merged back into the original Groups and members. Agents and Groups should therefore not
+            refer to other Agents or Groups outside their own Group, and the phase must not create, kill or move
+            Agents. func must be picklable (a module-level function or the name of a Group method). Buffered
+            attributes (see ABMTools.buffers.Buffered) are copied with their visible values, and values written to
+            them in the workers are merged back as pending values
+
+    If pass_rng is True, the phase function gets a random.Random of its own for every Group and tick, derived from the
+    seed, the number of times the phase was called and the Group's ident, so results do not depend on the backend or
+    on the number of workers. Without a seed, the seed is derived from the Controller's rng (see
+    ABMTools.rng.RNGManager) and the name of the phase function.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Groups the phase runs on
+    :param func (callable or string): Function called with each Group (and its random.Random if pass_rng is True),
+        or the name of a Group method
+    :param backend='serial' (string): 'serial', 'thread' or 'process'
+    :param workers=None (int): Number of workers (defaults to the number of CPUs)
+    :param grouplist='groups' (string): String name of the list of Groups (an attribute of the controller)
+    :param pass_rng=False (bool): If True, pass a random.Random for every Group to func
+    :param seed=None (int): Seed for the per-Group random number generators
+    :param attributes=None (list of strings): Group attributes to merge back with the process backend (all if None)
+    :param member_attributes=None (list of strings): Member attributes to merge back with the process backend (all
+        if None)
+    :param chunks_per_worker=4 (int): Number of chunks of Groups per worker (more chunks balance uneven Groups better)
+    :param context=None (string): multiprocessing start method for the process backend (the default if None)
+
+    """
+
+    def __init__(self, controller, func, backend='serial', workers=None, grouplist='groups', pass_rng=False, seed=None,
+                 attributes=None, member_attributes=None, chunks_per_worker=4, context=None):
+        if backend not in ('serial', 'thread', 'process'):
+            raise ValueError("ABMTools: unknown backend {}, use 'serial', 'thread' or 'process'".format(backend))
+        self.controller = controller
+        self.func = func
+        self.backend = backend
+        self.workers = workers or multiprocessing.cpu_count()
+        self.grouplist = grouplist
+        self.pass_rng = pass_rng
+        self.seed = seed
+        self.attributes = attributes
+        self.member_attributes = member_attributes
+        self.chunks_per_worker = chunks_per_worker
+        self.context = context
+        self.calls = 0
+        self.pool = None
+        self.picklable = {}
+
+    def executor(self):
+        """Return the pool of workers, starting it on first use"""
+
+        if self.pool is None:
+            if self.backend == 'thread':
+                self.pool = concurrent.futures.ThreadPoolExecutor(self.workers)
+            else:
+                self.pool = concurrent.futures.ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context(self.context))
+        return self.pool
+
+    def chunks(self, groups):
+        """Split a list of Groups into contiguous chunks"""
+
+        n = max(1, min(len(groups), self.workers * self.chunks_per_worker))
+        size = -(-len(groups) // n)
+        return [groups[i:i + size] for i in range(0, len(groups), size)]
+
+    def phase_seed(self):
+        """Return the seed of the per-Group random number generators"""
+
+        if self.seed is not None:
+            return self.seed
+        manager = getattr(self.controller, 'rng', None)
+        name = self.func if isinstance(self.func, str) else getattr(self.func, '__name__', 'phase')
+        return rng.derive_seed(manager.seed if manager is not None else 0, 'group_phase', name)
+
+    def __call__(self):
+        groups = getattr(self.controller, self.grouplist)
+        tick = self.calls
+        seed = self.phase_seed()
+        self.calls += 1
+        if self.backend == 'serial' or len(groups) < 2:
+            run_local(self.func, groups, seed, tick, self.pass_rng)
+        elif self.backend == 'thread':
+            futures = [self.executor().submit(run_local, self.func, chunk, seed, tick, self.pass_rng)
+                       for chunk in self.chunks(groups)]
+            for future in futures:
+                future.result()
+        else:
+            detached = pickle.dumps(detach(self.controller, self.picklable))
+            chunks = self.chunks(groups)
+            futures = [self.executor().submit(run_chunk, detached, self.func, [pack(g) for g in chunk], seed,
+                                              tick, self.pass_rng, self.attributes, self.member_attributes)
+                       for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                for g, (state, members, written) in zip(chunk, future.result()):
+                    g.__dict__.update(state)
+                    for m, member_state in zip(g.members, members):
+                        m.__dict__.update(member_state)
+                    if written is not None:
+                        # Assigning a Buffered attribute writes its pending value
+                        for instance, values in zip([g] + g.members, [written[0]] + written[1]):
+                            for name, value in values.items():
+                                setattr(instance, name, value)
+
+    def close(self):
+        """Shut down the pool of workers"""
+
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,214 @@
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("ABMTools: network propagation requires numpy, which could not be imported")
+
+
+def _agents(network, agents):
+    if agents is None:
+        if network.controller is None:
+            raise ValueError("ABMTools: give the agents, or a Network registered with a Controller")
+        agents = network.controller.agents
+    return agents
+
+
+def gather(network, attribute, agents=None, default=0.0, dtype=float):
+    """
+
+    Read an attribute of every Agent into an array indexed by Agent ident, to pass to the neighbor reductions.
+
+    Args:
+    :param network (ABMTools.tie.Network): Network whose nodes the array is for
+    :param attribute (string): Name of the Agent attribute
+    :param agents=None (list of ABMTools.Agent or subclass): Agents to read. Defaults to all agents of the Network's
+        Controller
+    :param default=0.0: Value of nodes without an Agent in agents
+    :param dtype=float (numpy dtype): Type of the array
+
+    Returns:
+    :return (numpy.ndarray): Values, indexed by ident
+
+    """
+
+    _require_numpy()
+    agents = _agents(network, agents)
+    csr = network.freeze()
+    idents = numpy.fromiter((a.ident for a in agents), dtype=numpy.int64, count=len(agents))
+    values = numpy.full(max(csr.n_nodes, int(idents.max()) + 1 if len(idents) else 0), default, dtype=dtype)
+    values[idents] = numpy.fromiter((getattr(a, attribute) for a in agents), dtype=dtype, count=len(agents))
+    return values
+
+
+def scatter(values, attribute, agents):
+    """Write values (an array indexed by ident) back to an attribute of every Agent in agents"""
+
+    for agent, value in zip(agents, values[[a.ident for a in agents]].tolist()):
+        setattr(agent, attribute, value)
+
+
+def _snapshot(network, values, incoming):
+    csr = network.freeze(reverse=incoming)
+    if len(values) < csr.n_nodes:
+        raise ValueError("ABMTools: {} values for a network of {} nodes".format(len(values), csr.n_nodes))
+    if len(values) > csr.n_nodes:
+        csr = network.freeze(len(values), reverse=incoming)
+    return csr
+
+
+def _weights(network, csr, weight):
+    return None if weight is None else numpy.asarray(network.column(weight), dtype=float)[csr.edges]
+
+
+def neighbor_sum(network, values, weight=None, incoming=False):
+    """
+
+    Return, for every node, the sum of values over its neighbors (a sparse matrix-vector product). Uses scipy if it
+    is installed, and numpy.bincount otherwise.
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to sum over
+    :param values (numpy.ndarray): Value of every node, indexed by ident (see gather())
+    :param weight=None (string): Name of a tie attribute to weigh values with
+    :param incoming=False (bool): For directed networks, sum over the sources of ties to a node instead of the
+        targets of its ties
+
+    Returns:
+    :return (numpy.ndarray): Sums, indexed by ident
+
+    """
+
+    _require_numpy()
+    values = numpy.asarray(values)
+    csr = _snapshot(network, values, incoming)
+    data = _weights(network, csr, weight)
+    if scipy is not None:
+        if data is None:
+            matrix = csr.cache.get('matrix')
+            if matrix is None:
+                ones = numpy.ones(len(csr.indices))
+                matrix = csr.cache['matrix'] = scipy.sparse.csr_matrix((ones, csr.indices, csr.indptr),
+                                                                        shape=(csr.n_nodes, csr.n_nodes))
+        else:
+            matrix = scipy.sparse.csr_matrix((data, csr.indices, csr.indptr), shape=(csr.n_nodes, csr.n_nodes))
+        return matrix @ values.astype(float)
+    gathered = values[csr.indices].astype(float)
+    if data is not None:
+        gathered *= data
+    return numpy.bincount(csr.rows(), weights=gathered, minlength=csr.n_nodes)
+
+
+def neighbor_mean(network, values, weight=None, incoming=False, empty=0.0):
+    """
+
+    Return, for every node, the mean of values over its neighbors (weighted by a tie attribute if weight is given).
+    Nodes without neighbors get the value empty.
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to average over
+    :param values (numpy.ndarray): Value of every node, indexed by ident (see gather())
+    :param weight=None (string): Name of a tie attribute to weigh values with
+    :param incoming=False (bool): For directed networks, average over the sources of ties to a node
+    :param empty=0.0: Result for nodes without neighbors
+
+    Returns:
+    :return (numpy.ndarray): Means, indexed by ident
+
+    """
+
+    _require_numpy()
+    values = numpy.asarray(values)
+    sums = neighbor_sum(network, values, weight, incoming)
+    csr = _snapshot(network, values, incoming)
+    if weight is None:
+        totals = csr.degrees().astype(float)
+    else:
+        totals = numpy.bincount(csr.rows(), weights=_weights(network, csr, weight), minlength=csr.n_nodes)
+    result = numpy.full(csr.n_nodes, empty, dtype=float)
+    numpy.divide(sums, totals, out=result, where=totals != 0)
+    return result
+
+
+def _reduce(ufunc, network, values, incoming, empty):
+    values = numpy.asarray(values)
+    csr = _snapshot(network, values, incoming)
+    gathered = values[csr.indices]
+    nonempty = csr.indptr[1:] > csr.indptr[:-1]
+    result = numpy.full(csr.n_nodes, empty, dtype=numpy.result_type(values, numpy.asarray(empty)))
+    # Empty rows have no entries, so reducing from one non-empty row start to the next covers exactly one row
+    if len(gathered):
+        result[nonempty] = ufunc.reduceat(gathered, csr.indptr[:-1][nonempty])
+    return result
+
+
+def neighbor_max(network, values, incoming=False, empty=0):
+    """Return, for every node, the largest value among its neighbors (empty for nodes without neighbors)"""
+
+    _require_numpy()
+    return _reduce(numpy.maximum, network, values, incoming, empty)
+
+
+def neighbor_min(network, values, incoming=False, empty=0):
+    """Return, for every node, the smallest value among its neighbors (empty for nodes without neighbors)"""
+
+    _require_numpy()
+    return _reduce(numpy.minimum, network, values, incoming, empty)
+
+
+def neighbor_any(network, values, incoming=False):
+    """Return, for every node, whether any of its neighbors has a true (non-zero) value"""
+
+    _require_numpy()
+    return _reduce(numpy.logical_or, network, numpy.asarray(values).astype(bool), incoming, False)
+
+
+REDUCTIONS = {'sum': neighbor_sum, 'mean': neighbor_mean, 'max': neighbor_max, 'min': neighbor_min,
+              'any': neighbor_any}
+
+
+def propagate(network, attribute, how='mean', target=None, agents=None, weight=None, incoming=False):
+    """
+
+    Let every Agent read an aggregate of an attribute over its neighbors in one step: gather the attribute of all
+    Agents into an array, reduce it over the network and write the result to the target attribute of every Agent.
+    This replaces a loop in which every Agent visits its neighbors. All Agents read the values from before the step,
+    so the update is synchronous (also for ABMTools.buffers.Buffered attributes).
+
+    Args:
+    :param network (ABMTools.tie.Network): Network to propagate over
+    :param attribute (string): Name of the Agent attribute to read
+    :param how='mean' (string): 'sum', 'mean', 'max', 'min' or 'any'
+    :param target=None (string): Name of the Agent attribute to write. Defaults to attribute itself
+    :param agents=None (list of ABMTools.Agent or subclass): Agents to read and write. Defaults to all agents of the
+        Network's Controller
+    :param weight=None (string): Name of a tie attribute to weigh values with ('sum' and 'mean' only)
+    :param incoming=False (bool): For directed networks, read from the sources of ties to every Agent instead of the
+        targets of its ties
+
+    Returns:
+    :return (numpy.ndarray): Results, indexed by ident
+
+    """
+
+    if how not in REDUCTIONS:
+        raise ValueError("ABMTools: unknown reduction {}, use one of {}".format(how, ', '.join(REDUCTIONS)))
+    agents = _agents(network, agents)
+    values = gather(network, attribute, agents)
+    if how in ('sum', 'mean'):
+        result = REDUCTIONS[how](network, values, weight=weight, incoming=incoming)
+    elif weight is not None:
+        raise ValueError("ABMTools: weights can only be used with 'sum' and 'mean'")
+    else:
+        result = REDUCTIONS[how](network, values, incoming=incoming)
+    scatter(result, attribute if target is None else target, agents)
+    return result
@@ -0,0 +1,236 @@
+
+import heapq
+
+
+class _Candidate:
+    """Position in one of the heaps of a GroupRanking, ordered like the heap (for ABMTools.GroupRanking.top())"""
+
+    __slots__ = ('ranking', 'group', 'index', 'largest')
+
+    def __init__(self, ranking, group, index, largest):
+        self.ranking = ranking
+        self.group = group
+        self.index = index
+        self.largest = largest
+
+    def __lt__(self, other):
+        return self.ranking.before(self.group, other.group, self.largest)
+
+
+class GroupRanking:
+    """
+
+    Index of a Controller's Groups ordered by an attribute (e.g. 'size'), so that the largest and smallest Group can be
+    found in O(1) and the k largest or smallest Groups in O(k log G), instead of scanning all G Groups for every
+    query (as ABMTools.functions.max_one_of() does). The index keeps an indexed max-heap and an indexed min-heap of the
+    Groups; a Group whose attribute changes is moved to its new place in both in O(log G).
+
+    The index registers itself with the Controller and is notified of Groups whose size changes: Agents moved by
+    ABMTools.Controller.move(), killed by ABMTools.Controller.kill() or hatched by ABMTools.Agent.hatch(), and Groups
+    recounted by ABMTools.Group.update_size() (e.g. by ABMTools.Controller.census(), Group.ungroup() or
+    Group.sprout()). Groups created or removed through the Controller are picked up at the next query. An attribute
+    which is changed in any other way must be reported with update().
+
+    Groups with equal values are ordered by their position in the Controller's list of Groups, as in
+    ABMTools.functions.max_one_of() and min_one_of(). Groups whose attribute is None (e.g. the size of a Group before
+    the first census) are not ranked.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller whose Groups to rank
+    :param attribute='size' (string): Name of the Group attribute to rank by
+    :param grouplist='groups' (string): String name of the Controller's list of Groups to rank
+
+    """
+
+    def __init__(self, controller, attribute='size', grouplist='groups'):
+        self.controller = controller
+        self.attribute = attribute
+        self.grouplist = grouplist
+        controller.register(self)
+        if getattr(controller, 'group_rankings', None) is None:
+            controller.group_rankings = {}
+        controller.group_rankings[attribute] = self
+        self.rebuild()
+
+    def __len__(self):
+        self.sync()
+        return len(self.values)
+
+    # MAINTENANCE
+
+    def rebuild(self):
+        """Rank all Groups anew, from the current list of Groups of the Controller"""
+
+        groups = getattr(self.controller, self.grouplist)
+        self.source = groups
+        self.n_groups = len(groups)
+        self.order = {group: i for i, group in enumerate(groups)}
+        self.values = {}
+        for group in groups:
+            value = getattr(group, self.attribute, None)
+            if value is not None:
+                self.values[group] = value
+        self.heaps = {}
+        self.positions = {}
+        for largest in (True, False):
+            heap = list(self.values)
+            self.heaps[largest] = heap
+            self.positions[largest] = {group: i for i, group in enumerate(heap)}
+            for i in reversed(range(len(heap) // 2)):
+                self.sift_down(i, largest)
+
+    def sync(self):
+        """Rebuild the ranking if Groups were created or removed since it was last built. O(1) otherwise"""
+
+        groups = getattr(self.controller, self.grouplist)
+        if groups is not self.source or len(groups) != self.n_groups:
+            self.rebuild()
+
+    def update(self, group):
+        """Move a Group to its place in the ranking after its attribute changed. O(log G)"""
+
+        if group not in self.order:
+            self.sync()
+            return
+        value = getattr(group, self.attribute, None)
+        values = self.values
+        if value is None:
+            if group in values:
+                for largest in (True, False):
+                    self.remove(group, largest)
+                del values[group]
+        elif group not in values:
+            values[group] = value
+            for largest in (True, False):
+                heap = self.heaps[largest]
+                self.positions[largest][group] = len(heap)
+                heap.append(group)
+                self.sift_up(len(heap) - 1, largest)
+        elif value != values[group]:
+            values[group] = value
+            for largest in (True, False):
+                i = self.positions[largest][group]
+                self.sift_up(i, largest)
+                self.sift_down(self.positions[largest][group], largest)
+
+    def before(self, a, b, largest):
+        """Return whether Group a ranks before Group b in the max-heap (largest=True) or the min-heap"""
+
+        value_a, value_b = self.values[a], self.values[b]
+        if value_a == value_b:
+            return self.order[a] < self.order[b]
+        return value_a > value_b if largest else value_a < value_b
+
+    def swap(self, i, j, largest):
+        heap, positions = self.heaps[largest], self.positions[largest]
+        heap[i], heap[j] = heap[j], heap[i]
+        positions[heap[i]] = i
+        positions[heap[j]] = j
+
+    def sift_up(self, i, largest):
+        heap = self.heaps[largest]
+        while i > 0:
+            parent = (i - 1) // 2
+            if not self.before(heap[i], heap[parent], largest):
+                break
+            self.swap(i, parent, largest)
+            i = parent
+
+    def sift_down(self, i, largest):
+        heap = self.heaps[largest]
+        n = len(heap)
+        while True:
+            best = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self.before(heap[child], heap[best], largest):
+                    best = child
+            if best == i:
+                return
+            self.swap(i, best, largest)
+            i = best
+
+    def remove(self, group, largest):
+        heap, positions = self.heaps[largest], self.positions[largest]
+        i = positions.pop(group)
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            positions[last] = i
+            self.sift_up(i, largest)
+            self.sift_down(positions[last], largest)
+
+    # NOTIFICATIONS FROM THE CONTROLLER
+
+    def agent_moved(self, agent, old_group, new_group):
+        if old_group is not None:
+            self.update(old_group)
+        if new_group is not None:
+            self.update(new_group)
+
+    def agent_killed(self, agent, group):
+        if group is not None:
+            self.update(group)
+
+    def agent_hatched(self, agent, parent):
+        if parent.group is not None:
+            self.update(parent.group)
+
+    def group_resized(self, group):
+        self.update(group)
+
+    # QUERIES
+
+    def largest(self):
+        """Return the Group with the highest value of the attribute (None if no Group is ranked). O(1)"""
+
+        self.sync()
+        heap = self.heaps[True]
+        return heap[0] if heap else None
+
+    def smallest(self):
+        """Return the Group with the lowest value of the attribute (None if no Group is ranked). O(1)"""
+
+        self.sync()
+        heap = self.heaps[False]
+        return heap[0] if heap else None
+
+    def top(self, k, largest=True):
+        """
+
+        Return the k Groups with the highest (or lowest) values of the attribute, in order. Walks the heap from its
+        root, always expanding the best Group found so far, so only O(k) Groups of the heap are looked at.
+
+        Args:
+        :param k (int): Number of Groups to return (fewer are returned if fewer Groups are ranked)
+        :param largest=True (bool): If True return the Groups with the highest values, else those with the lowest
+
+        Returns:
+        :return (list of ABMTools.Group or subclass): The k Groups, best first
+
+        """
+
+        self.sync()
+        heap = self.heaps[largest]
+        result = []
+        frontier = [_Candidate(self, heap[0], 0, largest)] if heap else []
+        while frontier and len(result) < k:
+            candidate = heapq.heappop(frontier)
+            result.append(candidate.group)
+            for child in (2 * candidate.index + 1, 2 * candidate.index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, _Candidate(self, heap[child], child, largest))
+        return result
+
+    def bottom(self, k):
+        """Return the k Groups with the lowest values of the attribute, in order (see ABMTools.GroupRanking.top())"""
+
+        return self.top(k, largest=False)
+
+
+def ranking_of(controller, attribute='size'):
+    """Return the GroupRanking of a Controller's Groups by an attribute, creating it if needed"""
+
+    ranking = (getattr(controller, 'group_rankings', None) or {}).get(attribute)
+    if ranking is None:
+        ranking = GroupRanking(controller, attribute)
+    return ranking
@@ -0,0 +1,175 @@
+
+import hashlib
+import random
+import secrets
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def key_to_int(key):
+    """Turn one part of a stream key (an int or a string) into a non-negative int"""
+
+    if isinstance(key, int) and key >= 0:
+        return key
+    digest = hashlib.sha256(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def derive_seed(seed, *key):
+    """
+
+    Derive the seed of an independent stream from a root seed and a key (a sequence of ints or strings). The result
+    only depends on the root seed and the key, not on the process, platform or Python hash seed.
+
+    Args:
+    :param seed (int): Root seed
+    :param key: Parts of the key, e.g. ('phase', 'reproduce') or ('partition', 3)
+
+    Returns:
+    :return (int): 128-bit seed
+
+    """
+
+    text = ":".join([str(seed)] + [str(key_to_int(k)) for k in key])
+    return int.from_bytes(hashlib.sha256(text.encode('ascii')).digest()[:16], 'little')
+
+
+class RNGManager:
+    """
+
+    Manager of reproducible random number streams. A root seed is spawned into independent streams identified by
+    keys, so Agents, Groups, phases, partitions and runs can each have their own stream without collisions: e.g.
+    rng.stream('phase', 'reproduce') always returns the same random.Random for the same root seed, whatever other
+    streams were used before.
+
+    Streams are random.Random objects. With numpy, generator() returns numpy Generators, derived with numpy's
+    SeedSequence spawn keys, and the batched draws (uniform(), integers(), normal()) return numpy arrays of a whole
+    block of numbers at once; without numpy they return lists.
+
+    The state of all streams can be saved with getstate() and restored with setstate(), and RNGManagers can be pickled
+    (e.g. as part of a checkpointed Controller).
+
+    Args:
+    :param seed=None (int): Root seed. A random root seed is drawn from the operating system if None (and kept in
+        RNGManager.seed, so the run can be repeated)
+
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = secrets.randbits(64)
+        self.seed = seed
+        self.streams = {}
+        self.generators = {}
+
+    def derive(self, *key):
+        """Return a new random.Random for a key, which is not kept by the manager (e.g. for one Group in one tick)"""
+
+        return random.Random(derive_seed(self.seed, *key))
+
+    def stream(self, *key):
+        """Return the random.Random for a key, creating it on first use"""
+
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = self.derive(*key)
+        return stream
+
+    def generator(self, *key):
+        """Return the numpy Generator for a key, creating it on first use (requires numpy)"""
+
+        if numpy is None:
+            raise ImportError("ABMTools: RNGManager.generator() requires numpy, which could not be imported")
+        generator = self.generators.get(key)
+        if generator is None:
+            sequence = numpy.random.SeedSequence(key_to_int(self.seed), spawn_key=[key_to_int(k) for k in key])
+            generator = self.generators[key] = numpy.random.Generator(numpy.random.PCG64(sequence))
+        return generator
+
+    def child(self, *key):
+        """Return a new RNGManager whose root seed is derived from this one (e.g. for a run or a partition)"""
+
+        return RNGManager(derive_seed(self.seed, *key))
+
+    def run(self, run):
+        """Return the RNGManager of a run"""
+
+        return self.child('run', run)
+
+    def partition(self, index):
+        """Return the RNGManager of a partition of a distributed simulation"""
+
+        return self.child('partition', index)
+
+    def seed_global(self):
+        """Seed the global random module (and numpy's global generator) from this manager, for models using them"""
+
+        random.seed(derive_seed(self.seed, 'global'))
+        if numpy is not None:
+            numpy.random.seed(derive_seed(self.seed, 'global') % 2 ** 32)
+
+    def uniform(self, n, low=0.0, high=1.0, key=('batch',)):
+        """
+
+        Draw a block of n uniformly distributed numbers in [low, high) at once, e.g. one for every Agent.
+
+        Args:
+        :param n (int): Number of draws
+        :param low=0.0 (float): Lower bound
+        :param high=1.0 (float): Upper bound
+        :param key=('batch',) (tuple): Key of the stream to draw from
+
+        Returns:
+        :return (numpy.ndarray or list): The draws
+
+        """
+
+        if numpy is not None:
+            return self.generator(*key).uniform(low, high, n)
+        stream = self.stream(*key)
+        r = stream.random
+        scale = high - low
+        return [low + scale * r() for _ in range(n)]
+
+    def integers(self, n, low, high, key=('batch',)):
+        """Draw a block of n integers in [low, high) at once (see uniform())"""
+
+        if numpy is not None:
+            return self.generator(*key).integers(low, high, n)
+        stream = self.stream(*key)
+        return [stream.randrange(low, high) for _ in range(n)]
+
+    def normal(self, n, mu=0.0, sigma=1.0, key=('batch',)):
+        """Draw a block of n normally distributed numbers at once (see uniform())"""
+
+        if numpy is not None:
+            return self.generator(*key).normal(mu, sigma, n)
+        stream = self.stream(*key)
+        return [stream.gauss(mu, sigma) for _ in range(n)]
+
+    def getstate(self):
+        """Return the root seed and the state of all streams"""
+
+        return {'seed': self.seed,
+                'streams': {key: stream.getstate() for key, stream in self.streams.items()},
+                'generators': {key: generator.bit_generator.state for key, generator in self.generators.items()}}
+
+    def setstate(self, state):
+        """Restore a state returned by getstate()"""
+
+        self.seed = state['seed']
+        self.streams = {}
+        for key, stream_state in state['streams'].items():
+            self.stream(*key).setstate(stream_state)
+        self.generators = {}
+        for key, generator_state in state['generators'].items():
+            self.generator(*key).bit_generator.state = generator_state
+
+    def __getstate__(self):
+        return self.getstate()
+
+    def __setstate__(self, state):
+        self.setstate(state)
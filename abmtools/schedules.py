@@ -0,0 +1,161 @@
+
+import math
+
+
+class Schedule:
+    """
+
+    A recording schedule. Decides at which ticks an ABMTools.Ticker records the values of its reporters. The Ticker
+    calls Schedule.records() exactly once for every tick, in increasing order, and Schedule.reset() when a new run
+    starts.
+
+    This class is meant to be extended. Subclasses should override records() and, if they keep state, reset().
+
+    """
+
+    def records(self, tick, ticker):
+        """
+
+        Decide whether reporter values are recorded at a tick.
+
+        Args:
+        :param tick (int): The tick to decide on
+        :param ticker (ABMTools.Ticker): Ticker asking (reporter values can be read with ticker.values())
+
+        Returns:
+        :return (bool): True if the tick should be recorded
+
+        """
+
+        raise NotImplementedError("ABMTools: Schedule subclasses must implement records()")
+
+    def reset(self):
+        """Forget all state from the previous run"""
+
+        pass
+
+
+class IntervalSchedule(Schedule):
+    """
+
+    Record at a fixed interval. This is the Ticker's default behavior: after every interval ticks values are recorded
+    in two consecutive ticks, to allow comparison of change over time at different times in the simulation.
+
+    Args:
+    :param interval=1 (int): Number of ticks between recordings
+
+    """
+
+    def __init__(self, interval=1):
+        self.interval = interval
+
+    def records(self, tick, ticker):
+        return tick % self.interval in (0, 1)
+
+
+class TickList(Schedule):
+    """
+
+    Record at an explicit list of ticks.
+
+    Args:
+    :param ticks (iterable of ints): Ticks at which to record
+
+    """
+
+    def __init__(self, ticks):
+        self.ticks = frozenset(ticks)
+
+    def records(self, tick, ticker):
+        return tick in self.ticks
+
+
+class LogSchedule(Schedule):
+    """
+
+    Record at logarithmically spaced ticks: tick 0 and then at (rounded) 10 ** (k / per_decade) for k = 0, 1, 2, ...
+    Early ticks, where most change happens, are recorded densely while the number of recorded ticks in a long run only
+    grows with the logarithm of its length.
+
+    Args:
+    :param per_decade=10 (int): Number of recorded ticks per factor 10 of ticks (fewer in the first decades, where
+        the rounded values coincide)
+
+    """
+
+    def __init__(self, per_decade=10):
+        self.per_decade = per_decade
+        self.k = 0
+        self.next = 0
+
+    def reset(self):
+        self.k = 0
+        self.next = 0
+
+    def _advance(self):
+        previous = self.next
+        while self.next <= previous:
+            self.next = int(round(10 ** (self.k / self.per_decade)))
+            self.k += 1
+
+    def records(self, tick, ticker):
+        while self.next < tick:
+            self._advance()
+        if tick == self.next:
+            self._advance()
+            return True
+        return False
+
+
+class ChangeSchedule(Schedule):
+    """
+
+    Record only when something changes: a tick is recorded if at least one reporter has moved by more than tolerance
+    since the last recorded tick. The first tick of a run is always recorded. Note that this schedule reads all
+    reporters on every tick to compare them, so reporters are no longer evaluated lazily.
+
+    Args:
+    :param tolerance=0 (float): Smallest change which triggers recording. Non-numeric reporters trigger recording
+        whenever their value is not equal to the last recorded value
+    :param reporters=None (list of strings): Names of the reporters to watch (all reporters if None)
+    :param relative=False (bool): If True, tolerance is a fraction of the last recorded value instead of an absolute
+        difference
+    :param max_gap=None (int): If given, also record when this many ticks have passed since the last recorded tick,
+        even if nothing changed
+
+    """
+
+    def __init__(self, tolerance=0, reporters=None, relative=False, max_gap=None):
+        self.tolerance = tolerance
+        self.reporters = reporters
+        self.relative = relative
+        self.max_gap = max_gap
+        self.last = None
+        self.last_tick = None
+
+    def reset(self):
+        self.last = None
+        self.last_tick = None
+
+    def _changed(self, old, new):
+        try:
+            difference = abs(new - old)
+        except TypeError:
+            return new != old
+        if math.isnan(difference):
+            return not (new != new and old != old)
+        if self.relative:
+            return difference > self.tolerance * abs(old)
+        return difference > self.tolerance
+
+    def records(self, tick, ticker):
+        values = ticker.values()
+        if self.reporters is not None:
+            names = list(ticker.controller.reporters.keys())
+            values = [values[names.index(name)] for name in self.reporters]
+        if self.last is None or (self.max_gap is not None and tick - self.last_tick >= self.max_gap) or \
+                any(self._changed(old, new) for old, new in zip(self.last, values)):
+            self.last = values
+            self.last_tick = tick
+            return True
+        return False
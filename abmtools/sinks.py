@@ -0,0 +1,714 @@
+
+import array
+import bz2
+import collections
+import gzip
+import json
+import lzma
+import os
+import queue
+import sqlite3
+import threading
+
+try:
+    import numpy
+    from numpy.lib import format as npformat
+except ImportError:
+    numpy = None
+    npformat = None
+
+
+class Sink:
+    """
+
+    An output sink. A Sink receives the reporter values recorded by an ABMTools.Ticker and stores them somewhere.
+    The Ticker calls Sink.open() before the first row of a run is recorded, Sink.write() for every recorded row and
+    Sink.close() when the run is finished (see ABMTools.Ticker.close()).
+
+    This class is meant to be extended. Subclasses should override open(), write() and close().
+
+    """
+
+    def open(self, ticker):
+        """
+
+        Prepare the sink for a new run.
+
+        Args:
+        :param ticker (ABMTools.Ticker): Ticker whose run is about to be recorded. Setup variables and reporters can be
+            read from ticker.controller, the run number from ticker.run
+
+        """
+
+        pass
+
+    def write(self, tick, values):
+        """
+
+        Store one row of reporter values.
+
+        Args:
+        :param tick (int): Tick at which the values were recorded
+        :param values (list): Values of all reporters, in the order of the Controller's reporters
+
+        """
+
+        raise NotImplementedError("ABMTools: Sink subclasses must implement write()")
+
+    def close(self):
+        """Finish the current run, flushing anything which has not been stored yet."""
+
+        pass
+
+
+class MemorySink(Sink):
+    """
+
+    In-memory recorder. Keeps every recorded row in typed columns (array.array of 64-bit ints, doubles or booleans,
+    chosen from the first recorded value of each reporter; a plain list for anything else) instead of writing it
+    anywhere, for sweeps, tests and analysis which run in the same process as the model. A column is widened when a
+    later value does not fit its type (booleans to ints, ints to doubles, anything else to a list).
+
+    Columns of earlier runs are kept in MemorySink.runs, keyed by run number.
+
+    """
+
+    def __init__(self):
+        self.runs = collections.OrderedDict()
+        self.run = None
+        self.setup = None
+        self.names = None
+        self.data = None
+
+    def open(self, ticker):
+        self.run = ticker.run
+        self.setup = setup_values(ticker.controller)
+        self.names = ['tick'] + [str(k) for k in ticker.controller.reporters.keys()]
+        self.data = None
+
+    def write(self, tick, values):
+        row = [tick] + list(values)
+        data = self.data
+        if data is None:
+            data = self.data = [_typed_column(value) for value in row]
+        for i, value in enumerate(row):
+            column = data[i]
+            try:
+                if isinstance(column, array.array) and column.typecode == 'b' and not isinstance(value, bool):
+                    raise TypeError
+                column.append(value)
+            except (TypeError, OverflowError):
+                # The value does not fit the type chosen from the first value: widen the column
+                column = data[i] = _widened_column(column, value)
+                column.append(value)
+
+    def close(self):
+        if self.names is not None:
+            self.runs[self.run] = self.columns()
+
+    def columns(self, names=None):
+        """
+
+        Return the columns of the current run. The columns themselves are returned, not copies.
+
+        Args:
+        :param names=None (list of strings): Names of the columns to return (all columns, including 'tick', if None)
+
+        Returns:
+        :return (OrderedDict): 'column name:column' pairs. Columns are array.array objects (or lists for values which
+            are not numbers)
+
+        """
+
+        if self.data is None:
+            data = [[] for _ in self.names]
+        else:
+            data = self.data
+        columns = collections.OrderedDict(zip(self.names, data))
+        if names is not None:
+            columns = collections.OrderedDict([(name, columns[name]) for name in names])
+        return columns
+
+    def numpy_columns(self, names=None):
+        """
+
+        Return the columns of the current run as numpy arrays sharing memory with the recorded columns. While such an
+        array exists its column cannot grow, so release the arrays before recording more rows.
+
+        """
+
+        _require_numpy()
+        columns = collections.OrderedDict()
+        for name, column in self.columns(names).items():
+            if isinstance(column, array.array):
+                columns[name] = numpy.frombuffer(column, dtype='?' if column.typecode == 'b' else column.typecode)
+            else:
+                columns[name] = numpy.asarray(column)
+        return columns
+
+
+def _typed_column(value):
+    """Return an empty column of the narrowest array.array type which can hold value, or a list."""
+
+    if isinstance(value, bool):
+        return array.array('b')
+    if isinstance(value, int) or (numpy is not None and isinstance(value, numpy.integer)):
+        return array.array('q')
+    if isinstance(value, float):
+        return array.array('d')
+    return []
+
+
+def _widened_column(column, value):
+    """Return a copy of column in the narrowest type which can hold both its values and value."""
+
+    if isinstance(column, array.array):
+        needed = _typed_column(value)
+        if isinstance(needed, array.array):
+            codes = 'bqd'
+            typecode = codes[max(codes.index(column.typecode), codes.index(needed.typecode))]
+            if typecode != column.typecode:
+                return array.array(typecode, column)
+    return list(column)
+
+
+def setup_values(controller):
+    """
+
+    Collect the values of all setup variables of a Controller.
+
+    Args:
+    :param controller (ABMTools.Controller or subclass): Controller to read the setup variables from
+
+    Returns:
+    :return (OrderedDict): 'variable name:value' pairs in the order of controller.setupvars
+
+    """
+
+    return collections.OrderedDict([(var, getattr(controller, var)) for var in controller.setupvars.keys()])
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("ABMTools: this output format requires numpy, which could not be imported")
+
+
+def _dtype_of(value):
+    """Pick the numpy dtype used to store a reporter column from its first recorded value."""
+
+    if isinstance(value, (bool, numpy.bool_)):
+        return numpy.dtype('?')
+    if isinstance(value, (int, numpy.integer)):
+        return numpy.dtype('<i8')
+    if isinstance(value, (float, numpy.floating)):
+        return numpy.dtype('<f8')
+    raise TypeError("ABMTools: cannot store reporter value {!r} of type {} in a typed column. "
+                    "Pass a dtype for this reporter explicitly.".format(value, type(value).__name__))
+
+
+def _finalize_npy(path, length):
+    """
+
+    Shrink a preallocated .npy file to its first `length` rows. The header is rewritten in place, padded to its
+    original size, and the file is truncated, so no data is copied.
+
+    """
+
+    with open(path, 'r+b') as f:
+        version = npformat.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = npformat.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = npformat.read_array_header_2_0(f)
+        data_start = f.tell()
+        header = {'descr': npformat.dtype_to_descr(dtype), 'fortran_order': fortran_order, 'shape': (length,)}
+        prefix = len(npformat.magic(*version)) + (2 if version == (1, 0) else 4)
+        text = repr(header)
+        text = text + ' ' * (data_start - prefix - len(text) - 1) + '\n'
+        f.seek(prefix)
+        f.write(text.encode('latin1'))
+        f.truncate(data_start + length * dtype.itemsize)
+
+
+class ColumnarSink(Sink):
+    """
+
+    Binary columnar output. Every reporter in controller.reporters is stored as a typed column in its own .npy file,
+    next to a 'tick' column holding the tick of every row. Columns are preallocated memory-mapped arrays which double
+    in capacity when full, so recording a row is a handful of array assignments instead of string formatting. Setup
+    variables, reporter labels, column dtypes and the number of rows are stored in meta.json.
+
+    Reporters cannot be named 'tick'. A column whose dtype was inferred is promoted when a later value does not fit it (e.g. a reporter whose first
+    value is an int and later values are floats is stored as floats). Values which do not fit an explicitly given
+    dtype raise a TypeError.
+
+    When the run is closed every column is trimmed to the number of recorded rows, leaving ordinary .npy files which
+    can be opened without parsing or copying with ABMTools.sinks.load_columns() or numpy.load(mmap_mode='r').
+
+    Requires numpy.
+
+    Args:
+    :param path="Results/run_{run}" (string): Directory to store the columns of a run in. '{run}' is replaced by the
+        Ticker's run number
+    :param capacity=1024 (int): Number of rows preallocated when a run starts
+    :param dtypes=None (dict of 'reporter name:dtype' pairs): dtypes for reporters whose dtype should not be inferred
+        from their first value
+
+    """
+
+    def __init__(self, path="Results/run_{run}", capacity=1024, dtypes=None):
+        _require_numpy()
+        self.path = path
+        self.initial_capacity = capacity
+        self.capacity = capacity
+        self.dtypes = dtypes if dtypes is not None else {}
+        self.directory = None
+        self.meta = None
+        self.columns = None
+        self.length = 0
+
+    def open(self, ticker):
+        controller = ticker.controller
+        if 'tick' in (str(k) for k in controller.reporters.keys()):
+            raise ValueError("ABMTools: ColumnarSink stores the ticks in a column named 'tick', rename the reporter "
+                             "'tick'")
+        self.directory = self.path.format(run=ticker.run)
+        os.makedirs(self.directory, exist_ok=True)
+        self.meta = {'run': ticker.run,
+                     'setup': {var: _jsonable(value) for var, value in setup_values(controller).items()},
+                     'setup_labels': dict(controller.setupvars),
+                     'columns': ['tick'] + [str(k) for k in controller.reporters.keys()],
+                     'labels': {str(k): v for k, v in controller.reporters.items()},
+                     'dtypes': {},
+                     'length': 0}
+        self.columns = None
+        self.capacity = self.initial_capacity
+        self.length = 0
+
+    def _allocate(self, values):
+        self.columns = []
+        for name, value in zip(self.meta['columns'], values):
+            dtype = numpy.dtype(self.dtypes[name]) if name in self.dtypes else _dtype_of(value)
+            self.meta['dtypes'][name] = dtype.str
+            self.columns.append(self._open_column(name, dtype, self.capacity))
+
+    def _open_column(self, name, dtype, capacity):
+        return npformat.open_memmap(os.path.join(self.directory, name + '.npy'), mode='w+', dtype=dtype,
+                                    shape=(capacity,))
+
+    def _grow(self):
+        self.capacity *= 2
+        grown = []
+        for name, column in zip(self.meta['columns'], self.columns):
+            new_path = os.path.join(self.directory, name + '.npy.grow')
+            new = npformat.open_memmap(new_path, mode='w+', dtype=column.dtype, shape=(self.capacity,))
+            new[:self.length] = column[:self.length]
+            column.flush()
+            del column
+            os.replace(new_path, os.path.join(self.directory, name + '.npy'))
+            grown.append(new)
+        self.columns = grown
+
+    def write(self, tick, values):
+        row = [tick] + list(values)
+        if self.columns is None:
+            self._allocate(row)
+        if self.length == self.capacity:
+            self._grow()
+        for i, value in enumerate(row):
+            column = self.columns[i]
+            if column.dtype.kind != 'f':
+                needed = _dtype_of(value)
+                if needed.kind != column.dtype.kind and numpy.promote_types(column.dtype, needed) != column.dtype:
+                    column = self._promote(i, numpy.promote_types(column.dtype, needed))
+            column[self.length] = value
+        self.length += 1
+
+    def _promote(self, index, dtype):
+        """Rewrite a column whose dtype was inferred from its first value in a dtype which also holds later values"""
+
+        name = self.meta['columns'][index]
+        if name in self.dtypes:
+            raise TypeError("ABMTools: reporter {} has dtype {} but recorded a value of dtype {}".format(
+                name, self.columns[index].dtype, dtype))
+        column = self.columns[index]
+        new_path = os.path.join(self.directory, name + '.npy.grow')
+        new = npformat.open_memmap(new_path, mode='w+', dtype=dtype, shape=(self.capacity,))
+        new[:self.length] = column[:self.length]
+        column.flush()
+        del column
+        os.replace(new_path, os.path.join(self.directory, name + '.npy'))
+        self.columns[index] = new
+        self.meta['dtypes'][name] = dtype.str
+        return new
+
+    def flush(self):
+        """Flush all columns to disk and update the row count in meta.json (useful to read a run while it is going)."""
+
+        if self.columns is not None:
+            for column in self.columns:
+                column.flush()
+        self.meta['length'] = self.length
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=1)
+
+    def close(self):
+        if self.meta is None:
+            return
+        if self.columns is None:
+            # No rows were recorded: store empty columns, in the given dtypes or as ticks and floats
+            for name in self.meta['columns']:
+                default = 'i8' if name == 'tick' else 'f8'
+                dtype = numpy.dtype(self.dtypes.get(name, default))
+                self.meta['dtypes'][name] = dtype.str
+                numpy.save(os.path.join(self.directory, name + '.npy'), numpy.zeros(0, dtype=dtype))
+        self.flush()
+        if self.columns is not None:
+            self.columns = None
+            for name in self.meta['columns']:
+                _finalize_npy(os.path.join(self.directory, name + '.npy'), self.length)
+        self.meta = None
+
+
+def _jsonable(value):
+    """Return value if it can be stored in JSON, else its string representation."""
+
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def load_columns(path, mmap_mode='r'):
+    """
+
+    Open a run written by ABMTools.sinks.ColumnarSink. Columns are memory-mapped, so opening a run is instant
+    regardless of its length and slicing a column does not copy it.
+
+    Args:
+    :param path (string): Directory the run was written to
+    :param mmap_mode='r' (string): Passed to numpy.load. Use None to read the columns into memory instead
+
+    Returns:
+    :return (tuple of dict, dict): Dictionary of 'column name:array' pairs (including 'tick') and the run's metadata
+        (setup variables, reporter labels, dtypes and length)
+
+    """
+
+    _require_numpy()
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    columns = collections.OrderedDict()
+    for name in meta['columns']:
+        column = numpy.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+        columns[name] = column[:meta['length']]
+    return columns, meta
+
+
+def _quote(name):
+    """Quote an identifier (e.g. a reporter name) for use as an SQLite column name."""
+
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+class SQLiteSink(Sink):
+    """
+
+    Output to an SQLite database, so the results of many runs (e.g. from a parameter sweep) end up in one file which
+    can be queried. The database holds a 'runs' table with the run number and the setup variables of every run (as
+    JSON and as separate columns) and a reporter table, indexed on (run, tick), in one of two layouts:
+        'long': table 'reports' with one row per tick per reporter (run, tick, reporter, value). Works for any mix of
+            models and reporters.
+        'wide': table 'reports_wide' with one row per tick and one column per reporter. Columns are added as new
+            reporters are encountered. Reporters cannot be named 'run' or 'tick' in this layout.
+
+    Rows are buffered and inserted with executemany() in one transaction per batch. The database is put in WAL mode
+    so readers do not block the writer. Many worker processes can append to the same database: every batch is
+    written in a 'BEGIN IMMEDIATE' transaction, so SQLite's file locking lets one writer in at a time and the others
+    wait (up to timeout seconds). Every run must have a unique run number.
+
+    Args:
+    :param path="Results/runs.sqlite" (string): Database file
+    :param layout='long' (string): Layout of the reporter table, 'long' or 'wide'
+    :param batch_size=1000 (int): Number of ticks to buffer before inserting them
+    :param timeout=60 (float): Seconds to wait for the write lock held by other processes before giving up
+
+    """
+
+    def __init__(self, path="Results/runs.sqlite", layout='long', batch_size=1000, timeout=60):
+        if layout not in ('long', 'wide'):
+            raise ValueError("ABMTools: unknown SQLite layout '{}', use 'long' or 'wide'".format(layout))
+        self.path = path
+        self.layout = layout
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.connection = None
+        self.run = None
+        self.names = None
+        self.buffer = []
+
+    def connect(self):
+        """Open the database (creating tables and indexes if needed) and return the connection."""
+
+        if self.connection is None:
+            # isolation_level=None: transactions are managed explicitly in transaction()
+            self.connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            with self.transaction() as cursor:
+                cursor.execute("CREATE TABLE IF NOT EXISTS runs (run INTEGER PRIMARY KEY, setup TEXT)")
+                if self.layout == 'long':
+                    cursor.execute("CREATE TABLE IF NOT EXISTS reports "
+                                   "(run INTEGER, tick INTEGER, reporter TEXT, value)")
+                    cursor.execute("CREATE INDEX IF NOT EXISTS reports_run_tick ON reports (run, tick)")
+                else:
+                    cursor.execute("CREATE TABLE IF NOT EXISTS reports_wide (run INTEGER, tick INTEGER)")
+                    cursor.execute("CREATE INDEX IF NOT EXISTS reports_wide_run_tick ON reports_wide (run, tick)")
+        return self.connection
+
+    def transaction(self):
+        """Return a context manager which runs its body in one write transaction (BEGIN IMMEDIATE ... COMMIT)."""
+
+        return _Transaction(self.connection)
+
+    def _add_columns(self, cursor, table, names):
+        existing = [row[1] for row in cursor.execute("PRAGMA table_info({})".format(table))]
+        for name in names:
+            if name not in existing:
+                cursor.execute("ALTER TABLE {} ADD COLUMN {}".format(table, _quote(name)))
+
+    def open(self, ticker):
+        names = [str(k) for k in ticker.controller.reporters.keys()]
+        if self.layout == 'wide':
+            for reserved in ('run', 'tick'):
+                if reserved in names:
+                    raise ValueError("ABMTools: the wide SQLite layout stores '{0}' in a column of its own, rename the "
+                                     "reporter '{0}'".format(reserved))
+        self.connect()
+        self.run = ticker.run
+        self.names = names
+        self.buffer = []
+        setup = setup_values(ticker.controller)
+        for reserved in ('run', 'setup'):
+            setup.pop(reserved, None)
+        with self.transaction() as cursor:
+            self._add_columns(cursor, 'runs', setup.keys())
+            columns = ['run', 'setup'] + list(setup.keys())
+            values = [self.run, json.dumps({var: _jsonable(value)
+                                            for var, value in setup_values(ticker.controller).items()})]
+            values += [_sqlvalue(value) for value in setup.values()]
+            cursor.execute("INSERT OR REPLACE INTO runs ({}) VALUES ({})".format(
+                ", ".join(_quote(c) for c in columns), ", ".join("?" * len(columns))), values)
+            if self.layout == 'wide':
+                self._add_columns(cursor, 'reports_wide', self.names)
+
+    def write(self, tick, values):
+        self.buffer.append((tick, values))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert all buffered rows in one transaction."""
+
+        if not self.buffer:
+            return
+        run = self.run
+        if self.layout == 'long':
+            rows = [(run, tick, name, _sqlvalue(value))
+                    for tick, values in self.buffer for name, value in zip(self.names, values)]
+            statement = "INSERT INTO reports (run, tick, reporter, value) VALUES (?, ?, ?, ?)"
+        else:
+            rows = [[run, tick] + [_sqlvalue(value) for value in values] for tick, values in self.buffer]
+            statement = "INSERT INTO reports_wide (run, tick, {}) VALUES ({})".format(
+                ", ".join(_quote(name) for name in self.names), ", ".join("?" * (len(self.names) + 2)))
+        with self.transaction() as cursor:
+            cursor.executemany(statement, rows)
+        self.buffer = []
+
+    def close(self):
+        if self.connection is None:
+            return
+        self.flush()
+        self.connection.close()
+        self.connection = None
+
+
+class _Transaction:
+    """Context manager for an explicit write transaction on a connection in autocommit mode."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        return cursor
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.connection.execute("COMMIT")
+        else:
+            self.connection.execute("ROLLBACK")
+        return False
+
+
+def _sqlvalue(value):
+    """Convert a value to something sqlite3 can store (numpy scalars and other objects are converted)."""
+
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+CODECS = {'gzip': gzip, 'lzma': lzma, 'bz2': bz2}
+
+
+class CompressedSink(Sink):
+    """
+
+    Compressed text output for long runs. Rows are written as comma separated text like the Ticker's default output,
+    prefixed with their tick, but they are collected in chunks of chunk_size rows and every chunk is compressed
+    independently and appended to one data file. A small index file next to it lists the first and last tick, byte
+    offset and compressed length of every chunk, so ABMTools.sinks.read_compressed() can seek straight to a range of
+    ticks and only decompress the chunks it needs.
+
+    Compression runs on a background thread: the stepping thread only formats rows and hands full chunks over.
+
+    Files written for run N: path.format(run=N) (data) and path.format(run=N) + '.idx' (index). The first line of the
+    index holds the codec, setup variables and column names as JSON, every further line describes one chunk as
+    'first_tick,last_tick,offset,length'.
+
+    Args:
+    :param path="Results/run_{run}.txt.gz" (string): Data file. '{run}' is replaced by the Ticker's run number
+    :param codec='gzip' (string): Compression module to use: 'gzip', 'lzma' or 'bz2'
+    :param chunk_size=10000 (int): Number of rows per compressed chunk
+    :param level=None (int): Compression level passed to the codec (codec default if None)
+
+    """
+
+    def __init__(self, path="Results/run_{run}.txt.gz", codec='gzip', chunk_size=10000, level=None):
+        if codec not in CODECS:
+            raise ValueError("ABMTools: unknown codec '{}', use one of {}".format(codec, sorted(CODECS)))
+        self.path = path
+        self.codec = codec
+        self.chunk_size = chunk_size
+        self.level = level
+        self.file = None
+        self.rows = []
+        self.first_tick = None
+        self.last_tick = None
+        self.queue = None
+        self.thread = None
+        self.error = None
+
+    def _compress(self, data):
+        module = CODECS[self.codec]
+        if self.level is None:
+            return module.compress(data)
+        if self.codec == 'lzma':
+            return module.compress(data, preset=self.level)
+        return module.compress(data, self.level)
+
+    def open(self, ticker):
+        self.file = self.path.format(run=ticker.run)
+        controller = ticker.controller
+        meta = {'run': ticker.run, 'codec': self.codec,
+                'setup': {var: _jsonable(value) for var, value in setup_values(controller).items()},
+                'columns': ['tick'] + [str(k) for k in controller.reporters.keys()]}
+        with open(self.file, 'wb'):
+            pass
+        with open(self.file + '.idx', 'w') as f:
+            f.write(json.dumps(meta) + "\n")
+        self.rows = []
+        self.first_tick = None
+        self.error = None
+        self.queue = queue.Queue(maxsize=4)
+        self.thread = threading.Thread(target=self._worker, args=(self.file, self.queue), daemon=True)
+        self.thread.start()
+
+    def _worker(self, file, chunks):
+        offset = 0
+        with open(file, 'ab') as data, open(file + '.idx', 'a') as index:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                first, last, text = chunk
+                try:
+                    compressed = self._compress(text.encode('utf-8'))
+                    data.write(compressed)
+                    data.flush()
+                    index.write("{},{},{},{}\n".format(first, last, offset, len(compressed)))
+                    index.flush()
+                    offset += len(compressed)
+                except Exception as e:
+                    self.error = e
+
+    def write(self, tick, values):
+        if self.first_tick is None:
+            self.first_tick = tick
+        self.last_tick = tick
+        self.rows.append(str(tick) + "," + ",".join([str(value) for value in values]) + "\n")
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the rows collected so far to the compression thread as one chunk."""
+
+        if self.rows:
+            self.queue.put((self.first_tick, self.last_tick, "".join(self.rows)))
+            self.rows = []
+            self.first_tick = None
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            raise self.error
+
+
+def read_compressed(path, start=None, stop=None):
+    """
+
+    Read rows written by ABMTools.sinks.CompressedSink, decompressing only the chunks which overlap the requested
+    range of ticks.
+
+    Args:
+    :param path (string): Data file the run was written to (the index is read from path + '.idx')
+    :param start=None (int): First tick to return (from the start of the run if None)
+    :param stop=None (int): Return ticks before this tick only (up to the end of the run if None)
+
+    Returns:
+    :return (tuple of list, generator): Column names (starting with 'tick') and a generator of rows. Each row is a
+        list of strings, except the tick which is converted to int
+
+    """
+
+    with open(path + '.idx') as f:
+        meta = json.loads(f.readline())
+        chunks = [[int(x) for x in line.split(",")] for line in f if line.strip()]
+    module = CODECS[meta['codec']]
+
+    def rows():
+        with open(path, 'rb') as data:
+            for first, last, offset, length in chunks:
+                if (start is not None and last < start) or (stop is not None and first >= stop):
+                    continue
+                data.seek(offset)
+                text = module.decompress(data.read(length)).decode('utf-8')
+                for line in text.splitlines():
+                    row = line.split(",")
+                    row[0] = int(row[0])
+                    if (start is None or row[0] >= start) and (stop is None or row[0] < stop):
+                        yield row
+
+    return meta['columns'], rows()
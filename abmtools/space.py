@@ -0,0 +1,365 @@
+
+import heapq
+import itertools
+import math
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+def distance2(p, q):
+    """Return the squared Euclidean distance between two points"""
+
+    return sum((a - b) * (a - b) for a, b in zip(p, q))
+
+
+def ring_distance(cell, center_cell):
+    """Return the number of cells between two cells in the dimension in which they are furthest apart"""
+
+    return max(abs(c - m) for c, m in zip(cell, center_cell))
+
+
+class KDTree:
+    """
+
+    A static k-d tree over a list of points, for the 'kdtree' mode of ABMTools.space.SpatialIndex when scipy is not
+    available. Nodes are tuples (index, left, right, axis); the tree is built once by median splits and answers radius
+    and nearest-neighbor queries.
+
+    Args:
+    :param points (list of tuples): Points, all of the same dimension
+
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self.dims = len(points[0]) if points else 0
+        self.root = self.build(list(range(len(points))), 0)
+
+    def build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % self.dims
+        indices.sort(key=lambda i: self.points[i][axis])
+        median = len(indices) // 2
+        return (indices[median], self.build(indices[:median], depth + 1), self.build(indices[median + 1:], depth + 1),
+                axis)
+
+    def query_ball_point(self, point, r):
+        """Return the indices of all points within distance r of a point"""
+
+        r2 = r * r
+        result = []
+        stack = [self.root]
+        points = self.points
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, left, right, axis = node
+            p = points[index]
+            if distance2(p, point) <= r2:
+                result.append(index)
+            diff = point[axis] - p[axis]
+            if diff <= r:
+                stack.append(left)
+            if diff >= -r:
+                stack.append(right)
+        return result
+
+    def query(self, point, k):
+        """Return (distances, indices) of the k points nearest to a point, nearest first"""
+
+        heap = []
+        counter = itertools.count()
+        stack = [self.root]
+        points = self.points
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, left, right, axis = node
+            d2 = distance2(points[index], point)
+            if len(heap) < k:
+                heapq.heappush(heap, (-d2, next(counter), index))
+            elif d2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-d2, next(counter), index))
+            diff = point[axis] - points[index][axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                stack.append(far)
+            stack.append(near)
+        found = sorted((-d2, index) for d2, _, index in heap)
+        return [math.sqrt(d2) for d2, _ in found], [index for _, index in found]
+
+    def query_pairs(self, r):
+        """Return the set of pairs (i, j), i < j, of points within distance r of each other"""
+
+        pairs = set()
+        for i, p in enumerate(self.points):
+            for j in self.query_ball_point(p, r):
+                if i < j:
+                    pairs.add((i, j))
+        return pairs
+
+
+class SpatialIndex:
+    """
+
+    A spatial index for Agents in continuous 2D or 3D space. Answers radius queries (in_radius()), k nearest neighbor
+    queries (nearest()) and all pairs within a distance (pairs_within()) without comparing every Agent with every
+    other Agent.
+
+    Two modes are available:
+        'hash': a uniform grid of buckets of size cell_size. Moving an Agent costs O(1); a query looks only at the
+            buckets which overlap the query (or only at the occupied buckets, when there are fewer of them than
+            buckets overlapping the query). Best for Agents which move every step. Queries are fastest when
+            cell_size is about the usual query radius
+        'kdtree': a k-d tree (scipy's cKDTree if scipy is installed) which is rebuilt lazily, at the first query after
+            Agents moved. Best when Agents move rarely compared to the number of queries
+
+    When given a Controller, the index registers itself with it (as controller.space), so Agents killed by the
+    Controller are removed from the index and hatched Agents are added at the position of their parent.
+
+    Args:
+    :param cell_size=1.0 (float): Size of the buckets ('hash' mode)
+    :param controller=None (ABMTools.Controller or subclass): Controller to register with
+    :param mode='hash' (string): 'hash' or 'kdtree'
+
+    """
+
+    def __init__(self, cell_size=1.0, controller=None, mode='hash'):
+        if mode not in ('hash', 'kdtree'):
+            raise ValueError("ABMTools: unknown mode {}, use 'hash' or 'kdtree'".format(mode))
+        self.cell_size = cell_size
+        self.mode = mode
+        self.positions = {}
+        self.cells = {}
+        self.buckets = {}
+        self.tree = None
+        self.tree_agents = None
+        self.controller = controller
+        if controller is not None:
+            controller.register(self)
+            controller.space = self
+
+    def __len__(self):
+        return len(self.positions)
+
+    def cell(self, position):
+        size = self.cell_size
+        return tuple(int(math.floor(x / size)) for x in position)
+
+    def place(self, agent, position):
+        """Put an Agent at a position (a tuple of 2 or 3 coordinates), or move it there. O(1)"""
+
+        position = tuple(position)
+        self.positions[agent] = position
+        if self.mode == 'kdtree':
+            self.tree = None
+            return
+        cell = self.cell(position)
+        old = self.cells.get(agent)
+        if old != cell:
+            if old is not None:
+                bucket = self.buckets[old]
+                del bucket[agent]
+                if not bucket:
+                    del self.buckets[old]
+            self.cells[agent] = cell
+            self.buckets.setdefault(cell, {})[agent] = None
+
+    move_to = place
+
+    def remove(self, agent):
+        """Take an Agent out of the index (does nothing if it is not in the index)"""
+
+        if self.positions.pop(agent, None) is None:
+            return
+        if self.mode == 'kdtree':
+            self.tree = None
+            return
+        cell = self.cells.pop(agent)
+        bucket = self.buckets[cell]
+        del bucket[agent]
+        if not bucket:
+            del self.buckets[cell]
+
+    def position(self, agent):
+        """Return the position of an Agent, or None"""
+
+        return self.positions.get(agent)
+
+    def agent_killed(self, agent, group):
+        self.remove(agent)
+
+    def agent_hatched(self, agent, parent):
+        position = self.positions.get(parent)
+        if position is not None:
+            self.place(agent, position)
+
+    def build_tree(self):
+        """Rebuild the k-d tree if Agents moved since it was built ('kdtree' mode)"""
+
+        if self.tree is None:
+            self.tree_agents = list(self.positions)
+            points = [self.positions[a] for a in self.tree_agents]
+            if cKDTree is not None and points:
+                self.tree = cKDTree(points)
+            else:
+                self.tree = KDTree(points)
+        return self.tree
+
+    def cells_around(self, cell, reach):
+        """Yield the cells within reach cells of a cell, in every dimension"""
+
+        for delta in itertools.product(range(-reach, reach + 1), repeat=len(cell)):
+            yield tuple(c + d for c, d in zip(cell, delta))
+
+    def in_radius(self, agent, r, position=None):
+        """
+
+        Return the Agents within distance r of an Agent (not including the Agent itself) or of a position.
+
+        Args:
+        :param agent (ABMTools.Agent or subclass): Agent at the center of the query (None to query a position)
+        :param r (float): Radius
+        :param position=None (tuple): Center of the query if agent is None
+
+        Returns:
+        :return (list): Agents within the radius, in no particular order
+
+        """
+
+        center = self.positions[agent] if agent is not None else tuple(position)
+        r2 = r * r
+        if self.mode == 'kdtree':
+            tree = self.build_tree()
+            if not self.tree_agents:
+                return []
+            found = (self.tree_agents[i] for i in tree.query_ball_point(center, r))
+            return [a for a in found if a is not agent]
+        result = []
+        positions = self.positions
+        buckets = self.buckets
+        center_cell = self.cell(center)
+        reach = int(math.ceil(r / self.cell_size))
+        if (2 * reach + 1) ** len(center_cell) > len(buckets):
+            # Fewer occupied buckets than cells within reach: look at the occupied buckets instead
+            near = (bucket for cell, bucket in buckets.items() if ring_distance(cell, center_cell) <= reach)
+        else:
+            near = (buckets[cell] for cell in self.cells_around(center_cell, reach) if cell in buckets)
+        for bucket in near:
+            for other in bucket:
+                if other is not agent and distance2(positions[other], center) <= r2:
+                    result.append(other)
+        return result
+
+    def nearest(self, agent, k=1, position=None):
+        """
+
+        Return the k Agents nearest to an Agent (not including the Agent itself) or to a position.
+
+        Args:
+        :param agent (ABMTools.Agent or subclass): Agent at the center of the query (None to query a position)
+        :param k=1 (int): Number of Agents to return
+        :param position=None (tuple): Center of the query if agent is None
+
+        Returns:
+        :return (list): Up to k Agents, nearest first
+
+        """
+
+        center = self.positions[agent] if agent is not None else tuple(position)
+        available = len(self.positions) - (1 if agent is not None and agent in self.positions else 0)
+        k = min(k, available)
+        if k <= 0:
+            return []
+        if self.mode == 'kdtree':
+            tree = self.build_tree()
+            distances, indices = tree.query(center, k + 1)
+            if cKDTree is not None and not isinstance(tree, KDTree):
+                indices = list(indices)
+            found = [self.tree_agents[i] for i in indices if i < len(self.tree_agents)]
+            return [a for a in found if a is not agent][:k]
+        positions = self.positions
+        buckets = self.buckets
+        center_cell = self.cell(center)
+        candidates = []
+        seen = 0
+        ring = 0
+        shells = None
+        while True:
+            if shells is None and (2 * ring + 1) ** len(center_cell) > len(buckets):
+                # Fewer occupied buckets than cells in the next shells: visit the remaining occupied buckets in order
+                # of their distance from the center cell instead of visiting every cell
+                remaining = sorted((ring_distance(cell, center_cell), i, cell) for i, cell in enumerate(buckets))
+                shells = itertools.groupby((entry for entry in remaining if entry[0] >= ring), key=lambda e: e[0])
+            if shells is None:
+                # Visit the shell of cells at exactly `ring` cells from the center cell
+                cells = (cell for cell in self.cells_around(center_cell, ring)
+                         if ring_distance(cell, center_cell) == ring and cell in buckets)
+            else:
+                ring, entries = next(shells)
+                cells = (cell for _, _, cell in entries)
+            for cell in cells:
+                for other in buckets[cell]:
+                    if other is not agent:
+                        candidates.append((distance2(positions[other], center), seen, other))
+                        seen += 1
+            # Agents outside the visited cells are further away than ring * cell_size
+            if len(candidates) >= k:
+                kth = heapq.nsmallest(k, candidates)[-1][0]
+                if kth <= (ring * self.cell_size) ** 2 or seen == available:
+                    return [a for _, _, a in heapq.nsmallest(k, candidates)]
+            ring += 1
+
+    def pairs_within(self, r):
+        """
+
+        Return all pairs of Agents within distance r of each other.
+
+        Args:
+        :param r (float): Distance
+
+        Returns:
+        :return (list of tuples): Pairs (a, b), each pair once
+
+        """
+
+        if self.mode == 'kdtree':
+            tree = self.build_tree()
+            if not self.tree_agents:
+                return []
+            agents = self.tree_agents
+            return [(agents[i], agents[j]) for i, j in sorted(tree.query_pairs(r))]
+        r2 = r * r
+        reach = int(math.ceil(r / self.cell_size))
+        positions = self.positions
+        buckets = self.buckets
+        pairs = []
+        # With fewer occupied buckets than cells within reach, compare with the occupied buckets instead
+        sparse = (2 * reach + 1) ** len(next(iter(buckets), ())) > len(buckets)
+        for cell, bucket in buckets.items():
+            members = list(bucket)
+            # Pairs within the cell
+            for i, a in enumerate(members):
+                pa = positions[a]
+                for b in members[i + 1:]:
+                    if distance2(pa, positions[b]) <= r2:
+                        pairs.append((a, b))
+            # Pairs with cells which come later in lexicographic order, so every pair of cells is visited once
+            if sparse:
+                near = [other for other in buckets if other > cell and ring_distance(other, cell) <= reach]
+            else:
+                near = [other for other in self.cells_around(cell, reach) if other > cell and other in buckets]
+            for other_cell in near:
+                other_bucket = buckets[other_cell]
+                for a in members:
+                    pa = positions[a]
+                    for b in other_bucket:
+                        if distance2(pa, positions[b]) <= r2:
+                            pairs.append((a, b))
+        return pairs
@@ -0,0 +1,107 @@
+
+import collections
+
+
+class SteadyState:
+    """
+
+    Stopping condition which detects a steady state in the series of a reporter. Every time the condition is checked
+    it reads the reporter's current value. It keeps the last 2 * window observations, and reports a steady state once
+    the mean (and variance) of the last window observations differ from those of the window before by no more than
+    the thresholds. Means and variances are kept as running sums, so a check costs O(1) however long the window is.
+
+    Use as a stop predicate for ABMTools.Ticker.run_steps(). Note that observations are taken when the condition is
+    checked, so with check_every=10 a window of 50 spans 500 ticks.
+
+    Args:
+    :param reporter (string): Name of the reporter to watch (a key of controller.reporters)
+    :param window=100 (int): Number of observations in each of the two windows which are compared
+    :param threshold=1e-3 (float): Largest difference between the means of the two windows in a steady state
+    :param variance_threshold=None (float): Largest difference between the variances of the two windows in a
+        steady state. Variances are not compared if None
+
+    """
+
+    def __init__(self, reporter, window=100, threshold=1e-3, variance_threshold=None):
+        self.reporter = reporter
+        self.window = window
+        self.threshold = threshold
+        self.variance_threshold = variance_threshold
+        self.reset()
+
+    def reset(self):
+        """Forget all observations"""
+
+        self.observations = collections.deque()
+        self.sums = [0.0, 0.0]
+        self.squares = [0.0, 0.0]
+
+    def observe(self, value):
+        """
+
+        Add an observation. The oldest observation in the current window moves to the previous window and the oldest
+        observation of the previous window is dropped.
+
+        Args:
+        :param value (float): Observed value
+
+        """
+
+        w = self.window
+        self.observations.append(value)
+        self.sums[1] += value
+        self.squares[1] += value * value
+        if len(self.observations) > w:
+            moved = self.observations[-w - 1]
+            self.sums[1] -= moved
+            self.squares[1] -= moved * moved
+            self.sums[0] += moved
+            self.squares[0] += moved * moved
+        if len(self.observations) > 2 * w:
+            dropped = self.observations.popleft()
+            self.sums[0] -= dropped
+            self.squares[0] -= dropped * dropped
+
+    def steady(self):
+        """Return True if both windows are full and their means (and variances) are within the thresholds"""
+
+        w = self.window
+        if len(self.observations) < 2 * w:
+            return False
+        means = [self.sums[0] / w, self.sums[1] / w]
+        if abs(means[1] - means[0]) > self.threshold:
+            return False
+        if self.variance_threshold is not None:
+            variances = [self.squares[i] / w - means[i] ** 2 for i in (0, 1)]
+            if abs(variances[1] - variances[0]) > self.variance_threshold:
+                return False
+        return True
+
+    def __call__(self, ticker):
+        names = list(ticker.controller.reporters.keys())
+        self.observe(ticker.values()[names.index(self.reporter)])
+        return self.steady()
+
+
+class AllSteady:
+    """
+
+    Stopping condition which holds once each of a list of conditions holds at the same check (e.g. several
+    ABMTools.stopping.SteadyState conditions which all have to be in a steady state). All conditions are checked every
+    time, so all of them keep observing.
+
+    Args:
+    :param conditions (list of callables): Conditions taking the Ticker as their only argument
+
+    """
+
+    def __init__(self, conditions):
+        self.conditions = list(conditions)
+
+    def reset(self):
+        for condition in self.conditions:
+            if hasattr(condition, 'reset'):
+                condition.reset()
+
+    def __call__(self, ticker):
+        return all([condition(ticker) for condition in self.conditions])
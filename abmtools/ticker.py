@@ -1,4 +1,11 @@
 
+import array
+import collections
+import time
+
+from abmtools import rng
+
+
 class Ticker:
     """
 
@@ -14,10 +21,21 @@ class Ticker:
         is to allow comparison of change over time at different times in the simulation.
     :param run=1 (int): Simulation run number (useful when running multiple runs consecutively or in parallel).
     :param outfile="Results/run.txt" (string): File to store written data in.
+    :param sink=None (ABMTools.sinks.Sink or subclass): Where to store recorded reporter values instead of the text
+        file in outfile (e.g. ABMTools.sinks.ColumnarSink for binary columns). If None, write text to outfile.
+    :param schedule=None (ABMTools.schedules.Schedule or subclass): Decides at which ticks summary variables are
+        written (e.g. ABMTools.schedules.LogSchedule or ChangeSchedule). If None, the interval is used.
+    :param write_tick=None (bool): Whether rows written to outfile start with their tick number. Defaults to True if a
+        schedule is given (rows are then not evenly spaced) and False otherwise. Sinks always store the tick.
+    :param phase_series=False (bool): If True, keep the time spent in every phase (see ABMTools.Ticker.add_phase())
+        at every tick in Ticker.phase_series, besides the totals in Ticker.phase_times.
+    :param seed=None (int): Root seed for all runs (see ABMTools.Ticker.setup()). If None, runs are not seeded by the
+        Ticker
 
     """
 
-    def __init__(self, controller=None, interval=1, run=1, outfile="Results/run.txt"):
+    def __init__(self, controller=None, interval=1, run=1, outfile="Results/run.txt", sink=None, schedule=None,
+                 write_tick=None, phase_series=False, seed=None):
 
         self.run = run
         self.ticks = 0
@@ -26,6 +44,15 @@ class Ticker:
         self.step_func = None
         self.controller = controller
         self.outfile = outfile
+        self.sink = sink
+        self.schedule = schedule
+        self.write_tick = write_tick
+        self.cached_values = None
+        self.phases = []
+        self.phase_times = collections.OrderedDict()
+        self.phase_calls = collections.OrderedDict()
+        self.phase_series = collections.OrderedDict() if phase_series else None
+        self.rng = rng.RNGManager(seed) if seed is not None else None
 
     def set_setup(self, func, *args, **kwargs):
         """
@@ -49,6 +76,13 @@ class Ticker:
         Runs the setup function stored as an attribute of this Ticker. By default also sets the Ticker's controller
         attribute to be the Controller returned by the setup function.
 
+        Values written to ABMTools.buffers.Buffered attributes by the setup function are made visible by swapping the
+        buffers once after it.
+
+        If the Ticker has a seed, every run gets a root seed of its own, derived from the Ticker's seed and the run
+        number: the global random module is seeded from it before the setup function runs, and the Controller's rng
+        is replaced by the run's ABMTools.rng.RNGManager.
+
         Args:
         :param set_controller=True (bool): If True, set the Ticker's controller attribute to be the Controller returned
             by the setup function. If False, ignore
@@ -61,7 +95,17 @@ class Ticker:
         func = self.setup_func[0]
         args = self.setup_func[1]
         kwargs = self.setup_func[2]
+        run_rng = None
+        if self.rng is not None:
+            run_rng = self.rng.run(self.run)
+            run_rng.seed_global()
         c = func(*args, **kwargs)
+        if run_rng is not None:
+            c.rng = run_rng
+        # Values written to buffered attributes during setup are the state at the first tick
+        buffers = getattr(c, 'buffers', None)
+        if buffers is not None:
+            buffers.swap()
         if set_controller:
             self.controller = c
         return c
@@ -73,7 +117,10 @@ class Ticker:
         setupattr = [getattr(self.controller, var) for var in self.controller.setupvars.keys()]
         for varname, value in zip(self.controller.setupvars.values(), setupattr):
             header += ("{} = {}\n".format(varname, value))
-        header += ",".join([str(k) for k in self.controller.reporters.keys()]) + "\n"
+        names = [str(k) for k in self.controller.reporters.keys()]
+        if self.writes_tick():
+            names = ["tick"] + names
+        header += ",".join(names) + "\n"
         return header
 
     def set_step(self, func, *args, **kwargs):
@@ -91,45 +138,307 @@ class Ticker:
 
         self.step_func = (func, args, kwargs)
 
-    def step(self, write=True):
+    def add_phase(self, name, func, *args, **kwargs):
+        """
+
+        Add a named phase to the step. Phases are run in the order in which they were added, after the step function
+        if one was set with set_step(). The wall time spent in every phase and the number of times it was run are
+        recorded (see ABMTools.Ticker.phase_table()), so a profile of the step can be broken down by phase.
+
+        Args:
+        :param name (string): Name of the phase (must be unique)
+        :param func (func): Function object for the phase
+        :param args: Any non-keyword arguments to be passed to the phase function
+        :param kwargs: Any keyword arguments to be passed to the phase function
+
+        """
+
+        if name in self.phase_times:
+            raise ValueError("ABMTools: a phase named '{}' already exists".format(name))
+        self.phases.append((name, func, args, kwargs))
+        self.phase_times[name] = 0
+        self.phase_calls[name] = 0
+        if self.phase_series is not None:
+            self.phase_series[name] = array.array('q')
+
+    def set_phases(self, phases):
+        """
+
+        Replace all phases of the step, resetting their timings.
+
+        Args:
+        :param phases (list of tuples): (name, func) or (name, func, args, kwargs) tuples, in the order in which the
+            phases should be run
+
+        """
+
+        self.phases = []
+        self.phase_times = collections.OrderedDict()
+        self.phase_calls = collections.OrderedDict()
+        if self.phase_series is not None:
+            self.phase_series = collections.OrderedDict()
+        for phase in phases:
+            name, func = phase[0], phase[1]
+            args = phase[2] if len(phase) > 2 else ()
+            kwargs = phase[3] if len(phase) > 3 else {}
+            self.add_phase(name, func, *args, **kwargs)
+
+    def run_phases(self):
+        """Run all phases in order, adding the time spent in each to its timing"""
+
+        clock = time.perf_counter_ns
+        times = self.phase_times
+        calls = self.phase_calls
+        series = self.phase_series
+        for name, func, args, kwargs in self.phases:
+            start = clock()
+            func(*args, **kwargs)
+            elapsed = clock() - start
+            times[name] += elapsed
+            calls[name] += 1
+            if series is not None:
+                series[name].append(elapsed)
+
+    def phase_table(self):
+        """
+
+        Return the timing of all phases.
+
+        Returns:
+        :return (list of tuples): One (name, calls, total seconds, mean seconds per call, fraction of the time spent in
+            all phases) tuple per phase, in the order in which the phases are run
+
+        """
+
+        total = sum(self.phase_times.values())
+        table = []
+        for name in self.phase_times:
+            ns = self.phase_times[name]
+            calls = self.phase_calls[name]
+            table.append((name, calls, ns / 1e9, ns / 1e9 / calls if calls else 0.0, ns / total if total else 0.0))
+        return table
+
+    def reset_phase_times(self):
+        """Set the timings of all phases back to zero"""
+
+        for name in self.phase_times:
+            self.phase_times[name] = 0
+            self.phase_calls[name] = 0
+            if self.phase_series is not None:
+                self.phase_series[name] = array.array('q')
+
+    def step(self, write=True, check=None):
         """
 
-        Runs the step function stored as an attribute of this Ticker. By default also writes summary variables
-        specified as reporters in this Ticker's Controller to file.
+        Runs the step function stored as an attribute of this Ticker, followed by its phases (if it has any). Then
+        notifies the Controller's components that the tick ended (which swaps double-buffered attributes, see
+        ABMTools.buffers.BufferStore). By default also writes summary variables specified as reporters in this
+        Ticker's Controller to file (or to the Ticker's sink, if it has one).
 
         Args:
-        :param write=True (bool): If True, write data to file (respecting the interval specified in the Ticker's
-            attributes). If False, don't write date to file ever.
+        :param write=True (bool): If True, write data to file (respecting the interval or schedule specified in the
+            Ticker's attributes). If False, don't write date to file ever.
+        :param check=None (bool): If True, decide whether this tick is recorded even when not writing. Defaults to
+            the value of write
+
+        Returns:
+        :return (bool): True if this tick is recorded (always False if neither write nor check is True)
+
+        """
+
+        if self.step_func is not None or not self.phases:
+            func = self.step_func[0]
+            args = self.step_func[1]
+            kwargs = self.step_func[2]
+            func(*args, **kwargs)
+        if self.phases:
+            self.run_phases()
+        if self.controller is not None and hasattr(self.controller, 'notify'):
+            self.controller.notify('tick_ended')
+
+        recorded = self.observe(write, check)
+        self.ticks += 1
+        return recorded
 
+    def observe(self, write=True, check=None):
         """
 
-        func = self.step_func[0]
-        args = self.step_func[1]
-        kwargs = self.step_func[2]
-        func(*args, **kwargs)
+        Finish the current tick without running the step function: decide whether the tick is recorded and, if
+        writing, record it. Called by ABMTools.Ticker.step() after the step function, and by other drivers of the
+        simulation (e.g. ABMTools.events.EventScheduler) which set Ticker.ticks themselves.
 
+        Args:
+        :param write=True (bool): If True, write data to file (or to the Ticker's sink)
+        :param check=None (bool): If True, decide whether this tick is recorded even when not writing. Defaults to
+            the value of write
+
+        Returns:
+        :return (bool): True if this tick is recorded (always False if neither write nor check is True)
+
+        """
+
+        self.cached_values = None
+        if check is None:
+            check = write
+        recorded = check and self.records(self.ticks)
         if write and self.ticks == 0:
+            self.open_output()
+        if write and recorded:
+            self.record()
+        return recorded
+
+    def run_steps(self, max_steps, until=None, check_every=1, write=True):
+        """
+
+        Run the step function up to max_steps times, stopping early as soon as a stop condition holds. Conditions are
+        only evaluated every check_every ticks, so cheap and expensive conditions alike can be checked at a cadence
+        which suits them. Conditions which have a reset() method (e.g. ABMTools.stopping.SteadyState) are reset first.
+
+        Args:
+        :param max_steps (int): Maximum number of steps to run
+        :param until=None (callable or list of callables): Stop condition(s), called with this Ticker as their only
+            argument after a step. The run stops when any of them returns True
+        :param check_every=1 (int): Evaluate the stop conditions after every check_every ticks
+        :param write=True (bool): Passed on to ABMTools.Ticker.step()
+
+        Returns:
+        :return (int): Number of steps which were run
+
+        """
+
+        if until is None:
+            until = []
+        elif callable(until):
+            until = [until]
+        for condition in until:
+            if hasattr(condition, 'reset'):
+                condition.reset()
+
+        for n in range(1, max_steps + 1):
+            self.step(write=write)
+            if until and self.ticks % check_every == 0 and any([condition(self) for condition in until]):
+                return n
+        return max_steps
+
+    def iter_run(self, n_steps, write=False):
+        """
+
+        Run the step function n_steps times and lazily yield the reporter values of every tick which is recorded
+        (respecting the interval or schedule specified in the Ticker's attributes), without going through a file.
+
+        Args:
+        :param n_steps (int): Number of steps to run
+        :param write=False (bool): If True, also write data to file (or to the Ticker's sink) as step() does
+
+        Returns:
+        :return (generator): Generator of (tick, list of reporter values) tuples
+
+        """
+
+        for _ in range(n_steps):
+            tick = self.ticks
+            if self.step(write=write, check=True):
+                yield tick, self.values()
+
+    def records(self, tick):
+        """
+
+        Decide whether reporter values are recorded at the given tick, using the Ticker's schedule if it has one and
+        its interval otherwise. Schedules may keep state, so this is called once per tick by step().
+
+        Args:
+        :param tick (int): Tick to decide on
+
+        Returns:
+        :return (bool): True if reporter values are recorded at the given tick
+
+        """
+
+        if self.schedule is None:
+            return tick % self.interval in (0, 1)
+        return self.schedule.records(tick, self)
+
+    def writes_tick(self):
+        """Return True if rows written to outfile start with their tick number (see write_tick)"""
+
+        if self.write_tick is None:
+            return self.schedule is not None
+        return self.write_tick
+
+    def open_output(self):
+        """Start the output of a run: write the header to outfile, or open the Ticker's sink if it has one"""
+
+        if self.sink is None:
             self.write_to_file(self.header(), method='w+')
-        if write and self.ticks % self.interval in (0, 1):
+        else:
+            self.sink.open(self)
+
+    def record(self):
+        """Record the current values of all reporter variables for the current tick"""
+
+        if self.sink is None:
             self.write_to_file(self.report(), method='a')
-        self.ticks += 1
+        else:
+            self.sink.write(self.ticks, self.values())
+
+    def close(self):
+        """Finish the output of the current run. Required for sinks which buffer or finalize their output"""
+
+        if self.sink is not None:
+            self.sink.close()
+
+    def values(self):
+        """
+
+        Return a list of the current values of all reporter variables. Before the reporters are read the Controller's
+        reporter update functions are called, and reporters which were added with a function are calculated. The
+        result is cached until the next step, so reporters are calculated at most once per tick.
+
+        Returns:
+        :return (list): Values of all reporters, in the order of the Controller's reporters
+
+        """
+
+        if self.cached_values is not None:
+            return self.cached_values
+
+        controller = self.controller
+        for func in getattr(controller, 'reporter_updates', None) or ():
+            func()
+        lazy = getattr(controller, 'lazy_reporters', None) or {}
+        values = [lazy[var](controller) if var in lazy else getattr(controller, var)
+                  for var in controller.reporters.keys()]
+        self.cached_values = values
+        return values
 
     def report(self):
         """Generate string representation of values for all reporter variables"""
 
-        reporter_values = [str(getattr(self.controller, var)) for var in self.controller.reporters.keys()]
+        reporter_values = [str(value) for value in self.values()]
+        if self.writes_tick():
+            reporter_values = [str(self.ticks)] + reporter_values
         return ",".join(reporter_values) + "\n"
 
     def tick(self):
         """Advance ticks by one and do nothing else"""
 
         self.ticks += 1
+        self.cached_values = None
 
     def newrun(self):
-        """Set up for a new run by incrementing the run number and setting the nr of ticks to 0"""
+        """
+
+        Set up for a new run by closing the output of the current run, incrementing the run number and setting the nr
+        of ticks to 0
+
+        """
 
+        self.close()
         self.run += 1
         self.ticks = 0
+        self.cached_values = None
+        if self.schedule is not None:
+            self.schedule.reset()
 
     def write_to_file(self, line, method='a', file=None, file_open=False):
         """
@@ -1,12 +1,508 @@
 
+import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("ABMTools: frozen networks require numpy, which could not be imported")
+
+
 class Tie:
     """
 
-    A tie between agents.
+    A tie between two agents. Ties are stored in an ABMTools.tie.Network; a Tie object is only a handle on one of
+    them, returned by Network.add() and Network.tie(). Its attributes are read and written with tie['name'].
+
+    Args:
+    :param network (ABMTools.tie.Network): Network the tie is stored in
+    :param source (ABMTools.Agent or subclass): Agent the tie starts at (either end for undirected networks)
+    :param target (ABMTools.Agent or subclass): Agent the tie ends at
+
+    """
+
+    __slots__ = ('network', 'source', 'target')
+
+    def __init__(self, network, source, target):
+        self.network = network
+        self.source = source
+        self.target = target
+
+    def __str__(self):
+        return "Type = Tie, Source = {}, Target = {}".format(self.source.ident, self.target.ident)
+
+    def __eq__(self, other):
+        return (isinstance(other, Tie) and self.network is other.network and
+                self.network.edge(self.source, self.target) == other.network.edge(other.source, other.target))
+
+    def __hash__(self):
+        ends = (self.source.ident, self.target.ident)
+        return hash(ends if self.network.directed else frozenset(ends))
+
+    @property
+    def index(self):
+        """Position of the tie in the Network's edge columns (changes when other ties are removed)"""
+
+        return self.network.edge(self.source, self.target)
+
+    def other(self, agent):
+        """Return the agent at the other end of the tie"""
+
+        return self.target if agent is self.source else self.source
+
+    def __getitem__(self, name):
+        return self.network.attributes[name][self.index]
+
+    def __setitem__(self, name, value):
+        self.network.set_attribute(name, self.index, value)
+
+    def remove(self):
+        """Remove the tie from its Network"""
+
+        self.network.remove(self.source, self.target)
+
+
+class Network:
+    """
+
+    A network of ties between Agents, for networks with millions of ties.
+
+    Ties are stored as columns: the idents of their sources and targets in two arrays, and every tie attribute in a
+    column of its own, so ties cost a few bytes each rather than an object each. For changes, every Agent has a
+    dictionary of neighbor ident -> tie index, so adding, removing and finding a tie costs O(1) (amortized) and
+    iterating over the neighbors of an Agent costs O(degree). A tie is removed by moving the last tie into its place,
+    so tie indices change when ties are removed.
+
+    For traversal of the whole network, freeze() returns a compressed sparse row (CSR) snapshot with numpy arrays, which
+    is kept until the network changes. Ties can be added in bulk with add_edges() (used by the generators in
+    ABMTools.generators); the neighbor dictionaries are then only rebuilt when a method needs them, so building and
+    freezing a large network never loops over its ties in Python.
+
+    When given a Controller, the Network registers itself with it (as controller.network), so ties of Agents killed
+    by the Controller are removed and ABMTools.Controller.clear_ties() clears the Network.
+
+    Args:
+    :param controller=None (ABMTools.Controller or subclass): Controller to register with
+    :param directed=False (bool): If True, ties have a direction (from source to target)
+
+    """
+
+    def __init__(self, controller=None, directed=False):
+        self.directed = directed
+        self.sources = array.array('q')
+        self.targets = array.array('q')
+        self.attributes = {}
+        self.defaults = {}
+        self._out = {}
+        self._into = {} if directed else self._out
+        self.agents = {}
+        self.version = 0
+        # Upper bound on the idents in the network (kept through removals), so freeze() need not scan the ties
+        self.max_ident = -1
+        self.frozen = None
+        self.frozen_in = None
+        self.watchers = []
+        self.controller = controller
+        if controller is not None:
+            controller.register(self)
+            controller.network = self
+
+    def __len__(self):
+        return len(self.sources)
+
+    @property
+    def out(self):
+        """Dictionary of source ident -> {target ident: tie index}, rebuilt after add_edges()"""
+
+        if self._out is None:
+            self.build_index()
+        return self._out
+
+    @property
+    def into(self):
+        """Dictionary of target ident -> {source ident: tie index} (the same as out for undirected networks)"""
+
+        if self._out is None:
+            self.build_index()
+        return self._into
+
+    def build_index(self):
+        """Rebuild the neighbor dictionaries from the edge columns"""
+
+        out = {}
+        into = {} if self.directed else out
+        for index, (source, target) in enumerate(zip(self.sources, self.targets)):
+            out.setdefault(source, {})[target] = index
+            into.setdefault(target, {})[source] = index
+        self._out = out
+        self._into = into
+
+    def __contains__(self, pair):
+        return self.edge(*pair) is not None
+
+    def register(self, watcher):
+        """
+
+        Register an object which keeps state about the ties of this Network (e.g. ABMTools.netstats.NetworkStats) so
+        that it is notified of changes. Notifications are method calls on the watcher, which only need to be defined
+        for the notifications the watcher is interested in:
+            tie_added(source, target): a tie between two idents was added
+            tie_removed(source, target): a tie between two idents was removed
+            ties_added(indices): ties were added in bulk by add_edges() (indices is a range of tie indices)
+            ties_cleared(): all ties were removed
+
+        Args:
+        :param watcher: Object to notify
+
+        """
+
+        if watcher not in self.watchers:
+            self.watchers.append(watcher)
+
+    def notify(self, event, *args):
+        """Notify all registered watchers of an event (see register())"""
+
+        for watcher in self.watchers:
+            handler = getattr(watcher, event, None)
+            if handler is not None:
+                handler(*args)
+
+    # ATTRIBUTES
+
+    def add_attribute(self, name, default=None, typecode=None):
+        """
+
+        Add a tie attribute column. Existing ties get the default value.
+
+        Args:
+        :param name (string): Name of the attribute
+        :param default=None: Value for ties which do not set the attribute
+        :param typecode=None (string): array.array typecode (e.g. 'd' for floats) to store the column compactly. A list
+            is used if None. A typed column needs a default which fits the typecode
+
+        """
+
+        if typecode is not None and default is None:
+            raise ValueError("ABMTools: tie attribute {} with typecode '{}' needs a default value".format(name, typecode))
+        if typecode is None:
+            column = [default] * len(self)
+        else:
+            column = array.array(typecode, [default]) * len(self)
+        self.attributes[name] = column
+        self.defaults[name] = default
+
+    def set_attribute(self, name, index, value):
+        if name not in self.attributes:
+            self.add_attribute(name)
+        self.attributes[name][index] = value
+
+    def column(self, name):
+        """Return the column of a tie attribute, in tie index order (the column itself, not a copy)"""
+
+        return self.attributes[name]
+
+    # TIES
+
+    def edge(self, a, b):
+        """Return the index of the tie from Agent a to Agent b, or None"""
+
+        neighbors = self.out.get(a.ident)
+        return neighbors.get(b.ident) if neighbors is not None else None
+
+    def tie(self, a, b):
+        """Return the tie from Agent a to Agent b (for undirected networks: between a and b), or None"""
+
+        return Tie(self, a, b) if self.edge(a, b) is not None else None
+
+    def add(self, a, b, **attributes):
+        """
+
+        Add a tie from Agent a to Agent b (between a and b for undirected networks). If the tie already exists, only
+        its attributes are set.
+
+        Args:
+        :param a (ABMTools.Agent or subclass): Source of the tie
+        :param b (ABMTools.Agent or subclass): Target of the tie
+        :param attributes: Values of tie attributes
+
+        Returns:
+        :return (ABMTools.tie.Tie): The tie
+
+        """
+
+        index = self.edge(a, b)
+        if index is None:
+            self.agents[a.ident] = a
+            self.agents[b.ident] = b
+            index = self.add_edge(a.ident, b.ident)
+        for name, value in attributes.items():
+            self.set_attribute(name, index, value)
+        return Tie(self, a, b)
+
+    def add_edge(self, source, target):
+        """Add a tie between two idents (the Agents must be known to the Network). Returns its index"""
+
+        index = len(self.sources)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.max_ident = max(self.max_ident, source, target)
+        for name, column in self.attributes.items():
+            column.append(self.defaults[name])
+        self.out.setdefault(source, {})[target] = index
+        self.into.setdefault(target, {})[source] = index
+        self.version += 1
+        if self.watchers:
+            self.notify('tie_added', source, target)
+        return index
+
+    def add_edges(self, sources, targets, agents=None, **attributes):
+        """
+
+        Add many ties at once, from arrays of idents. The ties must not exist yet and must not repeat; this is not
+        checked. The neighbor dictionaries are dropped and rebuilt when they are next needed, so adding ties this way
+        costs O(ties) array operations.
+
+        Args:
+        :param sources (sequence or numpy.ndarray of ints): Idents of the sources of the ties
+        :param targets (sequence or numpy.ndarray of ints): Idents of the targets of the ties
+        :param agents=None (iterable of ABMTools.Agent or subclass): Agents the idents belong to, if they are not
+            known to the Network yet
+        :param attributes: Values of tie attributes, one sequence per attribute, in the order of the ties
+
+        Returns:
+        :return (range): Indices of the new ties
+
+        """
+
+        if len(sources) != len(targets):
+            raise ValueError("ABMTools: add_edges() needs as many sources as targets")
+        if agents is not None:
+            self.agents.update((agent.ident, agent) for agent in agents)
+        start = len(self.sources)
+        if numpy is not None:
+            self.sources.frombytes(numpy.ascontiguousarray(sources, dtype=numpy.int64).tobytes())
+            self.targets.frombytes(numpy.ascontiguousarray(targets, dtype=numpy.int64).tobytes())
+        else:
+            self.sources.extend(sources)
+            self.targets.extend(targets)
+        added = len(self.sources) - start
+        if added:
+            if numpy is not None:
+                new_max = int(max(numpy.max(sources), numpy.max(targets)))
+            else:
+                new_max = max(max(sources), max(targets))
+            self.max_ident = max(self.max_ident, new_max)
+        for name in attributes:
+            if name not in self.attributes:
+                self.add_attribute(name)
+                del self.attributes[name][start:]
+        for name, column in self.attributes.items():
+            if name in attributes:
+                column.extend(attributes[name])
+            else:
+                column.extend([self.defaults[name]] * added)
+        if added:
+            self._out = self._into = None
+            self.version += 1
+            if self.watchers:
+                self.notify('ties_added', range(start, start + added))
+        return range(start, start + added)
+
+    def remove(self, a, b):
+        """Remove the tie from Agent a to Agent b (does nothing if there is none)"""
+
+        index = self.edge(a, b)
+        if index is not None:
+            self.remove_edge(index)
+
+    def remove_edge(self, index):
+        """Remove the tie at an index, by moving the last tie into its place"""
+
+        source, target = self.sources[index], self.targets[index]
+        del self.out[source][target]
+        self.into[target].pop(source, None)
+        last = len(self.sources) - 1
+        if index != last:
+            moved_source, moved_target = self.sources[last], self.targets[last]
+            self.sources[index] = moved_source
+            self.targets[index] = moved_target
+            for column in self.attributes.values():
+                column[index] = column[last]
+            self.out[moved_source][moved_target] = index
+            self.into[moved_target][moved_source] = index
+        self.sources.pop()
+        self.targets.pop()
+        for column in self.attributes.values():
+            column.pop()
+        self.version += 1
+        if self.watchers:
+            self.notify('tie_removed', source, target)
+
+    def remove_node(self, agent):
+        """Remove all ties of an Agent"""
+
+        ident = agent.ident
+        for neighbor in list(self.out.get(ident, ())):
+            index = self.out[ident].get(neighbor)
+            if index is not None:
+                self.remove_edge(index)
+        for neighbor in list(self.into.get(ident, ())):
+            index = self.into[ident].get(neighbor)
+            if index is not None:
+                self.remove_edge(index)
+        self.out.pop(ident, None)
+        self.into.pop(ident, None)
+        self.agents.pop(ident, None)
+
+    def clear(self):
+        """Remove all ties"""
+
+        del self.sources[:]
+        del self.targets[:]
+        for column in self.attributes.values():
+            del column[:]
+        self._out = {}
+        self._into = {} if self.directed else self._out
+        self.agents.clear()
+        self.max_ident = -1
+        self.version += 1
+        if self.watchers:
+            self.notify('ties_cleared')
+
+    def agent_killed(self, agent, group):
+        if agent.ident in self.agents:
+            self.remove_node(agent)
+
+    # NEIGHBORS
+
+    def neighbors(self, agent):
+        """Return the Agents tied to an Agent (for directed networks: the targets of its ties). O(degree)"""
+
+        agents = self.agents
+        return [agents[i] for i in self.out.get(agent.ident, ())]
+
+    def in_neighbors(self, agent):
+        """Return the Agents with a tie to an Agent (the same as neighbors() for undirected networks)"""
+
+        agents = self.agents
+        return [agents[i] for i in self.into.get(agent.ident, ())]
+
+    def degree(self, agent):
+        """Return the number of ties of an Agent (for directed networks: its out-degree)"""
+
+        return len(self.out.get(agent.ident, ()))
+
+    def in_degree(self, agent):
+        """Return the number of ties to an Agent (the same as degree() for undirected networks)"""
+
+        return len(self.into.get(agent.ident, ()))
+
+    def ties_of(self, agent):
+        """Return the ties of an Agent (for directed networks: the ties starting at it)"""
+
+        agents = self.agents
+        return [Tie(self, agent, agents[i]) for i in self.out.get(agent.ident, ())]
+
+    def ties(self):
+        """Iterate over all ties"""
+
+        agents = self.agents
+        for source, target in zip(self.sources, self.targets):
+            yield Tie(self, agents[source], agents[target])
+
+    # FROZEN SNAPSHOT
+
+    def freeze(self, n_nodes=None, reverse=False):
+        """
+
+        Return a compressed sparse row (CSR) snapshot of the network, with nodes numbered by Agent ident. The snapshot
+        is kept until the network changes. Requires numpy.
+
+        Args:
+        :param n_nodes=None (int): Number of nodes (at least one more than the largest ident). Defaults to the number
+            of Agent idents allocated by the Controller, or one more than the largest ident tied since the network was
+            last cleared
+        :param reverse=False (bool): If True, the rows of a directed network hold the sources of the ties to every
+            node instead of the targets of its ties
+
+        Returns:
+        :return (ABMTools.tie.CSR): The snapshot
+
+        """
+
+        _require_numpy()
+        if n_nodes is None:
+            n_nodes = self.max_ident + 1
+            if self.controller is not None and hasattr(self.controller, 'ident_allocator'):
+                n_nodes = max(n_nodes, self.controller.ident_allocator('agent').high)
+        reverse = reverse and self.directed
+        frozen = self.frozen_in if reverse else self.frozen
+        if frozen is not None and frozen.version == self.version and frozen.n_nodes == n_nodes:
+            return frozen
+        sources = numpy.frombuffer(self.sources, dtype=numpy.int64).copy() if len(self) else numpy.zeros(0, numpy.int64)
+        targets = numpy.frombuffer(self.targets, dtype=numpy.int64).copy() if len(self) else numpy.zeros(0, numpy.int64)
+        if reverse:
+            sources, targets = targets, sources
+        edges = numpy.arange(len(self), dtype=numpy.int64)
+        if not self.directed:
+            # Self-ties are listed once in their node's row, as in Network.neighbors()
+            mirrored = sources != targets
+            sources, targets = (numpy.concatenate([sources, targets[mirrored]]),
+                                numpy.concatenate([targets, sources[mirrored]]))
+            edges = numpy.concatenate([edges, edges[mirrored]])
+        order = numpy.argsort(sources, kind='stable')
+        indptr = numpy.zeros(n_nodes + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(sources, minlength=n_nodes), out=indptr[1:])
+        frozen = CSR(indptr, targets[order], edges[order], n_nodes, self.version)
+        if reverse:
+            self.frozen_in = frozen
+        else:
+            self.frozen = frozen
+        return frozen
+
+
+class CSR:
+    """
+
+    Compressed sparse row snapshot of an ABMTools.tie.Network (see Network.freeze()). The neighbors of node i (the
+    Agent with ident i) are indices[indptr[i]:indptr[i + 1]], and edges holds the index of the tie for every entry (to
+    look up tie attributes).
 
-    NOT IMPLEMENTED YET
+    Args:
+    :param indptr (numpy.ndarray): Row pointers, of length n_nodes + 1
+    :param indices (numpy.ndarray): Neighbor idents
+    :param edges (numpy.ndarray): Tie index of every entry
+    :param n_nodes (int): Number of nodes
+    :param version (int): Version of the Network the snapshot was taken of
 
     """
 
-    def __init__(self):
-        raise NotImplementedError("ABMTools: Ties are not yet implemented")
+    def __init__(self, indptr, indices, edges, n_nodes, version):
+        self.indptr = indptr
+        self.indices = indices
+        self.edges = edges
+        self.n_nodes = n_nodes
+        self.version = version
+        self.cache = {}
+
+    def neighbors(self, ident):
+        """Return the neighbor idents of a node as an array"""
+
+        return self.indices[self.indptr[ident]:self.indptr[ident + 1]]
+
+    def degrees(self):
+        """Return the (out-)degree of every node as an array"""
+
+        return numpy.diff(self.indptr)
+
+    def rows(self):
+        """Return the node (row) of every entry as an array, computed once per snapshot"""
+
+        rows = self.cache.get('rows')
+        if rows is None:
+            rows = self.cache['rows'] = numpy.repeat(numpy.arange(self.n_nodes, dtype=numpy.int64), self.degrees())
+        return rows
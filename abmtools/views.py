@@ -0,0 +1,162 @@
+
+import abc
+import collections.abc
+import itertools
+import random
+
+# Number of random draws Where.choice() tries before it falls back to collecting all matching instances
+CHOICE_ATTEMPTS = 16
+
+
+class View(collections.abc.Sequence):
+    """
+
+    Read-only view of a collection of instances (e.g. ABMTools.Controller.agents, Controller.groups or
+    ABMTools.Group.members) which leaves out some of them without copying the collection. Views support len(),
+    iteration, indexing and the in operator, so they can be passed to random.choice() and to the functions in
+    ABMTools.functions like a list. Use list(view) for a copy which can be modified.
+
+    Views read the collection they are made from whenever they are used, so they follow changes to it (except where a
+    subclass says otherwise).
+
+    This class is meant to be extended. Subclasses must implement __len__(), __iter__() and item().
+
+    Args:
+    :param collection (list or other sequence): Collection to view
+
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, list(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.item(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('ABMTools: view index out of range')
+        return self.item(index)
+
+    @abc.abstractmethod
+    def __len__(self):
+        pass
+
+    @abc.abstractmethod
+    def __iter__(self):
+        pass
+
+    @abc.abstractmethod
+    def item(self, index):
+        """Return the instance at a (non-negative, in range) index of the view"""
+
+        pass
+
+    def choice(self, rng=None):
+        """
+
+        Return a random instance of the view.
+
+        Args:
+        :param rng=None (random.Random): Random number generator (e.g. from ABMTools.RNGManager.stream()). Defaults
+            to the random module
+
+        Returns:
+        :return: Random instance. Raises IndexError if the view is empty
+
+        """
+
+        rng = random if rng is None else rng
+        n = len(self)
+        if not n:
+            raise IndexError('ABMTools: cannot choose from an empty view')
+        return self.item(rng.randrange(n))
+
+
+class Excluding(View):
+    """
+
+    View of a collection without one of its instances (e.g. all Groups but an Agent's own). Indexes are remapped
+    around the position of the excluded instance, so len(), indexing and random.choice() cost O(1) on top of finding
+    that position once, when the view is made.
+
+    The position is remembered, so make a new view after instances were added to or removed from the collection.
+
+    Args:
+    :param collection (list or other sequence): Collection to view
+    :param excluded: Instance to leave out (its first occurrence). Raises ValueError if it is not in the collection
+
+    """
+
+    def __init__(self, collection, excluded):
+        View.__init__(self, collection)
+        self.excluded = excluded
+        self.position = collection.index(excluded)
+
+    def __len__(self):
+        return len(self.collection) - 1
+
+    def __iter__(self):
+        collection = self.collection
+        return itertools.chain(itertools.islice(collection, self.position),
+                               itertools.islice(collection, self.position + 1, None))
+
+    def __contains__(self, instance):
+        if instance is self.excluded or instance == self.excluded:
+            return self.collection.count(instance) > 1
+        return instance in self.collection
+
+    def item(self, index):
+        return self.collection[index if index < self.position else index + 1]
+
+
+class Where(View):
+    """
+
+    View of the instances of a collection for which a predicate is true (e.g. all unhappy Agents). Nothing is copied
+    or stored, so the view always reflects the current collection and the current state of its instances, but len()
+    and indexing evaluate the predicate for the instances of the collection (O(len(collection))). choice() draws
+    random instances of the collection until one matches, which takes O(1) draws while matches are common.
+
+    Args:
+    :param collection (list or other sequence): Collection to view
+    :param predicate (callable): Function of an instance, True for instances in the view
+
+    """
+
+    def __init__(self, collection, predicate):
+        View.__init__(self, collection)
+        self.predicate = predicate
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __iter__(self):
+        return filter(self.predicate, self.collection)
+
+    def __contains__(self, instance):
+        return instance in self.collection and bool(self.predicate(instance))
+
+    def __bool__(self):
+        return any(True for _ in self)
+
+    def item(self, index):
+        return next(itertools.islice(self, index, None))
+
+    def choice(self, rng=None):
+        rng = random if rng is None else rng
+        collection, predicate = self.collection, self.predicate
+        # Uniform draws from the collection, of which matching ones are kept, are uniform draws from the view
+        if len(collection):
+            for _ in range(CHOICE_ATTEMPTS):
+                instance = collection[rng.randrange(len(collection))]
+                if predicate(instance):
+                    return instance
+        matches = list(self)
+        if not matches:
+            raise IndexError('ABMTools: cannot choose from an empty view')
+        return matches[rng.randrange(len(matches))]
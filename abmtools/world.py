@@ -0,0 +1,304 @@
+
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("ABMTools: grid worlds require numpy, which could not be imported")
+
+
+def offsets(kind='moore', radius=1, include_center=False):
+    """
+
+    Return the (dx, dy) offsets of the cells in a neighborhood.
+
+    Args:
+    :param kind='moore' (string): 'moore' (square), 'von_neumann' (diamond, |dx| + |dy| <= radius) or 'radius'
+        (circle, dx ** 2 + dy ** 2 <= radius ** 2)
+    :param radius=1 (int): Size of the neighborhood
+    :param include_center=False (bool): If True, include the offset (0, 0)
+
+    Returns:
+    :return (list of tuples): Offsets, row by row
+
+    """
+
+    if kind not in ('moore', 'von_neumann', 'radius'):
+        raise ValueError("ABMTools: unknown neighborhood {}, use 'moore', 'von_neumann' or 'radius'".format(kind))
+    result = []
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            if not include_center and dx == 0 and dy == 0:
+                continue
+            if kind == 'von_neumann' and abs(dx) + abs(dy) > radius:
+                continue
+            if kind == 'radius' and dx * dx + dy * dy > radius * radius:
+                continue
+            result.append((dx, dy))
+    return result
+
+
+class Grid:
+    """
+
+    A grid-based world of width x height patches (cells). Patch variables are numpy arrays of shape (width, height),
+    indexed [x, y], so operations on all patches at once (diffuse(), evaporate(), neighbor_sum()) are array operations
+    rather than loops over patches. Agents are placed on patches; an occupancy index maps every patch to the Agents
+    on it, so finding the Agents on or around a patch does not require scanning all Agents.
+
+    With torus=True the world wraps around at its edges; otherwise neighborhoods are cut off at the edges.
+
+    When given a Controller, the Grid registers itself with it (as controller.grid), so Agents killed by the Controller
+    are removed from the Grid and hatched Agents are placed on the patch of their parent.
+
+    Args:
+    :param width (int): Number of patches in the x direction
+    :param height (int): Number of patches in the y direction
+    :param controller=None (ABMTools.Controller or subclass): Controller to register with
+    :param torus=True (bool): If True, wrap around at the edges
+
+    """
+
+    def __init__(self, width, height, controller=None, torus=True):
+        _require_numpy()
+        self.width = width
+        self.height = height
+        self.torus = torus
+        self.patches = {}
+        self.positions = {}
+        self.cells = {}
+        self.counts = numpy.zeros((width, height), dtype=numpy.int64)
+        self.neighborhoods = {}
+        self.controller = controller
+        if controller is not None:
+            controller.register(self)
+            controller.grid = self
+
+    # PATCH VARIABLES
+
+    def add_patch_variable(self, name, value=0.0, dtype=float):
+        """
+
+        Add a patch variable: an array with one value per patch, available as grid[name].
+
+        Args:
+        :param name (string): Name of the variable
+        :param value=0.0: Initial value of all patches (or an array of shape (width, height))
+        :param dtype=float: numpy dtype of the array
+
+        Returns:
+        :return (numpy.ndarray): The array
+
+        """
+
+        array = numpy.empty((self.width, self.height), dtype=dtype)
+        array[...] = value
+        self.patches[name] = array
+        return array
+
+    def __getitem__(self, name):
+        return self.patches[name]
+
+    def __setitem__(self, name, array):
+        self.patches[name] = numpy.asarray(array).reshape(self.width, self.height)
+
+    def values(self, name):
+        """Return an array of a patch variable"""
+
+        return self.patches[name]
+
+    # COORDINATES
+
+    def wrap(self, x, y):
+        """Return the patch at (x, y), wrapped around the edges (torus), or None if it is outside the world"""
+
+        if self.torus:
+            return x % self.width, y % self.height
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x, y
+        return None
+
+    def neighbors(self, x, y, kind='moore', radius=1, include_center=False):
+        """
+
+        Return the patches in a neighborhood of a patch.
+
+        Args:
+        :param x (int): x coordinate of the patch
+        :param y (int): y coordinate of the patch
+        :param kind='moore' (string): 'moore', 'von_neumann' or 'radius' (see ABMTools.world.offsets())
+        :param radius=1 (int): Size of the neighborhood
+        :param include_center=False (bool): If True, include the patch itself
+
+        Returns:
+        :return (list of tuples): (x, y) of the patches. On a torus smaller than the neighborhood, patches can appear
+            more than once
+
+        """
+
+        key = (kind, radius, include_center)
+        deltas = self.neighborhoods.get(key)
+        if deltas is None:
+            deltas = self.neighborhoods[key] = offsets(kind, radius, include_center)
+        if self.torus:
+            w, h = self.width, self.height
+            return [((x + dx) % w, (y + dy) % h) for dx, dy in deltas]
+        w, h = self.width, self.height
+        return [(x + dx, y + dy) for dx, dy in deltas if 0 <= x + dx < w and 0 <= y + dy < h]
+
+    # AGENTS
+
+    def place(self, agent, x, y):
+        """Put an Agent on a patch (moving it if it already is on the Grid)"""
+
+        cell = self.wrap(x, y)
+        if cell is None:
+            raise ValueError("ABMTools: patch ({}, {}) is outside the world".format(x, y))
+        old = self.positions.get(agent)
+        if old is not None:
+            if old == cell:
+                return
+            self.cells[old].remove(agent)
+            self.counts[old] -= 1
+        self.positions[agent] = cell
+        self.cells.setdefault(cell, []).append(agent)
+        self.counts[cell] += 1
+
+    move_to = place
+
+    def place_randomly(self, agents, rng=None):
+        """Put every Agent in a list on a random patch"""
+
+        rng = rng if rng is not None else random
+        for a in agents:
+            self.place(a, rng.randrange(self.width), rng.randrange(self.height))
+
+    def move_by(self, agent, dx, dy):
+        """Move an Agent relative to its current patch"""
+
+        x, y = self.positions[agent]
+        self.place(agent, x + dx, y + dy)
+
+    def remove(self, agent):
+        """Take an Agent off the Grid (does nothing if it is not on the Grid)"""
+
+        cell = self.positions.pop(agent, None)
+        if cell is not None:
+            self.cells[cell].remove(agent)
+            self.counts[cell] -= 1
+
+    def position(self, agent):
+        """Return the patch an Agent is on, or None"""
+
+        return self.positions.get(agent)
+
+    def agents_at(self, x, y):
+        """Return the Agents on a patch"""
+
+        return list(self.cells.get(self.wrap(x, y), ()))
+
+    def agents_near(self, agent, kind='moore', radius=1, include_center=True):
+        """
+
+        Return the other Agents in the neighborhood of an Agent's patch.
+
+        Args:
+        :param agent (ABMTools.Agent or subclass): Agent on the Grid
+        :param kind='moore' (string): 'moore', 'von_neumann' or 'radius' (see ABMTools.world.offsets())
+        :param radius=1 (int): Size of the neighborhood
+        :param include_center=True (bool): If True, include the other Agents on the Agent's own patch
+
+        Returns:
+        :return (list): The Agents, patch by patch
+
+        """
+
+        x, y = self.positions[agent]
+        result = []
+        for cell in set(self.neighbors(x, y, kind, radius, include_center)):
+            for other in self.cells.get(cell, ()):
+                if other is not agent:
+                    result.append(other)
+        return result
+
+    def agent_killed(self, agent, group):
+        self.remove(agent)
+
+    def agent_hatched(self, agent, parent):
+        cell = self.positions.get(parent)
+        if cell is not None:
+            self.place(agent, *cell)
+
+    # WHOLE-GRID OPERATIONS
+
+    def shifted(self, array, dx, dy):
+        """Return an array shifted so that result[x, y] == array[x + dx, y + dy] (0 outside a non-torus world)"""
+
+        if self.torus:
+            return numpy.roll(array, (-dx, -dy), axis=(0, 1))
+        result = numpy.zeros_like(array)
+        w, h = array.shape
+        result[max(0, -dx):min(w, w - dx), max(0, -dy):min(h, h - dy)] = \
+            array[max(0, dx):min(w, w + dx), max(0, dy):min(h, h + dy)]
+        return result
+
+    def neighbor_sum(self, name, kind='moore', radius=1, include_center=False):
+        """
+
+        Return for every patch the sum of a patch variable over its neighborhood (a convolution with a kernel of ones
+        in the shape of the neighborhood).
+
+        Args:
+        :param name (string or numpy.ndarray): Name of the patch variable, or an array of shape (width, height)
+        :param kind='moore' (string): 'moore', 'von_neumann' or 'radius' (see ABMTools.world.offsets())
+        :param radius=1 (int): Size of the neighborhood
+        :param include_center=False (bool): If True, include the patch itself
+
+        Returns:
+        :return (numpy.ndarray): Sums, of shape (width, height)
+
+        """
+
+        array = self.patches[name] if isinstance(name, str) else numpy.asarray(name)
+        total = numpy.zeros(array.shape, dtype=numpy.result_type(array.dtype, numpy.int64))
+        for dx, dy in offsets(kind, radius, include_center):
+            total += self.shifted(array, dx, dy)
+        return total
+
+    def neighbor_count(self, kind='moore', radius=1, include_center=False):
+        """Return for every patch the number of patches in its neighborhood (smaller at the edges of a non-torus)"""
+
+        return self.neighbor_sum(numpy.ones((self.width, self.height), dtype=numpy.int64), kind, radius,
+                                 include_center)
+
+    def diffuse(self, name, rate, kind='moore'):
+        """
+
+        Diffuse a patch variable: every patch shares the fraction rate of its value equally with the patches in its
+        neighborhood (as NetLogo's diffuse for 'moore'). Shares which would go beyond the edge of a non-torus world
+        stay on the patch, so the total is conserved.
+
+        Args:
+        :param name (string): Name of the patch variable
+        :param rate (float): Fraction of every patch's value to share, between 0 and 1
+        :param kind='moore' (string): 'moore' (8 neighbors) or 'von_neumann' (4 neighbors)
+
+        """
+
+        array = self.patches[name]
+        n = len(offsets(kind))
+        share = array * (rate / n)
+        result = array * (1 - rate) + self.neighbor_sum(share, kind)
+        if not self.torus:
+            result += share * (n - self.neighbor_count(kind))
+        array[...] = result
+
+    def evaporate(self, name, rate):
+        """Reduce a patch variable on every patch by the fraction rate"""
+
+        self.patches[name] *= (1 - rate)
@@ -25,4 +25,5 @@ setup(name='abmtools',
       author_email='dimaba14@gmail.com',
       license='MIT',
       packages=['abmtools'],
+      extras_require={'numpy': ['numpy'], 'scipy': ['scipy']},
       zip_safe=True)
\ No newline at end of file